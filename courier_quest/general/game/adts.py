@@ -72,9 +72,45 @@ class Queue(Generic[T]):
     def peek(self) -> Optional[T]:
         return self._buf[self._head] if self._size else None
 
+    def pop(self) -> T:
+        """Saca el último elemento encolado (uso como pila acotada)."""
+        if self._size == 0:
+            raise IndexError("pop from empty queue")
+        self._tail = (self._tail - 1) % len(self._buf)
+        item = self._buf[self._tail]
+        self._buf[self._tail] = None
+        self._size -= 1
+        return item
+
+    def peek_tail(self) -> Optional[T]:
+        return self._buf[(self._tail - 1) % len(self._buf)] if self._size else None
+
+    def resize(self, capacity: int) -> List[T]:
+        """Cambia la capacidad del buffer; si sobran elementos descarta los más
+        antiguos y los devuelve. Solo se mueven referencias."""
+        capacity = max(1, int(capacity))
+        dropped = [self.dequeue() for _ in range(max(0, self._size - capacity))]
+        old, cap = self._buf, len(self._buf)
+        self._buf = [None] * capacity
+        for i in range(self._size):
+            self._buf[i] = old[(self._head + i) % cap]
+        self._head = 0
+        self._tail = self._size % capacity
+        return dropped
+
+    def clear(self):
+        self._buf = [None] * len(self._buf)
+        self._head = self._tail = self._size = 0
+
     def __len__(self):
         return self._size
 
+    def __iter__(self) -> Iterator[T]:
+        """Recorre los elementos en orden FIFO sin consumirlos."""
+        cap = len(self._buf)
+        for i in range(self._size):
+            yield self._buf[(self._head + i) % cap]
+
     def is_empty(self):
         return self._size == 0
 
@@ -99,7 +135,8 @@ class Deque(Generic[T]):
         self.tail: Optional[_DLLNode[T]] = None
         self._size = 0
 
-    def append(self, val: T):
+    def append(self, val: T) -> _DLLNode[T]:
+        """Agrega al final y retorna el nodo creado."""
         node = _DLLNode(val)
         if not self.tail:
             self.head = self.tail = node
@@ -108,8 +145,10 @@ class Deque(Generic[T]):
             self.tail.next = node
             self.tail = node
         self._size += 1
+        return node
 
-    def appendleft(self, val: T):
+    def appendleft(self, val: T) -> _DLLNode[T]:
+        """Agrega al inicio y retorna el nodo creado."""
         node = _DLLNode(val)
         if not self.head:
             self.head = self.tail = node
@@ -118,6 +157,22 @@ class Deque(Generic[T]):
             self.head.prev = node
             self.head = node
         self._size += 1
+        return node
+
+    def insert_node_after(self, node: _DLLNode[T], prev: Optional[_DLLNode[T]]) -> _DLLNode[T]:
+        """Enlaza un nodo suelto después de `prev` (al inicio si prev es None)."""
+        node.prev = prev
+        node.next = prev.next if prev is not None else self.head
+        if node.next is not None:
+            node.next.prev = node
+        else:
+            self.tail = node
+        if prev is not None:
+            prev.next = node
+        else:
+            self.head = node
+        self._size += 1
+        return node
 
     def pop(self) -> T:
         if not self.tail:
@@ -216,33 +271,44 @@ class PriorityQueue:
     """
     Min-heap priority queue with update/remove support for job scheduling.
     Chosen for O(log n) push/pop and efficient priority-based selection, using lazy deletion for updates.
+    Removed entries are tombstoned in place; the heap is compacted once tombstones outnumber live items.
     """
+    COMPACT_MIN = 16  # don't bother compacting tiny heaps
+
     def __init__(self):
-        self._heap: List[Tuple[float, int, object]] = []
-        self._entry_finder: Dict[object, Tuple[float, int, object]] = {}
+        self._heap: List[list] = []  # [priority, count, item]
+        self._entry_finder: Dict[object, list] = {}
         self._counter = itertools.count()
+        self._stale = 0
         self.REMOVED = "<removed-task>"
 
     def push(self, item: object, priority: float):
         if item in self._entry_finder:
             self.remove(item)
-        count = next(self._counter)
-        entry = (priority, count, item)
+        entry = [priority, next(self._counter), item]
         self._entry_finder[item] = entry
         heapq.heappush(self._heap, entry)
 
     def remove(self, item: object):
         entry = self._entry_finder.pop(item, None)
         if entry:
-            # mark as removed by replacing item with REMOVED
-            removed_entry = (entry[0], entry[1], self.REMOVED)
-            # push marker; actual stale entries will be skipped on pop
-            heapq.heappush(self._heap, removed_entry)
+            # tombstone the entry itself; it is skipped on pop or dropped on compaction
+            entry[2] = self.REMOVED
+            self._stale += 1
+            if self._stale > len(self._entry_finder) and self._stale >= self.COMPACT_MIN:
+                self.compact()
+
+    def compact(self):
+        """Drop tombstones and re-heapify (O(n))."""
+        self._heap = [entry for entry in self._heap if entry[2] is not self.REMOVED]
+        heapq.heapify(self._heap)
+        self._stale = 0
 
     def pop(self) -> object:
         while self._heap:
             priority, count, item = heapq.heappop(self._heap)
             if item is self.REMOVED:
+                self._stale -= 1
                 continue
             # valid entry
             self._entry_finder.pop(item, None)
@@ -254,9 +320,134 @@ class PriorityQueue:
             priority, count, item = self._heap[0]
             if item is self.REMOVED:
                 heapq.heappop(self._heap)
+                self._stale -= 1
                 continue
             return item, priority
         return None
 
     def __len__(self):
         return len(self._entry_finder)
+
+
+# ---------------- Indexed heap ----------------
+class IndexedHeap:
+    """
+    Binary min-heap that tracks each item's position for in-place update/remove.
+    Chosen when priorities change often (schedulers, planners): update and remove are O(log n)
+    and the heap never holds more entries than live items. Ties keep insertion order.
+    """
+    def __init__(self):
+        self._heap: List[list] = []  # [priority, count, item]
+        self._pos: Dict[object, int] = {}
+        self._counter = itertools.count()
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def __contains__(self, item: object) -> bool:
+        return item in self._pos
+
+    def __iter__(self) -> Iterator[Tuple[object, float]]:
+        """(item, priority) pairs in heap order (not sorted)."""
+        return ((entry[2], entry[0]) for entry in self._heap)
+
+    def push(self, item: object, priority: float):
+        """Insert the item, or change its priority if already present."""
+        index = self._pos.get(item)
+        if index is not None:
+            self._change(index, priority)
+            return
+        self._heap.append([priority, next(self._counter), item])
+        self._pos[item] = len(self._heap) - 1
+        self._sift_up(len(self._heap) - 1)
+
+    def update(self, item: object, priority: float):
+        """Change the priority of an item already in the heap (KeyError if missing)."""
+        self._change(self._pos[item], priority)
+
+    def remove(self, item: object) -> float:
+        """Remove the item and return its priority (KeyError if missing)."""
+        return self._remove_at(self._pos[item])
+
+    def discard(self, item: object):
+        index = self._pos.get(item)
+        if index is not None:
+            self._remove_at(index)
+
+    def priority_of(self, item: object) -> Optional[float]:
+        index = self._pos.get(item)
+        return None if index is None else self._heap[index][0]
+
+    def pop(self) -> Tuple[object, float]:
+        if not self._heap:
+            raise KeyError("pop from an empty indexed heap")
+        item = self._heap[0][2]
+        return item, self._remove_at(0)
+
+    def peek(self) -> Optional[Tuple[object, float]]:
+        if not self._heap:
+            return None
+        priority, _, item = self._heap[0]
+        return item, priority
+
+    def clear(self):
+        self._heap.clear()
+        self._pos.clear()
+
+    # ---- internals ----
+    def _change(self, index: int, priority: float):
+        entry = self._heap[index]
+        old = entry[0]
+        entry[0] = priority
+        if priority < old:
+            self._sift_up(index)
+        elif priority > old:
+            self._sift_down(index)
+
+    def _remove_at(self, index: int) -> float:
+        heap = self._heap
+        entry = heap[index]
+        del self._pos[entry[2]]
+        last = heap.pop()
+        if index < len(heap):
+            heap[index] = last
+            self._pos[last[2]] = index
+            if last[:2] < entry[:2]:
+                self._sift_up(index)
+            else:
+                self._sift_down(index)
+        return entry[0]
+
+    def _sift_up(self, index: int):
+        heap, pos = self._heap, self._pos
+        entry = heap[index]
+        key = entry[:2]
+        while index > 0:
+            parent = (index - 1) >> 1
+            if heap[parent][:2] <= key:
+                break
+            heap[index] = heap[parent]
+            pos[heap[index][2]] = index
+            index = parent
+        heap[index] = entry
+        pos[entry[2]] = index
+
+    def _sift_down(self, index: int):
+        heap, pos = self._heap, self._pos
+        size = len(heap)
+        entry = heap[index]
+        key = entry[:2]
+        while True:
+            child = 2 * index + 1
+            if child >= size:
+                break
+            right = child + 1
+            if right < size and heap[right][:2] < heap[child][:2]:
+                child = right
+            if key <= heap[child][:2]:
+                break
+            heap[index] = heap[child]
+            pos[heap[index][2]] = index
+            index = child
+        heap[index] = entry
+        pos[entry[2]] = index
@@ -0,0 +1,281 @@
+# game/bundle_optimizer.py
+"""
+Optimizador de lotes: qué ofertas aceptar juntas sin pasarse de peso ni de deadlines.
+
+1. Filtro: se descartan ofertas que no caben en el inventario o que, yendo
+   directo (jugador→pickup→dropoff), ya no llegan a su deadline.
+2. Mochila: DP por listas de estados (peso, pago) con poda de dominados
+   (Nemhauser–Ullmann); el peso se discretiza a WEIGHT_STEP kg.
+3. Ruta (orienteering): se insertan los jobs elegidos, de mayor a menor pago,
+   en la posición más barata de la ruta (pickup antes que dropoff). Los que
+   romperían un deadline quedan fuera. Con objective="rate" se quitan además
+   los jobs que bajan el pago por segundo del lote.
+
+Todo corre contra un presupuesto en milisegundos: si se agota, el filtro deja
+para la próxima llamada las ofertas que necesitarían un BFS nuevo, la mochila
+termina en modo codicioso (pago/peso) y la ruta agrega lo que falta al final
+en vez de buscar la mejor posición. Los BFS se lanzan desde las paradas, que
+se repiten entre llamadas, y se guardan en el caché del OfferRanker si se
+comparte uno.
+"""
+
+from __future__ import annotations
+import time
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from .offer_ranking import OfferRanker, bfs_distances
+from .pathfinding import manhattan, neighbors
+
+Cell = Tuple[int, int]
+PICKUP = "pickup"
+DROPOFF = "dropoff"
+
+
+class BundlePlan(NamedTuple):
+    jobs: List[Any]                      # ofertas recomendadas
+    route: List[Tuple[str, Any, Cell]]   # (PICKUP/DROPOFF, job, celda) en orden
+    payout: float                        # pago de las ofertas recomendadas
+    travel_time: float                   # segundos estimados de la ruta completa
+    complete: bool                       # False si se cortó por presupuesto
+
+
+class _Distances:
+    """Distancias en celdas (Manhattan sin mapa) con el BFS lanzado desde el destino.
+
+    Los destinos son siempre paradas, así un mismo BFS sirve desde cualquier celda
+    del jugador. Las paradas pueden estar dentro de un edificio (se atienden desde
+    una celda vecina): para salir de una se usa la vecina transitable más cercana.
+    """
+
+    def __init__(self, game_map=None, ranker: Optional[OfferRanker] = None):
+        self.game_map = game_map
+        self._ranker = ranker
+        self._fields: Dict[Cell, Dict[Cell, int]] = {}
+
+    def _field(self, cell: Cell) -> Dict[Cell, int]:
+        if self._ranker is not None:
+            return self._ranker._field(cell)
+        return bfs_distances(self.game_map, cell)
+
+    def cached(self, cell: Cell) -> bool:
+        """True si llegar a `cell` no requiere un BFS nuevo."""
+        return (self.game_map is None or cell in self._fields
+                or (self._ranker is not None and cell in self._ranker._fields))
+
+    def __call__(self, a: Cell, b: Cell) -> Optional[int]:
+        if self.game_map is None:
+            return manhattan(a, b)
+        field = self._fields.get(b)
+        if field is None:
+            field = self._fields[b] = self._field(b)
+        d = field.get(a)
+        if d is None and not self.game_map.is_walkable(*a):
+            near = [field[nb] for nb in neighbors(a) if nb in field]
+            d = min(near) + 1 if near else None
+        return d
+
+
+class BundleOptimizer:
+    WEIGHT_STEP = 0.1   # kg por unidad de la mochila
+
+    def __init__(self, game_map=None, cells_per_sec: float = 9.0, ranker: Optional[OfferRanker] = None):
+        self.game_map = game_map
+        self.cells_per_sec = float(cells_per_sec)
+        self.ranker = ranker  # dueño del caché LRU de BFS que se reutiliza entre llamadas
+
+    def _distances(self) -> _Distances:
+        ranker = self.ranker
+        if ranker is not None and ranker.game_map is self.game_map:
+            return _Distances(self.game_map, ranker)
+        return _Distances(self.game_map)
+
+    def recommend(self, offers: Sequence[Any], start: Cell, now: float = 0.0, inventory: Any = None,
+                  max_weight: Optional[float] = None, weather_multiplier: float = 1.0,
+                  objective: str = "payout", budget_ms: float = 5.0) -> BundlePlan:
+        """Mejor subconjunto de `offers` para aceptar junto con lo que ya lleva el inventario."""
+        deadline = time.perf_counter() + budget_ms / 1000.0
+        dist = self._distances()
+        start = (int(start[0]), int(start[1]))
+        held = list(inventory.get_deque_values()) if inventory is not None else []
+        carried = float(getattr(inventory, "current_weight", 0.0)) if inventory is not None else 0.0
+        if max_weight is None:
+            max_weight = float(getattr(inventory, "max_weight", 10.0)) if inventory is not None else 10.0
+        headroom = max(0.0, float(max_weight) - carried)
+
+        # velocidad conservadora: como si llevara todo el peso posible
+        speed = self.cells_per_sec * float(weather_multiplier) * max(0.8, 1.0 - 0.03 * float(max_weight))
+        if speed <= 0:
+            return BundlePlan([], [], 0.0, 0.0, True)
+
+        # 1) filtro por peso y por viabilidad directa; sin tiempo solo se revisan
+        #    las ofertas con BFS en caché y el resto queda para la próxima llamada
+        candidates = []
+        complete = True
+        for job in offers:
+            if float(job.weight) > headroom:
+                continue
+            if time.perf_counter() > deadline and not (dist.cached(tuple(job.pickup)) and dist.cached(tuple(job.dropoff))):
+                complete = False
+                continue
+            to_pickup, leg = dist(start, job.pickup), dist(job.pickup, job.dropoff)
+            if to_pickup is None or leg is None:
+                continue
+            if (to_pickup + leg) / speed > job.time_remaining(now):
+                continue
+            candidates.append(job)
+
+        # 2) mochila
+        chosen, done = self._knapsack(candidates, headroom, deadline)
+        complete = complete and done
+
+        # 3) ruta con los jobs ya tomados como paradas obligatorias
+        route: List[Tuple[str, Any, Cell]] = []
+        for job in held:
+            if not getattr(job, "picked_up", False):
+                route.append((PICKUP, job, tuple(job.pickup)))
+            route.append((DROPOFF, job, tuple(job.dropoff)))
+        route, accepted, done = self._build_route(route, chosen, start, now, speed, dist, deadline)
+        complete = complete and done
+        if objective == "rate" and accepted:
+            route, accepted = self._improve_rate(route, accepted, start, now, speed, dist, deadline)
+
+        travel = self._route_cells(route, start, dist) / speed
+        return BundlePlan(accepted, route, sum(float(j.payout) for j in accepted), travel, complete)
+
+    # ---------------- mochila ----------------
+    def _knapsack(self, items: List[Any], capacity: float, deadline: float) -> Tuple[List[Any], bool]:
+        cap = int(capacity / self.WEIGHT_STEP + 1e-9)
+        weights = [int(round(float(j.weight) / self.WEIGHT_STEP)) for j in items]
+        # estados Pareto: (peso, pago, máscara de items), peso creciente y pago estrictamente creciente
+        states: List[Tuple[int, float, int]] = [(0, 0.0, 0)]
+        complete = True
+        order = sorted(range(len(items)), key=lambda i: -float(items[i].payout) / max(weights[i], 1))
+        for pos, i in enumerate(order):
+            if time.perf_counter() > deadline:
+                complete = False
+                # resto en modo codicioso sobre el mejor estado
+                w, v, mask = states[-1]
+                for j in order[pos:]:
+                    if w + weights[j] <= cap:
+                        w, v, mask = w + weights[j], v + float(items[j].payout), mask | (1 << j)
+                states = [(w, v, mask)]
+                break
+            wi, vi, bit = weights[i], float(items[i].payout), 1 << i
+            grown = [(w + wi, v + vi, mask | bit) for w, v, mask in states if w + wi <= cap]
+            merged = sorted(states + grown, key=lambda s: (s[0], -s[1]))
+            states = []
+            for state in merged:
+                if not states or state[1] > states[-1][1]:
+                    states.append(state)
+        mask = states[-1][2]
+        return [items[i] for i in range(len(items)) if mask & (1 << i)], complete
+
+    # ---------------- ruta ----------------
+    @staticmethod
+    def _route_cells(route, start: Cell, dist) -> float:
+        total, here = 0, start
+        for _, _, cell in route:
+            d = dist(here, cell)
+            if d is None:
+                return float("inf")
+            total += d
+            here = cell
+        return total
+
+    @staticmethod
+    def _meets_deadlines(route, start: Cell, now: float, speed: float, dist, strict) -> bool:
+        """Deadlines de los jobs en `strict` (ids de objeto); los ya tomados pueden ir tarde."""
+        cells, here = 0, start
+        for kind, job, cell in route:
+            d = dist(here, cell)
+            if d is None:
+                return False
+            cells += d
+            here = cell
+            if kind == DROPOFF and id(job) in strict and cells / speed > job.time_remaining(now):
+                return False
+        return True
+
+    @staticmethod
+    def _insertions(route, start: Cell, p: Cell, q: Cell, dist) -> List[Tuple[int, int, int]]:
+        """(celdas extra, i, k) de cada forma de insertar pickup `p` en i y dropoff `q` en k,
+        de la más barata a la más cara. El costo de cada hueco se calcula una vez, así
+        no se recorre la ruta completa por cada par (i, k)."""
+        cells = [start] + [cell for _, _, cell in route]
+        n = len(cells)
+
+        def detour(a: Cell, x: Cell, b: Optional[Cell], base: Optional[int]) -> Optional[int]:
+            to_x = dist(a, x)
+            if b is None or to_x is None:
+                return to_x
+            from_x = dist(x, b)
+            return None if from_x is None or base is None else to_x + from_x - base
+
+        legs = [dist(cells[g], cells[g + 1]) for g in range(n - 1)] + [None]
+        nexts = cells[1:] + [None]
+        gap_p = [detour(cells[g], p, nexts[g], legs[g]) for g in range(n)]
+        gap_q = [detour(cells[g], q, nexts[g], legs[g]) for g in range(n)]
+        p_to_q = dist(p, q)
+        out = []
+        for i in range(n):
+            if gap_p[i] is None:
+                continue
+            # dropoff justo después del pickup
+            if p_to_q is not None:
+                to_p = dist(cells[i], p)
+                tail = 0 if nexts[i] is None else dist(q, nexts[i])
+                if tail is not None and (nexts[i] is None or legs[i] is not None):
+                    out.append((to_p + p_to_q + tail - (legs[i] or 0), i, i + 1))
+            for j in range(i + 1, n):
+                if gap_q[j] is not None:
+                    out.append((gap_p[i] + gap_q[j], i, j + 1))
+        out.sort(key=lambda o: o[0])  # estable: a igual costo gana el primero
+        return out
+
+    def _build_route(self, route, jobs, start: Cell, now: float, speed: float, dist, deadline: float):
+        """Inserción más barata de cada job (pickup y luego dropoff)."""
+        accepted = []
+        strict = set()
+        done = True
+        for job in sorted(jobs, key=lambda j: -float(j.payout)):
+            pickup = (PICKUP, job, tuple(job.pickup))
+            dropoff = (DROPOFF, job, tuple(job.dropoff))
+            trial = strict | {id(job)}
+            if time.perf_counter() > deadline:
+                # sin tiempo: inserción codiciosa al final de la ruta
+                done = False
+                candidate = route + [pickup, dropoff]
+                if self._meets_deadlines(candidate, start, now, speed, dist, trial):
+                    route = candidate
+                    accepted.append(job)
+                    strict = trial
+                continue
+            for _, i, k in self._insertions(route, start, pickup[2], dropoff[2], dist):
+                with_pickup = route[:i] + [pickup] + route[i:]
+                candidate = with_pickup[:k] + [dropoff] + with_pickup[k:]
+                if self._meets_deadlines(candidate, start, now, speed, dist, trial):
+                    route = candidate
+                    accepted.append(job)
+                    strict = trial
+                    break
+        return route, accepted, done
+
+    def _improve_rate(self, route, accepted, start: Cell, now: float, speed: float, dist, deadline: float):
+        """Quita jobs mientras eso suba el pago por segundo del lote."""
+        def rate(r, jobs):
+            travel = self._route_cells(r, start, dist) / speed
+            return sum(float(j.payout) for j in jobs) / max(travel, 1e-9)
+
+        current = rate(route, accepted)
+        while len(accepted) > 1 and time.perf_counter() <= deadline:
+            best = None
+            for job in accepted:
+                r = [stop for stop in route if stop[1] is not job]
+                jobs = [j for j in accepted if j is not job]
+                value = rate(r, jobs)
+                if value > current and (best is None or value > best[0]):
+                    best = (value, r, jobs)
+            if best is None:
+                break
+            current, route, accepted = best
+        return route, accepted
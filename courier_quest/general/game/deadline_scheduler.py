@@ -0,0 +1,105 @@
+# game/deadline_scheduler.py
+"""
+DeadlineScheduler: agenda de eventos de deadline sobre el tiempo simulado.
+
+Por cada job hay hasta tres eventos (aviso previo, vencimiento y paquete
+perdido), pero en el heap vive solo el próximo: al dispararse uno se agenda el
+siguiente. Así la carga inicial mete un solo evento por job. Cada evento sale
+del heap una sola vez; reprogramar o cancelar un job invalida sus eventos viejos
+por generación, sin buscarlos en el heap.
+Si nada vence, pop_due() solo mira la cima del heap: O(1) por tick.
+"""
+
+from __future__ import annotations
+import heapq
+import itertools
+from typing import Dict, Iterable, List, Optional, Tuple
+
+WARNING = "warning"
+EXPIRED = "expired"
+LOST = "lost"
+
+
+class DeadlineScheduler:
+    def __init__(self, warning_lead: float = 30.0, lost_grace: Optional[float] = 120.0):
+        self.warning_lead = warning_lead
+        self.lost_grace = lost_grace
+        self._heap: List[Tuple[float, int, str, str, int]] = []  # (time, seq, job_id, kind, generation)
+        self._seq = itertools.count()
+        self._generation: Dict[str, int] = {}
+        self._deadlines: Dict[str, float] = {}
+
+    def __len__(self) -> int:
+        return len(self._deadlines)
+
+    def schedule(self, job_id: str, deadline: float):
+        """Agenda (o reprograma) los eventos del job para `deadline` (segundos de juego)."""
+        heapq.heappush(self._heap, self._first(job_id, deadline))
+
+    def schedule_many(self, items: Iterable[Tuple[str, float]]):
+        """Agenda un lote de (job_id, deadline) con un solo heapify."""
+        heap = self._heap
+        push = heap.append
+        generation = self._generation
+        deadlines = self._deadlines
+        seq = self._seq
+        lead = float(self.warning_lead or 0.0)
+        kind = WARNING if lead else EXPIRED
+        for job_id, deadline in items:
+            gen = generation.get(job_id, 0) + 1
+            generation[job_id] = gen
+            deadline = float(deadline)
+            deadlines[job_id] = deadline
+            push((deadline - lead, next(seq), job_id, kind, gen))
+        heapq.heapify(heap)
+
+    def _first(self, job_id: str, deadline: float) -> Tuple[float, int, str, str, int]:
+        gen = self._generation.get(job_id, 0) + 1
+        self._generation[job_id] = gen
+        deadline = float(deadline)
+        self._deadlines[job_id] = deadline
+        if self.warning_lead:
+            return deadline - float(self.warning_lead), next(self._seq), job_id, WARNING, gen
+        return deadline, next(self._seq), job_id, EXPIRED, gen
+
+    def _after(self, job_id: str, kind: str, gen: int) -> Optional[Tuple[float, int, str, str, int]]:
+        """Evento que sigue a `kind` para el job (None si era el último)."""
+        deadline = self._deadlines[job_id]
+        if kind == WARNING:
+            return deadline, next(self._seq), job_id, EXPIRED, gen
+        if kind == EXPIRED and self.lost_grace is not None:
+            return deadline + float(self.lost_grace), next(self._seq), job_id, LOST, gen
+        return None
+
+    def cancel(self, job_id: str):
+        """Descarta los eventos pendientes del job (borrado perezoso)."""
+        if job_id in self._deadlines:
+            self._generation[job_id] = self._generation.get(job_id, 0) + 1
+            del self._deadlines[job_id]
+
+    def deadline_of(self, job_id: str) -> Optional[float]:
+        return self._deadlines.get(job_id)
+
+    def next_time(self) -> Optional[float]:
+        """Tiempo del próximo evento vigente (None si no hay)."""
+        heap = self._heap
+        while heap and heap[0][4] != self._generation.get(heap[0][2]):
+            heapq.heappop(heap)
+        return heap[0][0] if heap else None
+
+    def pop_due(self, now: float) -> List[Tuple[str, str]]:
+        """Eventos vencidos hasta `now`, en orden temporal: [(kind, job_id), ...]."""
+        heap = self._heap
+        fired: List[Tuple[str, str]] = []
+        while heap and heap[0][0] <= now:
+            _, _, job_id, kind, gen = heapq.heappop(heap)
+            if gen != self._generation.get(job_id):
+                continue
+            fired.append((kind, job_id))
+            entry = self._after(job_id, kind, gen)
+            if entry is None:
+                # último evento del job
+                self._deadlines.pop(job_id, None)
+            else:
+                heapq.heappush(heap, entry)
+        return fired
@@ -0,0 +1,49 @@
+# game_clock.py
+"""
+Relojes inyectables para los sistemas que dependen del tiempo (clima, stamina...).
+
+- RealTimeClock: lee time.time(); comportamiento histórico del juego.
+- SimulatedClock: tiempo de juego avanzado explícitamente (dt * time_scale).
+  Permite simular una partida completa sin esperar tiempo real.
+"""
+
+from __future__ import annotations
+import time
+from abc import ABC, abstractmethod
+
+
+class Clock(ABC):
+    """Interfaz mínima: now() devuelve segundos (float) en la base del reloj."""
+
+    @abstractmethod
+    def now(self) -> float:
+        ...
+
+
+class RealTimeClock(Clock):
+    """Reloj de pared (epoch)."""
+
+    def now(self) -> float:
+        return time.time()
+
+
+class SimulatedClock(Clock):
+    """Reloj de tiempo simulado. Solo avanza cuando alguien llama advance()/set()."""
+
+    def __init__(self, start: float = 0.0):
+        self._now = float(start)
+
+    def now(self) -> float:
+        return self._now
+
+    def advance(self, dt: float) -> float:
+        """Avanza el reloj dt segundos (nunca hacia atrás) y retorna el nuevo tiempo."""
+        try:
+            self._now += max(0.0, float(dt))
+        except (TypeError, ValueError):
+            pass
+        return self._now
+
+    def set(self, t: float) -> None:
+        """Fija el tiempo actual (usado al reanudar partidas o hacer fast-forward)."""
+        self._now = float(t)
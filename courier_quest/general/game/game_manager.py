@@ -8,9 +8,14 @@ from __future__ import annotations
 import time
 import logging
 import datetime
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, Tuple
 
 from .score_system import ScoreSystem
+from .game_clock import SimulatedClock
+from .job_feed import JobFeed
+from .offer_ranking import OfferRanker
+from .bundle_optimizer import BundleOptimizer, BundlePlan
+from .weather_rollout import WeatherRollout
 from ..run_api.api_client import ApiClient
 
 
@@ -24,7 +29,9 @@ class GameManager:
         self.score_system = ScoreSystem()
         self.is_running = False
 
-        # tiempo real / simulado
+        # tiempo real / simulado. El reloj simulado es la única fuente de verdad de
+        # game_simulated_time y se comparte con clima y stamina (ver bind_clock).
+        self.clock = SimulatedClock()
         self.game_start_real_time: float = 0.0
         self.game_simulated_time: float = 0.0
         self.time_scale: float = 1.0
@@ -36,6 +43,16 @@ class GameManager:
         # job checks
         self._last_job_check: float = 0.0
         self.JOB_CHECK_INTERVAL: float = 1.0
+        self.job_feed: Optional[JobFeed] = None
+        self.offer_ranker = OfferRanker()
+        self.OFFER_RANK_BUDGET_MS: float = 2.0
+        self._offer_previews: Dict[int, Tuple[Dict[str, Any], Any]] = {}  # id(raw) -> (raw, Job)
+        self.bundle_optimizer = BundleOptimizer(ranker=self.offer_ranker)
+        self.BUNDLE_BUDGET_MS: float = 5.0
+        # clima esperado (Monte Carlo) para los ETA de ofertas y lotes
+        self.weather_rollout: Optional[WeatherRollout] = None
+        self.PLANNING_HORIZON: float = 120.0
+        self.ROLLOUT_CHAINS: int = 500
 
         # mapa / tiempo del mapa (API)
         self.game_map = None
@@ -47,23 +64,31 @@ class GameManager:
         """
         Inicializa subsistemas y carga trabajos. map_data debe contener 'start_time' (ISO) y 'max_time' (segundos)
         cuando sea provisto por la API. Si datos faltan, se cargan desde API o /data/.
+        jobs_data puede ser un iterable no materializado (p. ej. el JobsFile de
+        ApiClient.jobs_file(), que se usa si no viene): un JobFeed lo lee de a poco y
+        los pedidos se ingresan por release_time.
         """
         # Offline fallback: fetch missing data using ApiClient
         api = ApiClient()
         if map_data is None:
             map_data = api.get_city_map()
         if jobs_data is None:
-            jobs_data = api.get_jobs()
+            jobs_data = api.jobs_file() or []
         if weather_data is None:
             weather_data = api.get_weather()
+        job_stream = None
+        if not isinstance(jobs_data, (list, tuple)):
+            job_stream, jobs_data = jobs_data, []
 
         from .player_state import PlayerState
         from .jobs_manager import JobManager
-        from .undo_system import UndoSystem
+        from .undo_log import UndoLog
 
         self.player_state = PlayerState()
         self.job_manager = JobManager()
-        self.undo_system = UndoSystem(max_steps=30)
+        self.undo_system = UndoLog(max_steps=30)
+        self.undo_system.watch_journal(self.job_manager)  # deshacer también des-archiva
+        self.bind_clock(self.player_state)
 
         # configurar tiempo desde map_data si está disponible
         try:
@@ -81,31 +106,50 @@ class GameManager:
         self.game_start_real_time = time.time()
         try:
             self.job_manager._game_start_epoch = float(self.game_start_real_time)
+            self.job_manager._deadline_epoch = float(self.get_game_start_timestamp())
         except Exception:
             pass
 
+        # el catálogo completo (lista o fuente en streaming) queda en PlayerState para guardar
+        orders = job_stream if job_stream is not None else jobs_data
         try:
-            self.player_state.initialize_game(map_data, jobs_data, weather_data, self.max_game_duration)
+            self.player_state.initialize_game(map_data, orders, weather_data, self.max_game_duration)
         except TypeError:
             try:
-                self.player_state.initialize_game(map_data, jobs_data, weather_data)
+                self.player_state.initialize_game(map_data, orders, weather_data)
             except Exception:
                 pass
         except Exception:
             pass
 
         if jobs_data:
-            for jd in jobs_data:
-                try:
-                    self.job_manager.add_job_from_raw(jd)
-                except Exception as e:
-                    print(f"[GAME_MANAGER] Error cargando job: {e}")
+            try:
+                self._log_ingest_errors(self.job_manager.add_jobs_bulk(jobs_data))
+            except Exception as e:
+                print(f"[GAME_MANAGER] Error cargando jobs: {e}")
+        self.job_feed = None
+        if job_stream is not None:
+            self.job_feed = JobFeed(job_stream, start_epoch=self.game_start_real_time)
+            self._feed_jobs(self.get_game_time())
 
         self.is_running = True
         self.logger.info("Game initialized")
         self.logger.info(f"Map start time: {self.map_start_time}, max duration: {self.max_game_duration}")
         self.logger.info(f"Jobs loaded: {len(self.job_manager.all_jobs()) if self.job_manager else 0}")
 
+    def _feed_jobs(self, now: float):
+        """Ingresa del feed los pedidos cuyo release_time entra en la ventana."""
+        if self.job_feed is None or self.job_manager is None:
+            return
+        batch = self.job_feed.pull(now)
+        if batch:
+            self._process_job_deadlines(batch)
+            self._log_ingest_errors(self.job_manager.add_jobs_bulk(batch))
+
+    def _log_ingest_errors(self, report: Dict[str, Any]):
+        for index, job_id, reason in report["errors"]:
+            self.logger.warning(f"Job #{index} ({job_id}) descartado: {reason}")
+
     # ---------------- Sistema de tiempo ----------------
     def _setup_dynamic_time_system(self, map_data: Dict[str, Any], jobs_data: Optional[list]):
         if not map_data:
@@ -175,7 +219,35 @@ class GameManager:
                 job["deadline_timestamp"] = None
 
     # ---------------- Helpers de tiempo ----------------
-    def set_game_map(self, game_map): self.game_map = game_map
+    @property
+    def game_simulated_time(self) -> float:
+        return self.clock.now()
+
+    @game_simulated_time.setter
+    def game_simulated_time(self, value: float):
+        self.clock.set(value)
+
+    def set_game_time(self, seconds: float):
+        """Fija el tiempo simulado (reanudación de partidas / fast-forward)."""
+        try:
+            self.clock.set(max(0.0, float(seconds)))
+        except (TypeError, ValueError):
+            pass
+
+    def bind_clock(self, holder: Any):
+        """Hace que clima y stamina de `holder` usen el reloj simulado del juego."""
+        for attr in ("weather_system", "weather_markov", "weather_grid", "player_stats"):
+            system = getattr(holder, attr, None)
+            if system is not None and hasattr(system, "set_clock"):
+                try:
+                    system.set_clock(self.clock)
+                except Exception as e:
+                    print(f"[GAME_MANAGER] Warning enlazando reloj a {attr}: {e}")
+
+    def set_game_map(self, game_map):
+        self.game_map = game_map
+        self.offer_ranker.set_game_map(game_map)
+        self.bundle_optimizer.game_map = game_map
 
     def get_game_time(self) -> float:
         try:
@@ -203,14 +275,12 @@ class GameManager:
         return self.map_start_time + datetime.timedelta(seconds=self.get_game_time())
 
     # ---------------- Caducidad de trabajos ----------------
-    def is_job_expired(self, job_data: Dict[str, Any]) -> bool:
-        if not job_data:
-            return False
-        deadline_ts = job_data.get("deadline_timestamp")
-        if deadline_ts is None:
+    def is_job_expired(self, job: Any, now: Optional[float] = None) -> bool:
+        """True si el deadline efectivo del job (en segundos de juego) ya venció."""
+        if job is None:
             return False
         try:
-            return float(self.get_game_time()) > float(deadline_ts)
+            return job.time_remaining(self.get_game_time() if now is None else now) < 0
         except Exception:
             return False
 
@@ -233,79 +303,86 @@ class GameManager:
             import time
             return time.time()
 
-    def get_job_time_remaining(self, job_data: dict) -> float:
-        """Calcula el tiempo restante para un trabajo.
+    def _job_time_fields(self, job_data: Any) -> Tuple[float, Optional[float], Optional[float]]:
+        """
+        (release_time, accepted_at, deadline_at) en segundos de juego.
+        Un Job ya los trae normalizados; para un dict crudo el deadline ISO se
+        convierte una sola vez y queda en 'deadline_timestamp'.
+        """
+        if hasattr(job_data, "deadline_offset"):
+            return job_data.release_time, job_data.accepted_at, job_data.deadline_at
+        if not job_data:
+            return 0.0, None, None
+        try:
+            release_time = float(job_data.get("release_time", 0) or 0.0)
+        except (TypeError, ValueError):
+            release_time = 0.0
+        accepted_at = job_data.get("accepted_at")
+        try:
+            accepted_at = float(accepted_at) if accepted_at is not None else None
+        except (TypeError, ValueError):
+            accepted_at = None
+        if "deadline_timestamp" not in job_data:
+            job_data["deadline_timestamp"] = self._deadline_offset(job_data.get("deadline"))
+        deadline_at = job_data.get("deadline_timestamp")
+        return release_time, accepted_at, (float(deadline_at) if deadline_at is not None else None)
+
+    def _deadline_offset(self, deadline: Any) -> Optional[float]:
+        """Segundos desde el inicio del mapa hasta `deadline` (ISO); None si no hay."""
+        if not deadline:
+            return None
+        try:
+            if self.map_start_time is not None:
+                return (self._parse_iso_time(deadline) - self.map_start_time).total_seconds()
+            return self._parse_iso_time(deadline).timestamp() - self.get_game_start_timestamp()
+        except Exception as e:
+            print(f"[TIME] Error convirtiendo deadline '{deadline}': {e}")
+            return None
+
+    def get_job_time_remaining(self, job_data: Any) -> float:
+        """Calcula el tiempo restante para un trabajo (Job o dict crudo).
         Si existe `accepted_at` y `release_time > 0`, usa ventana desde la aceptación.
         En caso contrario, si hay `deadline`, usa tiempo hasta deadline.
         Si no hay deadline, retorna infinito.
         """
         try:
-            # Ventana por release_time desde aceptación
-            release_time = job_data.get("release_time", 0)
-            accepted_at = job_data.get("accepted_at")
-            try:
-                release_time = float(release_time or 0.0)
-            except (TypeError, ValueError):
-                release_time = 0.0
-            try:
-                accepted_at = float(accepted_at) if accepted_at is not None else None
-            except (TypeError, ValueError):
-                accepted_at = None
-
+            if hasattr(job_data, "time_remaining"):
+                return job_data.time_remaining(float(self.get_game_time()))
+            release_time, accepted_at, deadline_at = self._job_time_fields(job_data)
             if release_time > 0.0 and accepted_at is not None:
-                current_game_time = float(self.get_game_time())
-                elapsed_since_accept = current_game_time - accepted_at
-                return release_time - elapsed_since_accept
-
-            # Fallback: tiempo hasta deadline
-            deadline_str = job_data.get("deadline")
-            if not deadline_str:
+                return release_time - (float(self.get_game_time()) - accepted_at)
+            if deadline_at is None:
                 return float("inf")
-            game_start_ts = self.get_game_start_timestamp()
-            deadline_dt = datetime.datetime.fromisoformat(deadline_str.replace('Z', '+00:00'))
-            deadline_ts = deadline_dt.timestamp()
-            current_ts = game_start_ts + float(self.get_game_time())
-            return deadline_ts - current_ts
-
+            return deadline_at - float(self.get_game_time())
         except Exception as e:
             print(f"[TIME] Error calculando tiempo restante: {e}")
             return float("inf")
 
-    def get_job_total_time(self, job_data: dict) -> float:
-        """Calcula el tiempo total disponible para el trabajo.
+    def get_job_total_time(self, job_data: Any) -> float:
+        """Calcula el tiempo total disponible para el trabajo (Job o dict crudo).
         Si el pedido usa ventana por `release_time` y fue aceptado, el total es `release_time`.
-        En caso contrario, usa (deadline - (game_start + release_time)).
+        En caso contrario, usa (deadline - release_time), ambos relativos al inicio.
         """
         try:
-            release_time = job_data.get("release_time", 0)
-            accepted_at = job_data.get("accepted_at")
-            try:
-                release_time = float(release_time or 0.0)
-            except (TypeError, ValueError):
-                release_time = 0.0
+            if hasattr(job_data, "total_time"):
+                return job_data.total_time()
+            release_time, accepted_at, deadline_at = self._job_time_fields(job_data)
             if release_time > 0.0 and accepted_at is not None:
                 return release_time
-
-            deadline_str = job_data.get("deadline")
-            if not deadline_str:
+            if deadline_at is None:
                 return float("inf")
-
-            game_start_ts = self.get_game_start_timestamp()
-            deadline_dt = datetime.datetime.fromisoformat(deadline_str.replace('Z', '+00:00'))
-            deadline_ts = deadline_dt.timestamp()
-            total_time = deadline_ts - (game_start_ts + release_time)
-            return max(0.0, total_time)
-
+            return max(0.0, deadline_at - release_time)
         except Exception as e:
             print(f"[TIME] Error calculando tiempo total: {e}")
             return float("inf")
 
     # ---------------- Actualización ----------------
-    def update(self, dt: float):
+    def update(self, dt: float) -> list:
+        """Avanza la partida; retorna los eventos de deadline del tick [(kind, job)] para que la vista los muestre."""
         if not self.is_running or dt is None:
-            return
+            return []
         try:
-            self.game_simulated_time += float(dt) * float(self.time_scale)
+            self.clock.advance(float(dt) * float(self.time_scale))
         except Exception:
             pass
 
@@ -313,7 +390,7 @@ class GameManager:
             try:
                 if self.get_game_time() >= float(self.max_game_duration):
                     self._handle_game_timeout()
-                    return
+                    return []
             except Exception:
                 pass
 
@@ -321,10 +398,44 @@ class GameManager:
             now = self.get_game_time()
             if now - self._last_job_check >= self.JOB_CHECK_INTERVAL:
                 self._last_job_check = now
+                self._feed_jobs(now)
                 self._check_for_new_jobs(now)
         except Exception as e:
             print(f"[GAME_MANAGER] Error en update job check: {e}")
 
+        return self.handle_deadline_events(self.job_manager)
+
+    # ---------------- Deadlines ----------------
+    def handle_deadline_events(self, job_manager: Any, now: Optional[float] = None) -> list:
+        """
+        Procesa los eventos de deadline agendados en `job_manager` (O(1) si no vence
+        ninguno) y retorna [(kind, job)] para que la vista muestre avisos.
+        Un paquete perdido se registra en el score y sale del inventario.
+        """
+        if job_manager is None or not hasattr(job_manager, "poll_deadlines"):
+            return []
+        try:
+            events = job_manager.poll_deadlines(self.get_game_time() if now is None else now)
+        except Exception as e:
+            print(f"[GAME_MANAGER] Error procesando deadlines: {e}")
+            return []
+        for kind, job in events:
+            if kind == "lost":
+                try:
+                    self.score_system.record_lost_package()
+                except Exception:
+                    pass
+                inv = getattr(self.player_state, "inventory", None) if self.player_state else None
+                if inv is not None:
+                    try:
+                        inv.remove(job.id)
+                    except Exception:
+                        pass
+                self.logger.info(f"Job {job.id} lost (not delivered after deadline)")
+            elif kind == "expired":
+                self.logger.info(f"Job {job.id} expired before being accepted")
+        return events
+
     # ---------------- Timeout ----------------
     def _handle_game_timeout(self):
         self.is_running = False
@@ -343,36 +454,120 @@ class GameManager:
 
     # ---------------- Ofertas ----------------
     def _check_for_new_jobs(self, current_time: float):
-        if not self.job_manager or not self.player_manager:
+        # sin show_job_offer (p. ej. el Player de la vista) las ofertas las muestra
+        # NotificationManager vía pick_offer: no hay a quién entregar el ranking
+        if not self.job_manager or not hasattr(self.player_manager, "show_job_offer"):
             return
         try:
-            job = self.job_manager.peek_next_eligible(current_time)
+            job = self._next_offer(current_time)
             if not job or getattr(job, "visible_pickup", False):
                 return
-            if self.is_job_expired(getattr(job, "raw", {}) or {}):
+            if self.is_job_expired(job, current_time):
                 try:
                     self.job_manager.mark_rejected(job.id)
                 except Exception:
                     job.rejected = True
                 print(f"[GAME_MANAGER] Job {job.id} expirado al presentarlo")
                 return
-            if hasattr(self.player_manager, "show_job_offer"):
-                job.visible_pickup = True
-                def on_accept(_):
-                    try: self._accept_job(job.id)
-                    except Exception as e: print(f"[GAME_MANAGER] on_accept error: {e}")
-                def on_reject(_):
-                    try: self.job_manager.mark_rejected(job.id)
-                    except Exception: job.rejected = True
-                try:
-                    self.player_manager.show_job_offer(job.raw or {}, on_accept, on_reject)
-                    print(f"[GAME_MANAGER] Oferta mostrada: {job.id}")
-                except Exception as e:
-                    job.visible_pickup = False
-                    print(f"[GAME_MANAGER] Error mostrando oferta: {e}")
+            job.visible_pickup = True
+            def on_accept(_):
+                try: self._accept_job(job.id)
+                except Exception as e: print(f"[GAME_MANAGER] on_accept error: {e}")
+            def on_reject(_):
+                try: self.job_manager.mark_rejected(job.id)
+                except Exception: job.rejected = True
+            try:
+                self.player_manager.show_job_offer(job.raw_copy(), on_accept, on_reject)
+                print(f"[GAME_MANAGER] Oferta mostrada: {job.id}")
+            except Exception as e:
+                job.visible_pickup = False
+                print(f"[GAME_MANAGER] Error mostrando oferta: {e}")
         except Exception as e:
             print(f"[GAME_MANAGER] Error al chequear nuevos jobs: {e}")
 
+    def _planning_weather(self) -> float:
+        """Multiplicador de clima para estimar recorridos: el esperado en los próximos
+        PLANNING_HORIZON segundos (las curvas se recalculan solo al cambiar el burst)."""
+        weather = getattr(self.player_state, "weather_system", None)
+        if weather is None:
+            return 1.0
+        try:
+            if self.weather_rollout is None or self.weather_rollout.weather is not weather:
+                self.weather_rollout = WeatherRollout(weather, n_chains=self.ROLLOUT_CHAINS,
+                                                      horizon=self.PLANNING_HORIZON)
+            return self.weather_rollout.expected_mean_multiplier(self.PLANNING_HORIZON)
+        except Exception as e:
+            print(f"[GAME_MANAGER] Warning en rollout del clima: {e}")
+            return getattr(weather, "current_multiplier", 1.0)
+
+    def _next_offer(self, current_time: float):
+        """Mejor oferta por ganancia/segundo; sin posición del jugador, orden del heap."""
+        cell = (getattr(self.player_manager, "cell_x", None), getattr(self.player_manager, "cell_y", None))
+        if None in cell:
+            return self.job_manager.peek_next_eligible(current_time)
+        candidates = [j for j in self.job_manager.get_available_jobs(current_time) if not j.visible_pickup]
+        if not candidates:
+            return None
+        weather = self._planning_weather()
+        return self.offer_ranker.best(
+            candidates, cell, current_time,
+            inventory=getattr(self.player_state, "inventory", None),
+            weather_multiplier=weather,
+            budget_ms=self.OFFER_RANK_BUDGET_MS,
+        )
+
+    def pick_offer(self, released: List[Dict[str, Any]], current_time: float) -> Optional[Dict[str, Any]]:
+        """
+        De los pedidos crudos ya liberados (cola de notificaciones), el de mejor
+        ganancia/segundo según OfferRanker. Sin posición del jugador, sin job_manager
+        o sin ninguno viable se mantiene el orden de liberación.
+        """
+        if not released:
+            return None
+        cell = (getattr(self.player_manager, "cell_x", None), getattr(self.player_manager, "cell_y", None))
+        if len(released) == 1 or None in cell or not self.job_manager:
+            return released[0]
+        try:
+            # los Job de vista previa se reutilizan mientras su raw siga en la cola
+            previews = {}
+            for raw in released:
+                entry = self._offer_previews.get(id(raw))
+                if entry is None or entry[0] is not raw:
+                    entry = (raw, self.job_manager.preview_job(raw))
+                previews[id(raw)] = entry
+            self._offer_previews = previews
+            raw_of = {id(job): raw for raw, job in previews.values() if job is not None}
+            best = self.offer_ranker.best(
+                [job for _, job in previews.values() if job is not None], cell, current_time,
+                inventory=getattr(self.player_state, "inventory", None),
+                weather_multiplier=self._planning_weather(),
+                budget_ms=self.OFFER_RANK_BUDGET_MS,
+            )
+            return raw_of[id(best)] if best is not None else released[0]
+        except Exception as e:
+            print(f"[GAME_MANAGER] Error rankeando ofertas: {e}")
+            return released[0]
+
+    def recommend_bundle(self, objective: str = "payout") -> Optional[BundlePlan]:
+        """Qué ofertas abiertas conviene aceptar juntas (peso, deadlines y recorrido)."""
+        if not self.job_manager or not self.player_manager:
+            return None
+        cell = (getattr(self.player_manager, "cell_x", None), getattr(self.player_manager, "cell_y", None))
+        if None in cell:
+            return None
+        now = self.get_game_time()
+        try:
+            weather = self._planning_weather()
+            return self.bundle_optimizer.recommend(
+                self.job_manager.get_available_jobs(now), cell, now,
+                inventory=getattr(self.player_state, "inventory", None),
+                weather_multiplier=weather, objective=objective,
+                budget_ms=self.BUNDLE_BUDGET_MS,
+            )
+        except Exception as e:
+            print(f"[GAME_MANAGER] Error recomendando lote: {e}")
+            return None
+
     # ---------------- Aceptar trabajos ----------------
     def _accept_job(self, job_id: str) -> bool:
         if not self.job_manager or not self.player_state:
@@ -381,7 +576,7 @@ class GameManager:
         if not job:
             print(f"[GAME_MANAGER] accept_job: job {job_id} no existe")
             return False
-        if self.is_job_expired(job.raw or {}):
+        if self.is_job_expired(job):
             print(f"[GAME_MANAGER] accept_job: job {job_id} ya expirado")
             try: self.job_manager.mark_rejected(job_id)
             except Exception: job.rejected = True
@@ -427,14 +622,11 @@ class GameManager:
         inv = getattr(self.player_state, "inventory", None)
         if not inv:
             return None
+        if not self.job_manager:
+            return None
         delivered_any, result = False, None
-        jobs_to_check = []
-        node = getattr(inv.deque, "head", None)
-        while node:
-            job = node.val if hasattr(node, "val") else node
-            if getattr(job, "picked_up", False) and not getattr(job, "completed", False):
-                jobs_to_check.append(job)
-            node = getattr(node, "next", None)
+        # índice espacial: solo los jobs en camino con dropoff en la celda o adyacente
+        jobs_to_check = self.job_manager.dropoffs_near(tile_x, tile_y)
 
         for job in jobs_to_check:
             try:
@@ -443,7 +635,7 @@ class GameManager:
                     continue
                 if abs(int(dx) - tile_x) + abs(int(dy) - tile_y) <= 1:
                     current = self.get_game_time()
-                    deadline = getattr(job, "raw", {}).get("deadline_timestamp", None)
+                    deadline = getattr(job, "deadline_at", None)
                     on_time, seconds_late, time_bonus = True, 0.0, 1.0
                     if deadline is not None:
                         if float(current) > float(deadline):
@@ -461,6 +653,7 @@ class GameManager:
                     except Exception:
                         pass
                     final_pay = base_payout * pay_mult * time_bonus
+                    self._note_undo(job, "completed")
                     self.player_state.money = float(getattr(self.player_state, "money", 0.0)) + final_pay
                     rep_delta = 0
                     try:
@@ -500,91 +693,63 @@ class GameManager:
         if not self.job_manager:
             return False
         try:
-            for job in self.job_manager.get_active_jobs():
-                if not getattr(job, "accepted", False) or getattr(job, "picked_up", False) or getattr(job, "completed", False):
-                    continue
-                try:
-                    pickup_pos = tuple(getattr(job, "pickup", ()))
-                except Exception:
-                    pickup_pos = tuple(job.pickup if hasattr(job, "pickup") else ())
-                if pickup_pos == (tile_x, tile_y):
-                    job.picked_up, job.dropoff_visible = True, True
-                    self.logger.info(f"Package {job.id} picked up at {tile_x},{tile_y}")
-                    return True
-                try:
-                    px, py = pickup_pos
-                    if (tile_x, tile_y) in [(px+1,py),(px-1,py),(px,py+1),(px,py-1)]:
-                        job.picked_up, job.dropoff_visible = True, True
-                        self.logger.info(f"Package {job.id} picked up adjacent to {pickup_pos}")
-                        return True
-                except Exception:
-                    pass
+            for job in self.job_manager.pickups_near(tile_x, tile_y):
+                self._note_undo(job, "picked_up", "dropoff_visible")
+                job.picked_up, job.dropoff_visible = True, True
+                self.logger.info(f"Package {job.id} picked up at/adjacent to {tuple(job.pickup)}")
+                return True
         except Exception as e:
             print(f"[GAME_MANAGER] Error en try_pickup_at: {e}")
         return False
 
     # ---------------- Undo ----------------
+    # UndoLog guarda deltas: el inventario se registra solo (journal) y los
+    # cambios de flags de jobs se anotan con _note_undo antes de hacerlos.
+    def _note_undo(self, job, *names: str):
+        if self.undo_system is not None:
+            self.undo_system.note(job, *names)
+
     def save_current_state(self):
         if not self.undo_system or not self.player_state:
             return
         try:
-            state_snapshot = self.undo_system.get_state_snapshot(
+            self.undo_system.record(
                 self.player_state,
                 self.player_state.inventory,
                 self.player_state.weather_system,
                 self.player_manager
             )
-            self.undo_system.save_state(state_snapshot)
         except Exception as e:
             print(f"[GAME_MANAGER] Error saving state: {e}")
 
     def undo_last_action(self) -> bool:
         if not self.undo_system or not self.undo_system.can_undo():
             return False
-        try:
-            prev = self.undo_system.undo()
-            if prev is not None:
-                self.undo_system.restore_state(
-                    prev,
-                    self.player_state,
-                    self.player_state.inventory,
-                    self.player_state.weather_system,
-                    self.player_manager
-                )
-                self.logger.info("Undo applied")
-                return True
-            return False
-        except Exception as e:
-            print(f"[GAME_MANAGER] Error en undo: {e}")
-            return False
+        if self.undo_n_steps(1):
+            self.logger.info("Undo applied")
+            return True
+        return False
 
     def undo_n_steps(self, n: int) -> bool:
         if not self.undo_system or not self.player_state or not self.player_state.inventory or not self.player_manager:
             return False
         try:
-            last_state = None
-            steps = 0
-            for _ in range(max(0, int(n))):
-                if not self.undo_system.can_undo():
-                    break
-                last_state = self.undo_system.undo()
-                steps += 1
-            if last_state is None:
-                return False
-            self.undo_system.restore_state(
-                last_state,
+            return self.undo_system.undo(
                 self.player_state,
                 self.player_state.inventory,
                 self.player_state.weather_system,
-                self.player_manager
-            )
-            return True
+                self.player_manager,
+                n
+            ) > 0
         except Exception as e:
             print(f"[GAME_MANAGER] Error en undo_n_steps: {e}")
             return False
 
     def handle_player_movement(self, dx: int, dy: int):
-        """Guardar estado y delegar movimiento al player_manager (si existe)."""
+        """Guardar estado y delegar movimiento al player_manager (si existe).
+
+        Si la vista ya capturó esta acción, UndoLog no agrega un paso repetido.
+        """
         self.save_current_state()
         if self.player_manager and hasattr(self.player_manager, "move_by"):
             try:
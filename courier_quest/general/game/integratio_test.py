@@ -13,6 +13,10 @@ from game.player_stats import PlayerStats
 from game.weather_markov import WeatherMarkov
 from game.score_system import ScoreSystem
 from game.undo_system import UndoSystem
+from game.undo_log import UndoLog
+from game.persistent import PMap, PVector
+from game.undo_history import SnapshotHistory
+from game.adts import IndexedHeap, PriorityQueue
 
 
 class TestCourierQuestIntegration(unittest.TestCase):
@@ -383,6 +387,343 @@ class TestCourierQuestIntegration(unittest.TestCase):
         print("✅ Escenario integrado: OK")
 
 
+    def test_10_inventory_index(self):
+        """Índice id -> nodo del inventario"""
+        print("\n🔸 Test 10: Índice del inventario")
+        from types import SimpleNamespace
+        for i, (w, p) in enumerate([(1.0, 0), (2.0, 3), (1.5, 1)]):
+            self.inventory.add(SimpleNamespace(id=f"J{i}", weight=w, priority=p, deadline_at=None))
+        self.assertTrue(self.inventory.add(self.inventory.get("J0")))  # repetido: no duplica
+        self.assertEqual(self.inventory.current_weight, 4.5)
+
+        self.assertTrue(self.inventory.focus("J2"))
+        self.inventory.sort_by_priority()
+        ids = [job.id for job in self.inventory.get_deque_values()]
+        self.assertEqual(ids, ["J1", "J2", "J0"])
+        self.assertIs(self.inventory._cursor.val, self.inventory.get("J2"))
+
+        # quitar el item bajo el cursor lo mueve al siguiente
+        self.assertTrue(self.inventory.remove("J2"))
+        self.assertFalse(self.inventory.remove("J2"))
+        self.assertEqual(self.inventory._cursor.val.id, "J0")
+        self.assertNotIn("J2", self.inventory)
+        self.assertEqual(self.inventory.prune(lambda job: job.priority > 2), 1)
+        self.assertEqual(self.inventory.current_weight, 1.0)
+
+        # restaurar un estado de undo reconstruye deque e índice
+        state = self.undo_system.get_state_snapshot(
+            SimpleNamespace(money=0, current_time=0.0,
+                            player_stats=SimpleNamespace(stamina=100.0, reputation=70)),
+            self.inventory, self.weather_system,
+            SimpleNamespace(cell_x=0, cell_y=0, pixel_x=0.0, pixel_y=0.0))
+        self.inventory.remove("J0")
+        self.undo_system.restore_state(
+            state, SimpleNamespace(player_stats=SimpleNamespace()), self.inventory,
+            self.weather_system, SimpleNamespace())
+        self.assertIn("J0", self.inventory)
+        self.assertEqual(self.inventory.current_weight, 1.0)
+        print("✅ Índice del inventario: OK")
+
+    def test_11_inventory_sorted_views(self):
+        """Vistas ordenadas mantenidas por el inventario"""
+        print("\n🔸 Test 11: Vistas ordenadas del inventario")
+        from types import SimpleNamespace
+        specs = [("A", 1.0, 1, 90.0), ("B", 3.0, 5, None), ("C", 2.0, 5, 30.0), ("D", 0.5, 0, 60.0)]
+        for jid, w, p, dl in specs:
+            self.inventory.add(SimpleNamespace(id=jid, weight=w, priority=p, deadline_at=dl))
+
+        def ids(mode, start=0, count=10):
+            return [job.id for job in self.inventory.view_slice(mode, start, count)]
+
+        self.assertEqual(ids("priority"), ["B", "C", "A", "D"])
+        self.assertEqual(ids("deadline"), ["C", "D", "A", "B"])
+        self.assertEqual(ids("weight"), ["D", "A", "C", "B"])
+        self.assertEqual(ids("normal", 1, 2), ["B", "C"])
+        self.assertEqual([job.id for job in self.inventory.ordered("deadline")], ids("deadline"))
+
+        version = self.inventory.version
+        self.inventory.remove("C")
+        self.assertGreater(self.inventory.version, version)
+        self.assertEqual(ids("priority"), ["B", "A", "D"])
+        self.inventory.get("D").priority = 9
+        self.inventory.reindex("D")
+        self.assertEqual(ids("priority", 0, 1), ["D"])
+
+        self.inventory.sort_by_deadline()
+        self.assertEqual(ids("normal"), ["D", "A", "B"])
+        print("✅ Vistas ordenadas del inventario: OK")
+
+    def test_12_undo_ring_buffer(self):
+        """Historial de deshacer acotado en buffer circular"""
+        print("\n🔸 Test 12: Historial de deshacer acotado")
+        undo = UndoSystem(max_steps=3)
+        for step in range(5):
+            undo.save_state({"step": step})
+        self.assertEqual(undo.get_history_size(), 3)
+        self.assertEqual(undo.undo()["step"], 4)
+
+        undo.save_state({"step": 5})
+        undo.set_max_steps(2)  # se quedan los dos más recientes
+        self.assertEqual([undo.undo()["step"] for _ in range(2)], [5, 3])
+        self.assertFalse(undo.can_undo())
+
+        undo.set_max_steps(4)
+        for step in range(6):
+            undo.save_state({"step": step})
+        self.assertEqual([s["step"] for s in undo.undo_stack], [2, 3, 4, 5])
+        undo.clear_history()
+        self.assertEqual(undo.get_history_size(), 0)
+        print("✅ Historial de deshacer acotado: OK")
+
+    def test_13_undo_log_deltas(self):
+        """Deshacer por deltas: escalares, operaciones del inventario y clima"""
+        print("\n🔸 Test 13: Deshacer por deltas")
+        from types import SimpleNamespace
+        state = SimpleNamespace(money=0.0, current_time=0.0, player_stats=self.player_stats)
+        player = SimpleNamespace(cell_x=0, cell_y=0, pixel_x=0.0, pixel_y=0.0)
+        weather = self.weather_system
+        log = UndoLog(max_steps=10)
+
+        def record():
+            log.record(state, self.inventory, weather, player)
+
+        def move(dx):
+            record()
+            player.cell_x += dx
+
+        for jid in ("A", "B", "C"):
+            self.inventory.add(SimpleNamespace(id=jid, weight=1.0, picked_up=False))
+        move(1)
+        self.inventory.remove("B")
+        move(1)
+        job = self.inventory.get("C")
+        log.note(job, "picked_up")
+        job.picked_up = True
+        state.money = 50.0
+        weather.force_state("storm", 0.9)
+        move(1)
+        self.inventory.sort_by_deadline()
+        self.inventory.clear()
+        self.assertEqual(log.get_history_size(), 3)
+
+        self.assertEqual(log.undo(state, self.inventory, weather, player), 1)
+        self.assertEqual(player.cell_x, 2)
+        self.assertEqual([j.id for j in self.inventory.get_deque_values()], ["A", "C"])
+
+        self.assertEqual(log.undo(state, self.inventory, weather, player), 1)
+        self.assertEqual((player.cell_x, state.money, job.picked_up), (1, 0.0, False))
+        self.assertNotEqual((weather.current_condition, weather.current_intensity), ("storm", 0.9))
+
+        # volver varios pasos de una vez
+        record()
+        self.inventory.add(SimpleNamespace(id="D", weight=1.0))
+        move(5)
+        self.assertEqual(log.undo(state, self.inventory, weather, player, n=10), 3)
+        self.assertEqual(player.cell_x, 0)
+        self.assertEqual([j.id for j in self.inventory.get_deque_values()], ["A", "B", "C"])
+        self.assertAlmostEqual(self.inventory.current_weight, 3.0)
+        self.assertFalse(log.can_undo())
+        print("✅ Deshacer por deltas: OK")
+
+    def test_14_persistent_structures(self):
+        """Vector y mapa persistentes: versiones anteriores intactas"""
+        print("\n🔸 Test 14: Estructuras persistentes")
+        import copy
+        v1 = PVector(range(100))
+        v2 = v1.set(3, "x").append(100)
+        self.assertEqual((v1[3], len(v1)), (3, 100))
+        self.assertEqual((v2[3], v2[-1], len(v2)), ("x", 100, 101))
+        self.assertEqual(list(v2.pop().truncate(4)), [0, 1, 2, "x"])
+        self.assertIs(copy.deepcopy(v1), v1)
+
+        m1 = PMap({"money": 10, "stamina": 80})
+        m2 = m1.set("money", 25).discard("stamina")
+        self.assertEqual(dict(m1.items()), {"money": 10, "stamina": 80})
+        self.assertEqual(dict(m2.items()), {"money": 25})
+        self.assertIs(m1.set("money", 10), m1)
+
+        # snapshots del clima y del undo comparten el historial
+        self.weather_system.force_state("rain", 0.5)
+        before = copy.deepcopy(self.weather_system.history)
+        self.weather_system.force_state("storm", 0.8)
+        self.assertEqual(len(self.weather_system.history), len(before) + 1)
+        self.weather_system.undo()
+        self.assertEqual(self.weather_system.history, before)
+        print("✅ Estructuras persistentes: OK")
+
+    def test_15_budgeted_snapshot_history(self):
+        """Historial con snapshots fríos comprimidos y límite de memoria"""
+        print("\n🔸 Test 15: Historial limitado por memoria")
+        city = {"tiles": [["C"] * 50 for _ in range(50)]}
+        history = SnapshotHistory(max_steps=20, max_bytes=1 << 20, hot_steps=2)
+        history.share(city)
+        for step in range(6):
+            history.push({"step": step, "map": city, "inventory": [step] * 100})
+        self.assertEqual(len(history), 6)
+        self.assertGreater(history.cold_bytes, 0)
+
+        # saltar 3 pasos: el resultado viene de un snapshot comprimido
+        state = history.pop_n(3)
+        self.assertEqual(state["step"], 3)
+        self.assertIs(state["map"], city)
+        self.assertEqual([s["step"] for s in history], [0, 1, 2])
+
+        history.set_budget(history.cold_bytes - 1)  # ya no cabe el más antiguo
+        self.assertEqual([s["step"] for s in history], [1, 2])
+        self.assertEqual(history.pop()["step"], 2)
+        print("✅ Historial limitado por memoria: OK")
+
+    def test_16_unified_undo_layers(self):
+        """Un solo motor de deshacer para el juego y la vista"""
+        print("\n🔸 Test 16: Deshacer unificado")
+        from types import SimpleNamespace
+        state = SimpleNamespace(money=0.0, current_time=0.0, player_stats=self.player_stats)
+        player = SimpleNamespace(cell_x=0, cell_y=0, pixel_x=0.0, pixel_y=0.0)
+        view_state = {"money": 0, "inventory": Inventory(max_weight=10.0)}
+        log = UndoLog(max_steps=10)
+        log.watch_inventory(view_state["inventory"])
+        log.watch("view.money", view_state, "money")
+
+        def capture():
+            return log.record(state, self.inventory, None, player)
+
+        # la vista y GameManager capturan la misma acción: un solo paso
+        self.assertTrue(capture())
+        self.assertFalse(capture())
+        player.cell_x = 1
+        view_state["money"] = 30
+        state.money = 30.0
+        self.inventory.add(SimpleNamespace(id="A", weight=1.0))
+        view_state["inventory"].add(SimpleNamespace(id="A", weight=1.0))
+        self.assertTrue(capture())
+        self.assertFalse(capture())
+        self.assertEqual(log.get_history_size(), 2)
+
+        player.cell_x = 2
+        view_state["inventory"].remove("A")
+        self.assertEqual(log.undo(state, self.inventory, None, player), 1)
+        self.assertEqual((player.cell_x, view_state["money"]), (1, 30))
+        self.assertIn("A", view_state["inventory"])
+
+        self.assertEqual(log.undo(state, self.inventory, None, player), 1)
+        self.assertEqual((player.cell_x, view_state["money"], state.money), (0, 0, 0.0))
+        self.assertNotIn("A", view_state["inventory"])
+        self.assertNotIn("A", self.inventory)
+        print("✅ Deshacer unificado: OK")
+
+    def test_17_indexed_heap(self):
+        """Heap indexado y compactación de la cola de prioridad"""
+        print("\n🔸 Test 17: Heap indexado")
+        import random
+        heap = IndexedHeap()
+        for i, p in enumerate([5, 3, 8, 1, 9, 2]):
+            heap.push(f"J{i}", p)
+        heap.update("J4", 0)      # decrease-key
+        heap.push("J3", 7)        # increase-key vía push
+        self.assertEqual(heap.remove("J2"), 8)
+        self.assertNotIn("J2", heap)
+        self.assertEqual(heap.priority_of("J3"), 7)
+        self.assertEqual(len(heap), 5)
+        order = [heap.pop()[0] for _ in range(len(heap))]
+        self.assertEqual(order, ["J4", "J5", "J1", "J0", "J3"])
+        with self.assertRaises(KeyError):
+            heap.pop()
+
+        # contra una referencia: el heap nunca crece más que los vivos
+        rng = random.Random(7)
+        ref = {}
+        for _ in range(500):
+            item = rng.randrange(40)
+            if item in ref and rng.random() < 0.4:
+                self.assertEqual(heap.remove(item), ref.pop(item))
+            else:
+                ref[item] = rng.randrange(100)
+                heap.push(item, ref[item])
+            self.assertEqual(len(heap._heap), len(ref))
+        popped = [heap.pop() for _ in range(len(heap))]
+        self.assertEqual([p for _, p in popped], sorted(ref.values()))
+
+        # PriorityQueue: las actualizaciones no acumulan lápidas
+        pq = PriorityQueue()
+        for i in range(10):
+            pq.push(f"J{i}", i)
+        for round_ in range(200):
+            pq.push(f"J{round_ % 10}", 100 - round_)
+        self.assertEqual(len(pq), 10)
+        self.assertLessEqual(len(pq._heap), 2 * len(pq) + pq.COMPACT_MIN)
+        items = [pq.pop()[0] for _ in range(len(pq))]
+        self.assertEqual(len(set(items)), 10)
+        self.assertEqual(items[0], "J9")
+        print("✅ Heap indexado: OK")
+
+    def test_18_undo_reverts_archive(self):
+        """Deshacer una entrega ya archivada devuelve el job vivo"""
+        print("\n🔸 Test 18: Deshacer des-archiva")
+        from types import SimpleNamespace
+        state = SimpleNamespace(money=0.0, current_time=0.0, player_stats=self.player_stats)
+        player = SimpleNamespace(cell_x=0, cell_y=0, pixel_x=0.0, pixel_y=0.0)
+        jm = self.job_manager
+        log = UndoLog(max_steps=10)
+        log.watch_journal(jm)
+
+        def record():
+            log.record(state, self.inventory, None, player)
+
+        job = jm.add_job_from_raw({"id": "A", "pickup": [1, 1], "dropoff": [5, 5], "payout": 50.0, "weight": 1.0})
+        jm.accept_job("A")
+        record()
+        log.note(job, "picked_up", "dropoff_visible")
+        job.picked_up = job.dropoff_visible = True
+        self.inventory.add(job)
+        record()
+        log.note(job, "completed")
+        state.money = 50.0
+        job.completed = True
+        self.inventory.remove("A")
+        record()
+        jm.poll_deadlines(100.0)
+        self.assertIn("A", jm.archive)
+        self.assertIsNone(jm.get_state("A"))
+
+        self.assertEqual(log.undo(state, self.inventory, None, player, n=2), 2)
+        self.assertEqual(jm.get_state("A"), "carried")
+        self.assertIs(jm.get_job("A"), job)
+        self.assertIn(job, jm.dropoffs_near(5, 5))
+        self.assertNotIn("A", jm.archive)
+        self.assertEqual(jm.count_in_state("completed"), 0)
+        self.assertEqual(jm.completed_payout(), 0.0)
+        self.assertIn("A", self.inventory)
+        self.assertEqual(state.money, 0.0)
+        print("✅ Deshacer des-archiva: OK")
+
+    def test_19_view_snapshot_shares_static_data(self):
+        """El snapshot de la vista comparte el mapa y copia/restaura lo mutable"""
+        print("\n🔸 Test 19: Snapshot de la vista")
+        from types import SimpleNamespace
+        # graphics usa imports relativos al paquete: se importa desde la raíz del repo
+        sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))))
+        from courier_quest.general.graphics.undo_manager import UndoManager, SHARED_KEYS
+
+        self.assertNotIn("job_archive", SHARED_KEYS)
+        map_data = {"tiles": [["C"] * 3 for _ in range(3)], "legend": {"C": {"name": "calle"}}}
+        archive = [{"id": "A", "state": "completed"}]
+        state = {"map_data": map_data, "money": 10.0, "job_archive": archive, "inventory": ["B"]}
+        undo = UndoManager(SimpleNamespace(state=state))
+        undo.snapshot()
+
+        state["money"] = 99.0
+        state["job_archive"].append({"id": "B", "state": "completed"})
+        state["inventory"].remove("B")
+        self.assertTrue(undo.restore())
+
+        self.assertIs(state["map_data"], map_data)
+        self.assertEqual(state["money"], 10.0)
+        self.assertEqual(state["job_archive"], [{"id": "A", "state": "completed"}])
+        self.assertEqual(state["inventory"], ["B"])
+        print("✅ Snapshot de la vista: OK")
+
+
+
 def run_comprehensive_test_suite():
     """Ejecuta la suite completa de tests"""
     print("🚀 INICIANDO TEST SUITE INTEGRAL PARA COURIER QUEST")
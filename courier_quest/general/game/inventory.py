@@ -1,10 +1,45 @@
 # inventory.py
-from typing import Optional, List, Any
-from .adts import Deque
+import itertools
+from bisect import bisect_left, insort
+from typing import Optional, List, Any, Dict, Callable, Iterator, Tuple
+from .adts import Deque, _DLLNode
+
+# vistas ordenadas que mantiene el inventario (además del orden de la deque)
+SORT_MODES = ("priority", "deadline", "weight")
+
+
+def _item_field(item, name: str, default=None):
+    """Campo del item como atributo, clave de dict o clave de raw."""
+    if isinstance(item, dict):
+        return item.get(name, default)
+    if hasattr(item, name):
+        return getattr(item, name)
+    raw = getattr(item, "raw", None)
+    if isinstance(raw, dict):
+        return raw.get(name, default)
+    return default
+
+
+def _number(value, default: float) -> float:
+    try:
+        return default if value is None else float(value)
+    except (TypeError, ValueError):
+        return default
+
 
 class Inventory:
     """
     Inventario implementado sobre una Deque doblemente enlazada (game.adts.Deque).
+    Junto a la deque se mantiene un índice id -> nodo, así remove/get/focus son O(1).
+    Además hay una lista ordenada por cada modo de SORT_MODES (mayor prioridad,
+    deadline más próximo, menor peso), actualizada con bisect en add/remove:
+    la búsqueda es O(log n) y el corrimiento de la lista O(n), pero es un memmove
+    de punteros y el peso máximo deja pocas decenas de items; la lista contigua
+    además da view_slice por índice sin otra estructura.
+    `version` cambia con cada modificación para que la UI redibuje solo si hace falta.
+    Toda modificación debe pasar por los métodos del inventario (no tocar self.deque).
+    Si `journal` es una lista, cada modificación agrega ahí (inventario, operación)
+    (ver revert); UndoLog la usa para deshacer sin copiar el inventario.
     """
 
     def __init__(self, max_weight: float = 10.0):
@@ -12,6 +47,12 @@ class Inventory:
         self.max_weight = float(max_weight)
         self.current_weight = 0.0
         self._cursor = None  # nodo interno (no el valor)
+        self._nodes: Dict[Any, _DLLNode] = {}  # id del job -> nodo de la deque
+        self._views: Dict[str, List[Tuple[float, int, _DLLNode]]] = {m: [] for m in SORT_MODES}
+        self._view_keys: Dict[_DLLNode, Tuple[int, Tuple[float, ...]]] = {}  # nodo -> (seq, claves)
+        self._seq = itertools.count()
+        self.version = 0
+        self.journal: Optional[List[Tuple]] = None
 
     @staticmethod
     def _job_weight(job) -> float:
@@ -22,160 +63,229 @@ class Inventory:
             # dict directamente
             if isinstance(job, dict):
                 return float(job.get("weight", job.get("peso", 1.0)))
+            # atributo directo (no toca job.raw: en Job se reconstruye al leerlo)
+            if getattr(job, "weight", None) is not None:
+                return float(job.weight)
             # wrapper con .raw
-            if hasattr(job, "raw") and isinstance(job.raw, dict):
-                return float(job.raw.get("weight", job.raw.get("peso", 1.0)))
-            # atributo directo
-            if hasattr(job, "weight"):
-                return float(getattr(job, "weight"))
+            raw = getattr(job, "raw", None)
+            if isinstance(raw, dict):
+                return float(raw.get("weight", raw.get("peso", 1.0)))
         except Exception:
             pass
         return 1.0
 
+    @staticmethod
+    def _job_id(item) -> Any:
+        """Id del item (atributo, dict o raw); None si no tiene."""
+        if hasattr(item, "id"):
+            return getattr(item, "id")
+        if isinstance(item, dict):
+            return item.get("id")
+        if hasattr(item, "raw") and isinstance(item.raw, dict):
+            return item.raw.get("id")
+        return None
+
+    def __contains__(self, job_id) -> bool:
+        return job_id in self._nodes
+
     def can_add(self, job) -> bool:
         return (self.current_weight + self._job_weight(job)) <= self.max_weight
 
     def add(self, job) -> bool:
+        jid = self._job_id(job)
+        if jid is not None and jid in self._nodes:
+            return True  # ya está en el inventario
         w = self._job_weight(job)
         if not self.can_add(job):
             return False
         # append al final
-        self.deque.append(job)
+        node = self.deque.append(job)
+        if self.journal is not None:
+            self.journal.append((self, ("add", node)))
+        if jid is not None:
+            self._nodes[jid] = node
+        self._index_views(node)
         self.current_weight += w
         # si no hay cursor, posicionarlo en el primer elemento
         if self._cursor is None:
-            self._cursor = getattr(self.deque, "head", None)
+            self._cursor = self.deque.head
+        return True
+
+    def get(self, job_id) -> Optional[Any]:
+        """Item con ese id, o None."""
+        node = self._nodes.get(job_id)
+        return None if node is None else node.val
+
+    def focus(self, job_id) -> bool:
+        """Mueve el cursor al item con ese id."""
+        node = self._nodes.get(job_id)
+        if node is None:
+            return False
+        self._cursor = node
         return True
 
     def _deque_values(self) -> List[Any]:
-        """
-        Normaliza la iteración sobre self.deque para devolver siempre los valores.
-        """
-        vals = []
-        try:
-            for n in self.deque:
-                # si n es nodo con .val, devolvemos n.val; si n ya es valor, lo devolvemos tal cual
-                vals.append(n.val if hasattr(n, "val") else n)
-        except TypeError:
-            # si self.deque no es iterable por alguna razón, intentar recorrer manualmente via head
-            node = getattr(self.deque, "head", None)
-            while node:
-                vals.append(node.val if hasattr(node, "val") else node)
-                node = node.next
-        return vals
+        """Valores de la deque en orden."""
+        return list(self.deque)
 
     def _rebuild_from_list(self, items: List[Any]) -> None:
-        """Reconstruye self.deque a partir de items (lista de valores)."""
+        """Reconstruye self.deque (y el índice) a partir de items (lista de valores)."""
         new_deque = Deque()
+        nodes: Dict[Any, _DLLNode] = {}
         for it in items:
-            new_deque.append(it)
+            node = new_deque.append(it)
+            jid = self._job_id(it)
+            if jid is not None:
+                nodes[jid] = node
         self.deque = new_deque
+        self._nodes = nodes
+        self._views = {m: [] for m in SORT_MODES}
+        self._view_keys = {}
+        node = new_deque.head
+        while node:
+            self._index_views(node)
+            node = node.next
         # resetear cursor al head si hay elementos
-        self._cursor = getattr(self.deque, "head", None)
+        self._cursor = self.deque.head
 
     def _find_node_by_job_id(self, job_id: str):
         """Devuelve el nodo cuyo item tiene id == job_id, o None."""
-        # primero intentamos recorrer con head/next si existe
-        node = getattr(self.deque, "head", None)
-        while node:
-            item = node.val if hasattr(node, "val") else node
-            cur_id = None
-            if hasattr(item, "id"):
-                cur_id = getattr(item, "id")
-            elif isinstance(item, dict):
-                cur_id = item.get("id")
-            elif hasattr(item, "raw") and isinstance(item.raw, dict):
-                cur_id = item.raw.get("id")
-            if cur_id == job_id:
-                return node
-            node = getattr(node, "next", None)
-        return None
+        return self._nodes.get(job_id)
 
     def remove(self, job_id: str) -> bool:
         """
         Elimina el pedido con id == job_id del inventario.
         """
-        # Intentamos obtener el nodo
-        node = self._find_node_by_job_id(job_id)
-
+        node = self._nodes.get(job_id)
         if node is None:
-            # Si no encontramos nodo, reconstruimos filtrando
-            items = self._deque_values()
-            new_items = []
-            removed = False
-            for it in items:
-                # extraer id robustamente
-                it_id = None
-                if hasattr(it, "id"):
-                    it_id = getattr(it, "id")
-                elif isinstance(it, dict):
-                    it_id = it.get("id")
-                elif hasattr(it, "raw") and isinstance(it.raw, dict):
-                    it_id = it.raw.get("id")
-                if it_id == job_id and not removed:
-                    removed = True
-                    weight_to_subtract = self._job_weight(it)
-                    self.current_weight = max(0.0, self.current_weight - weight_to_subtract)
-                    continue
-                new_items.append(it)
-            if not removed:
-                return False
-            self._rebuild_from_list(new_items)
-            return True
-
-        # Si tenemos el nodo, proceder a eliminar
-        try:
-            weight_to_subtract = float(self._job_weight(node.val if hasattr(node, "val") else node))
-        except Exception:
-            weight_to_subtract = 0.0
-
-        try:
-            if hasattr(self.deque, "remove_node"):
-                self.deque.remove_node(node)
-            else:
-                # fallback: reconstruir la lista sin el elemento
-                items = self._deque_values()
-                new_items = []
-                removed = False
-                for it in items:
-                    it_id = None
-                    if hasattr(it, "id"):
-                        it_id = getattr(it, "id")
-                    elif isinstance(it, dict):
-                        it_id = it.get("id")
-                    elif hasattr(it, "raw") and isinstance(it.raw, dict):
-                        it_id = it.raw.get("id")
-                    if it_id == job_id and not removed:
-                        removed = True
-                        continue
-                    new_items.append(it)
-                self._rebuild_from_list(new_items)
-        except Exception:
             return False
+        self._remove_node(node)
+        return True
+
+    def _remove_node(self, node: _DLLNode) -> None:
+        if self.journal is not None:
+            self.journal.append((self, ("remove", node, node.prev)))
+        jid = self._job_id(node.val)
+        if self._nodes.get(jid) is node:
+            del self._nodes[jid]
+        # si el cursor apuntaba al nodo eliminado, pasa al siguiente (o al head)
+        if self._cursor is node:
+            self._cursor = node.next
+        self._unindex_views(node)
+        self.deque.remove_node(node)
+        if self._cursor is None:
+            self._cursor = self.deque.head
+        self.current_weight = max(0.0, float(self.current_weight) - self._job_weight(node.val))
 
-        # ajustar peso y cursor
-        self.current_weight = max(0.0, float(self.current_weight) - weight_to_subtract)
+    def prune(self, predicate: Callable[[Any], bool]) -> int:
+        """Elimina los items que cumplen `predicate`; retorna cuántos salieron."""
+        removed = 0
+        node = self.deque.head
+        while node:
+            nxt = node.next
+            if predicate(node.val):
+                self._remove_node(node)
+                removed += 1
+            node = nxt
+        return removed
+
+    def clear(self) -> None:
+        """Vacía el inventario."""
+        if self.journal is not None:
+            self.journal.append((self, ("clear", self._node_list())))
+        self.deque = Deque()
+        self._nodes = {}
+        self._views = {m: [] for m in SORT_MODES}
+        self._view_keys = {}
+        self._cursor = None
+        self.current_weight = 0.0
+        self.version += 1
+
+    def _node_list(self) -> List[_DLLNode]:
+        nodes, node = [], self.deque.head
+        while node:
+            nodes.append(node)
+            node = node.next
+        return nodes
 
-        # asegurar cursor válido
+    def _insert_node(self, node: _DLLNode, prev: Optional[_DLLNode]) -> None:
+        """Vuelve a enlazar un nodo quitado antes (sin revisar peso máximo)."""
+        self.deque.insert_node_after(node, prev)
+        jid = self._job_id(node.val)
+        if jid is not None:
+            self._nodes[jid] = node
+        self._index_views(node)
+        self.current_weight += self._job_weight(node.val)
+        if self._cursor is None:
+            self._cursor = self.deque.head
+
+    def revert(self, op: Tuple) -> None:
+        """Deshace una operación del journal; las más recientes van primero."""
+        journal, self.journal = self.journal, None
         try:
-            if getattr(self.deque, "head", None) is None:
-                self._cursor = None
-            else:
-                # si cursor apuntaba al nodo eliminado, moverlo al head
-                found = False
-                node = getattr(self.deque, "head", None)
-                while node:
-                    if node is self._cursor:
-                        found = True
-                        break
-                    node = getattr(node, "next", None)
-                if not found:
-                    self._cursor = getattr(self.deque, "head", None)
-        except Exception:
-            self._cursor = getattr(self.deque, "head", None)
+            kind = op[0]
+            if kind == "add":
+                if op[1] in self._view_keys:
+                    self._remove_node(op[1])
+            elif kind == "remove":
+                self._insert_node(op[1], op[2])
+            elif kind == "order":
+                self._relink(op[1])
+            elif kind == "clear":
+                prev = None
+                for node in op[1]:
+                    self._insert_node(node, prev)
+                    prev = node
+        finally:
+            self.journal = journal
+
+    # ---------------- vistas ordenadas ----------------
+    def _sort_keys(self, item) -> Tuple[float, ...]:
+        """Claves de item en el orden de SORT_MODES."""
+        return (
+            -_number(_item_field(item, "priority", 0), 0.0),
+            _number(_item_field(item, "deadline_at"), float("inf")),
+            self._job_weight(item),
+        )
+
+    def _index_views(self, node: _DLLNode) -> None:
+        seq = next(self._seq)  # desempate estable: orden de llegada
+        keys = self._sort_keys(node.val)
+        for mode, key in zip(SORT_MODES, keys):
+            insort(self._views[mode], (key, seq, node))
+        self._view_keys[node] = (seq, keys)
+        self.version += 1
+
+    def _unindex_views(self, node: _DLLNode) -> None:
+        seq, keys = self._view_keys.pop(node)
+        for mode, key in zip(SORT_MODES, keys):
+            view = self._views[mode]
+            del view[bisect_left(view, (key, seq))]
+        self.version += 1
 
+    def reindex(self, job_id) -> bool:
+        """Reubica un item en las vistas si cambió su prioridad, deadline o peso."""
+        node = self._nodes.get(job_id)
+        if node is None:
+            return False
+        self._unindex_views(node)
+        self._index_views(node)
         return True
 
+    def ordered(self, mode: str = "normal") -> Iterator[Any]:
+        """Itera los items en el orden pedido ("normal" = orden de la deque), sin copiar."""
+        if mode not in self._views:
+            return iter(self.deque)
+        return (entry[2].val for entry in self._views[mode])
+
+    def view_slice(self, mode: str, start: int, count: int) -> List[Any]:
+        """Items [start, start + count) en el orden pedido."""
+        start = max(0, start)
+        view = self._views.get(mode)
+        if view is not None:
+            return [entry[2].val for entry in view[start:start + count]]
+        return list(itertools.islice(self.deque, start, start + count))
+
     # ... (resto de métodos sin cambios)
 # inventory.py - AÑADIR MÉTODO PÚBLICO
 # Añade este método a tu clase Inventory:
@@ -190,11 +300,9 @@ class Inventory:
     def sort_by_priority(self):
         """
         Sorts the inventory by job priority in descending order.
-        Time complexity: O(n log n) using Python's Timsort algorithm.
+        Time complexity: O(n), relinking nodes from the maintained priority view.
         """
-        items = self._deque_values()
-        items.sort(key=lambda job: -getattr(job, 'priority', 0))  # Merge Sort o QuickSort
-        self._rebuild_from_list(items)
+        self._relink([entry[2] for entry in self._views["priority"]])
 
     def to_dict(self):
         """
@@ -209,8 +317,20 @@ class Inventory:
     def sort_by_deadline(self):
         """
         Sorts the inventory by job deadline in ascending order.
-        Time complexity: O(n log n) using Python's Timsort algorithm.
+        Time complexity: O(n), relinking nodes from the maintained deadline view.
         """
-        items = self._deque_values()
-        items.sort(key=lambda job: getattr(job, 'deadline_timestamp', float('inf')))
-        self._rebuild_from_list(items)
+        self._relink([entry[2] for entry in self._views["deadline"]])
+
+    def _relink(self, nodes: List[_DLLNode]) -> None:
+        """Reenlaza la deque en el orden de `nodes`: el índice y el cursor siguen válidos."""
+        if self.journal is not None:
+            self.journal.append((self, ("order", self._node_list())))
+        prev = None
+        for node in nodes:
+            node.prev, node.next = prev, None
+            if prev is not None:
+                prev.next = node
+            prev = node
+        self.deque.head = nodes[0] if nodes else None
+        self.deque.tail = prev
+        self.version += 1
@@ -0,0 +1,95 @@
+# game/job_archive.py
+"""
+JobArchive: historial append-only de jobs terminados (completed/rejected/expired).
+
+JobManager mueve aquí los jobs terminados para que su conjunto activo solo
+contenga jobs vivos. Cada registro es una tupla compacta con lo que necesitan
+el puntaje y el historial; los totales por resultado se llevan al agregar.
+Registros e índice son estructuras persistentes, así snapshot() es O(1).
+"""
+
+from __future__ import annotations
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional
+
+from .persistent import PMap, PVector
+
+
+class ArchivedJob(NamedTuple):
+    id: str
+    outcome: str                  # completed / rejected / expired
+    payout: float
+    weight: float
+    release_time: float
+    deadline_at: Optional[float]
+    accepted_at: Optional[float]
+    finished_at: Optional[float]  # segundos de juego al terminar
+
+
+class JobArchive:
+    def __init__(self):
+        self._records: PVector = PVector()
+        self._index: PMap = PMap()   # id -> último registro
+        self._counts: Dict[str, int] = {}
+        self._payouts: Dict[str, float] = {}
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def __iter__(self) -> Iterator[ArchivedJob]:
+        return iter(self._records)
+
+    def __contains__(self, job_id: str) -> bool:
+        return job_id in self._index
+
+    def append(self, record: ArchivedJob) -> ArchivedJob:
+        self._index = self._index.set(record.id, len(self._records))
+        self._records = self._records.append(record)
+        self._counts[record.outcome] = self._counts.get(record.outcome, 0) + 1
+        self._payouts[record.outcome] = self._payouts.get(record.outcome, 0.0) + record.payout
+        return record
+
+    def record_job(self, job: Any, outcome: str, finished_at: Optional[float] = None) -> ArchivedJob:
+        """Archiva un Job con el resultado dado."""
+        return self.append(ArchivedJob(
+            str(job.id), outcome, float(job.payout), float(job.weight), float(job.release_time),
+            job.deadline_at, job.accepted_at, finished_at,
+        ))
+
+    def get(self, job_id: str) -> Optional[ArchivedJob]:
+        i = self._index.get(job_id)
+        return None if i is None else self._records[i]
+
+    def count(self, outcome: Optional[str] = None) -> int:
+        if outcome is None:
+            return len(self._records)
+        return self._counts.get(outcome, 0)
+
+    def total_payout(self, outcome: str = "completed") -> float:
+        return self._payouts.get(outcome, 0.0)
+
+    def snapshot(self) -> "JobArchive":
+        """Copia del archivo en este momento; comparte los registros con el original."""
+        copy = JobArchive()
+        copy._records, copy._index = self._records, self._index
+        copy._counts, copy._payouts = dict(self._counts), dict(self._payouts)
+        return copy
+
+    def restore(self, snapshot: "JobArchive"):
+        """Vuelve al estado de un snapshot() anterior (deshacer un archivado)."""
+        self._records, self._index = snapshot._records, snapshot._index
+        self._counts, self._payouts = dict(snapshot._counts), dict(snapshot._payouts)
+
+    def to_list(self) -> List[Dict[str, Any]]:
+        """Registros como dicts (para guardar partida)."""
+        return [r._asdict() for r in self._records]
+
+    def extend(self, records: Iterable[Dict[str, Any]]) -> int:
+        """Agrega registros guardados con to_list(); ignora los mal formados."""
+        added = 0
+        for data in records:
+            try:
+                self.append(ArchivedJob(**data))
+                added += 1
+            except (TypeError, ValueError):
+                print(f"[ARCHIVE] Registro inválido ignorado: {data!r}")
+        return added
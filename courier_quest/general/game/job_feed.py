@@ -0,0 +1,185 @@
+# game/job_feed.py
+"""
+JobFeed: ingesta incremental de pedidos por release_time.
+
+Los pedidos llegan de un iterable (lista, generador de la API o archivo leído
+por partes) y solo se materializan cuando su release_time entra en la ventana
+`now + lookahead`. Los que ya se leyeron pero aún no tocan esperan en un heap
+pequeño; el resto sigue sin leer en la fuente. JobsFile es una fuente en disco
+que se puede recorrer de nuevo (p. ej. para guardar la partida).
+
+Los parsers iter_json_array / iter_ndjson decodifican un objeto a la vez sobre
+trozos de texto, sin cargar el documento completo en memoria.
+"""
+
+from __future__ import annotations
+import heapq
+import itertools
+import json
+import re
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+_EPOCH_THRESHOLD = 1e9
+_WRAPPER_KEY = re.compile(r'"(?:jobs|data)"\s*:\s*\[')
+_SKIP = " \t\r\n,"
+
+
+def iter_json_array(chunks: Iterable[str]) -> Iterator[Any]:
+    """Decodifica los elementos de un arreglo JSON que llega por trozos.
+
+    Acepta un arreglo plano (`[...]`) o un objeto envoltorio con la lista en
+    "jobs" o "data" (`{"data": [...]}`).
+    """
+    decoder = json.JSONDecoder()
+    buf = ""
+    started = finished = False
+    for chunk in chunks:
+        if finished or not chunk:
+            continue  # se consume el resto para no cortar a quien produce los trozos
+        buf += chunk
+        pos = 0
+        if not started:
+            head = buf.lstrip()
+            if not head:
+                continue
+            if head[0] == "[":
+                pos = buf.index("[") + 1
+            else:
+                match = _WRAPPER_KEY.search(buf)
+                if match is None:
+                    continue  # falta texto para ubicar la lista
+                pos = match.end()
+            started = True
+        n = len(buf)
+        while True:
+            while pos < n and buf[pos] in _SKIP:
+                pos += 1
+            if pos >= n:
+                break
+            if buf[pos] == "]":
+                finished = True
+                break
+            try:
+                obj, pos_end = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                break  # objeto incompleto: esperar el siguiente trozo
+            yield obj
+            pos = pos_end
+        buf = "" if finished else buf[pos:]
+    if not finished and buf.strip():
+        raise ValueError("Arreglo JSON incompleto")
+
+
+def iter_ndjson(lines: Iterable[str]) -> Iterator[Any]:
+    """Decodifica un objeto JSON por línea (NDJSON); ignora líneas vacías."""
+    for line in lines:
+        line = line.strip()
+        if line:
+            yield json.loads(line)
+
+
+def iter_jobs_file(path: Union[str, Path], chunk_size: int = 64 * 1024) -> Iterator[Any]:
+    """Lee pedidos de un archivo sin cargarlo entero (.ndjson/.jsonl o JSON)."""
+    path = Path(path)
+    with open(path, "r", encoding="utf-8") as f:
+        if path.suffix.lower() in (".ndjson", ".jsonl"):
+            yield from iter_ndjson(f)
+        else:
+            yield from iter_json_array(iter(lambda: f.read(chunk_size), ""))
+
+
+class JobsFile:
+    """Catálogo de pedidos en disco que se puede recorrer varias veces.
+
+    Cada recorrido vuelve a leer el archivo por partes (iter_jobs_file), así un
+    JobFeed lo consume de a poco y un guardado puede materializarlo después.
+    `accept` filtra los pedidos inválidos; `rejected` cuenta los del último recorrido.
+    """
+
+    def __init__(self, path: Union[str, Path], chunk_size: int = 64 * 1024,
+                 accept: Optional[Callable[[Any], bool]] = None):
+        self.path = Path(path)
+        self.chunk_size = chunk_size
+        self.accept = accept
+        self.rejected = 0
+
+    def __iter__(self) -> Iterator[Any]:
+        self.rejected = 0
+        for job in iter_jobs_file(self.path, self.chunk_size):
+            if self.accept is None or self.accept(job):
+                yield job
+            else:
+                self.rejected += 1
+
+
+class JobFeed:
+    def __init__(self, source: Iterable[Dict[str, Any]], lookahead: float = 60.0,
+                 start_epoch: Optional[float] = None):
+        self._source = iter(source)
+        self.lookahead = float(lookahead)
+        self.start_epoch = start_epoch
+        self._heap: List[Tuple[float, int, Dict[str, Any]]] = []  # (release, seq, raw)
+        self._seq = itertools.count()
+        self._read_until = float("-inf")
+        self.exhausted = False
+        self.delivered = 0
+
+    def __len__(self) -> int:
+        """Pedidos leídos de la fuente que aún no se entregaron."""
+        return len(self._heap)
+
+    @property
+    def done(self) -> bool:
+        return self.exhausted and not self._heap
+
+    def _release_of(self, raw: Any) -> float:
+        """release_time en segundos de juego (0 si falta o es inválido)."""
+        try:
+            value = float(raw.get("release_time", 0) or 0)
+        except (AttributeError, TypeError, ValueError):
+            return 0.0
+        if value > _EPOCH_THRESHOLD:
+            # mismo criterio que JobManager: epoch -> relativo al inicio
+            return max(0.0, value - self.start_epoch) if self.start_epoch is not None else 0.0
+        return value
+
+    def _fill(self, until: float):
+        """Lee de la fuente hasta pasar `until` (la fuente suele venir ordenada)."""
+        heap = self._heap
+        while not self.exhausted and self._read_until <= until:
+            try:
+                raw = next(self._source)
+            except StopIteration:
+                self.exhausted = True
+                break
+            except Exception as e:
+                print(f"[FEED] Error leyendo pedidos: {e}")
+                self.exhausted = True
+                break
+            release = self._release_of(raw)
+            heapq.heappush(heap, (release, next(self._seq), raw))
+            if release > self._read_until:
+                self._read_until = release
+
+    def pull(self, now: float) -> List[Dict[str, Any]]:
+        """Devuelve, ordenados por release_time, los pedidos con release <= now + lookahead."""
+        until = now + self.lookahead
+        self._fill(until)
+        heap = self._heap
+        out = []
+        while heap and heap[0][0] <= until:
+            out.append(heapq.heappop(heap)[2])
+        self.delivered += len(out)
+        return out
+
+    def feed(self, job_manager, now: float) -> Optional[Dict[str, Any]]:
+        """Ingresa en `job_manager` (add_jobs_bulk) lo que toca; None si no había nada."""
+        batch = self.pull(now)
+        if not batch:
+            return None
+        return job_manager.add_jobs_bulk(batch)
+
+    def drain(self) -> List[Dict[str, Any]]:
+        """Consume la fuente completa y devuelve todo lo pendiente."""
+        return self.pull(float("inf"))
@@ -1,53 +1,532 @@
 # jobs_manager.py
+import datetime
+import gc
 import heapq
 import itertools
-from dataclasses import dataclass
-from typing import Dict, Optional, List, Any, Tuple
+from operator import itemgetter
+from typing import Callable, Dict, Iterable, Optional, List, Any, Tuple
+
+from .deadline_scheduler import DeadlineScheduler, EXPIRED, WARNING, LOST
+from .job_archive import JobArchive
 
 _counter = itertools.count()
 
+# Estados del ciclo de vida de un job (un bucket por estado en JobManager)
+JOB_STATES = ("pending", "offered", "accepted", "carried", "completed", "rejected", "expired")
+OPEN_STATES = frozenset(("pending", "offered"))
+_STATE_FLAGS = frozenset(("accepted", "rejected", "picked_up", "completed", "visible_pickup", "expired"))
+TERMINAL_STATES = frozenset(("completed", "rejected", "expired"))
+# una celda y sus 4 vecinas (llegada exacta o adyacente)
+_NEIGHBORHOOD = ((0, 0), (1, 0), (-1, 0), (0, 1), (0, -1))
+
+
+def _as_cell(pos: Any) -> Optional[Tuple[int, int]]:
+    try:
+        return int(pos[0]), int(pos[1])
+    except Exception:
+        return None
+
+
+def _as_offset(value: Any) -> Optional[float]:
+    try:
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _deadline_offset_or_raise(raw: Dict[str, Any], start_epoch: Optional[float]) -> Optional[float]:
+    offset = raw.get("deadline_timestamp")
+    if offset is not None:
+        return float(offset)
+    deadline = raw.get("deadline")
+    if not deadline or start_epoch is None:
+        return None
+    text = str(deadline).strip()
+    if text.endswith("Z"):
+        text = text[:-1] + "+00:00"
+    return datetime.datetime.fromisoformat(text).timestamp() - float(start_epoch)
+
+
+def parse_deadline_offset(raw: Dict[str, Any], start_epoch: Optional[float]) -> Optional[float]:
+    """
+    Deadline del job en segundos desde el inicio de la partida.
+    Usa raw['deadline_timestamp'] si GameManager ya lo calculó; si no, parsea el
+    ISO de raw['deadline'] contra `start_epoch`. Se llama una vez al ingresar el job.
+    """
+    try:
+        return _deadline_offset_or_raise(raw, start_epoch)
+    except (TypeError, ValueError) as e:
+        print(f"[JOB_MANAGER] Deadline inválido '{raw.get('deadline')}': {e}")
+        return None
+
+
+def _strict_cell(pos: Any) -> Tuple[int, int]:
+    """Celda [x, y] de enteros; ValueError si el valor no es una celda válida."""
+    if not isinstance(pos, (list, tuple)) or len(pos) != 2:
+        raise ValueError(f"celda inválida: {pos!r}")
+    x, y = pos
+    if isinstance(x, bool) or isinstance(y, bool) or int(x) != x or int(y) != y:
+        raise ValueError(f"celda inválida: {pos!r}")
+    return int(x), int(y)
+
+
+# Job._flags: bits 0-6 flags de estado; desde el bit 8, qué claves de raw se
+# reconstruyen desde las columnas del job (raw empaquetado)
+_FLAG_MASK = 0xFF
+_MISSING = object()
+_CELLS: Dict[Tuple[int, int], Tuple[int, int]] = {}
+# claves de los extras de raw, compartidas entre jobs con la misma forma
+_SHAPES: Dict[Tuple[str, ...], Tuple[str, ...]] = {}
+_RAW_COLUMN_BITS = {name: 1 << (8 + i) for i, name in enumerate(
+    ("id", "pickup", "dropoff", "priority", "weight", "payout", "release_time"))}
+# clave de raw -> (slot del job, bit)
+_RAW_COLUMN_SLOTS = {name: ("_" + name if name in ("pickup", "dropoff") else name, bit)
+                     for name, bit in _RAW_COLUMN_BITS.items()}
+
+
+# (forma de raw, máscara de columnas) -> (claves que van a los extras, lector de esas claves)
+_EXTRA_PLANS: Dict[Tuple[Tuple[str, ...], int], Tuple[Tuple[str, ...], Optional[Callable]]] = {}
+
+
+def _packed_extras(raw: Dict[str, Any], mask: int) -> Optional[Tuple]:
+    """(forma, valores...) de las claves de raw que no quedan cubiertas por `mask`."""
+    key = (tuple(raw), mask)
+    plan = _EXTRA_PLANS.get(key)
+    if plan is None:
+        shape = tuple(k for k in key[0] if not mask & _RAW_COLUMN_BITS.get(k, 0))
+        shape = _SHAPES.setdefault(shape, shape)
+        plan = _EXTRA_PLANS[key] = (shape, itemgetter(*shape) if shape else None)
+    shape, values = plan
+    if values is None:
+        return None
+    if len(shape) == 1:
+        return shape, values(raw)
+    return (shape,) + values(raw)
+
+
+_ID_BIT, _PICKUP_BIT, _DROPOFF_BIT, _PRIORITY_BIT, _WEIGHT_BIT, _PAYOUT_BIT, _RELEASE_BIT = (
+    _RAW_COLUMN_BITS[name] for name in ("id", "pickup", "dropoff", "priority", "weight", "payout", "release_time"))
+
+
+def _flag(bit: int, name: str) -> property:
+    """Propiedad booleana respaldada por un bit de Job._flags."""
+    syncs = name in _STATE_FLAGS
+
+    def getter(self) -> bool:
+        return bool(self._flags & bit)
+
+    def setter(self, value: bool):
+        flags = (self._flags | bit) if value else (self._flags & ~bit)
+        if flags == self._flags:
+            return
+        self._flags = flags
+        # cualquier cambio de flag de estado mueve el job a su bucket en el JobManager dueño
+        if syncs and self._manager is not None:
+            self._manager._sync_state(self)
+
+    return property(getter, setter)
+
+
+def _cell_field(slot: str) -> property:
+    """pickup/dropoff: tupla compartida por celda; al cambiar se reindexa el job."""
+
+    def getter(self):
+        return getattr(self, slot)
+
+    def setter(self, value):
+        if type(value) is tuple:
+            # las celdas se repiten entre miles de jobs: compartir una sola tupla
+            value = _CELLS.setdefault(value, value)
+        setattr(self, slot, value)
+        manager = self._manager
+        if manager is not None and manager._jobs.get(self.id) is self:
+            manager._index_cells(self)
+
+    return property(getter, setter)
+
 
-@dataclass
 class Job:
-    id: str
-    raw: Dict[str, Any]
-    pickup: Tuple[int, int]
-    dropoff: Tuple[int, int]
-    priority: int = 0
-    weight: float = 1.0
-    payout: float = 0.0
-    release_time: float = 0.0
+    """
+    Registro compacto de un pedido.
+    - __slots__ en lugar de __dict__ por instancia; los flags de estado viven en
+      un solo entero (bitfield) expuesto como propiedades booleanas.
+    - `raw` se guarda empaquetado: las claves que ya son columnas solo se marcan
+      en el bitfield y el resto queda en una tupla (forma compartida, valores...).
+      El dict se reconstruye recién al accederlo; las copias de undo comparten la tupla.
+    """
+
+    __slots__ = (
+        "id", "_pickup", "_dropoff", "priority", "weight", "payout", "release_time",
+        "deadline_at", "_accepted_at", "_flags", "_raw", "_packed", "_manager",
+    )
+
+    _BITS = {name: 1 << i for i, name in enumerate(
+        ("accepted", "rejected", "picked_up", "completed", "visible_pickup", "dropoff_visible", "expired"))}
+
+    def __init__(
+        self,
+        id: str,
+        raw: Optional[Dict[str, Any]],
+        pickup: Tuple[int, int],
+        dropoff: Tuple[int, int],
+        priority: int = 0,
+        weight: float = 1.0,
+        payout: float = 0.0,
+        release_time: float = 0.0,
+        deadline_at: Optional[float] = None,
+        accepted_at: Optional[float] = None,
+        **flags: bool,
+    ):
+        # el job aún no tiene manager: los slots se asignan directo, sin hooks
+        self._manager = None
+        self._flags = 0
+        self._raw = raw
+        self._packed = None
+        self.id = id
+        self._pickup = _CELLS.setdefault(pickup, pickup) if type(pickup) is tuple else pickup
+        self._dropoff = _CELLS.setdefault(dropoff, dropoff) if type(dropoff) is tuple else dropoff
+        self.priority = priority
+        self.weight = weight
+        self.payout = payout
+        self.release_time = release_time
+        self.deadline_at = deadline_at
+        self._accepted_at = accepted_at
+        for name, value in flags.items():
+            if name not in self._BITS:
+                raise TypeError(f"Job() got an unexpected keyword argument '{name}'")
+            setattr(self, name, value)
 
     # Estados del trabajo
-    accepted: bool = False
-    rejected: bool = False
-    picked_up: bool = False
-    completed: bool = False
-    visible_pickup: bool = False
-    dropoff_visible: bool = False
+    accepted = _flag(_BITS["accepted"], "accepted")
+    rejected = _flag(_BITS["rejected"], "rejected")
+    picked_up = _flag(_BITS["picked_up"], "picked_up")
+    completed = _flag(_BITS["completed"], "completed")
+    visible_pickup = _flag(_BITS["visible_pickup"], "visible_pickup")
+    dropoff_visible = _flag(_BITS["dropoff_visible"], "dropoff_visible")
+    expired = _flag(_BITS["expired"], "expired")
+
+    pickup = _cell_field("_pickup")
+    dropoff = _cell_field("_dropoff")
+
+    @property
+    def accepted_at(self) -> Optional[float]:
+        return self._accepted_at
+
+    @accepted_at.setter
+    def accepted_at(self, value: Optional[float]):
+        self._accepted_at = value
+        # la ventana de entrega puede empezar al aceptar: reprogramar deadline
+        manager = self._manager
+        if manager is not None and manager._jobs.get(self.id) is self:
+            manager._schedule_deadline(self)
+
+    # ---------------- raw perezoso ----------------
+    @property
+    def raw(self) -> Dict[str, Any]:
+        raw = self._raw
+        if raw is None:
+            raw = self._unpack_raw()
+            self._raw = raw
+            self._packed = None
+            self._flags &= _FLAG_MASK
+        return raw
+
+    @raw.setter
+    def raw(self, value: Optional[Dict[str, Any]]):
+        self._raw = value
+        self._packed = None
+        self._flags &= _FLAG_MASK
+
+    def raw_copy(self) -> Dict[str, Any]:
+        """Copia del raw sin desempaquetarlo en el job (para ofertas y vistas de paso)."""
+        raw = self._raw
+        return dict(raw) if raw is not None else self._unpack_raw()
+
+    def _pack_raw(self, raw: Dict[str, Any]) -> Tuple[int, Optional[Tuple]]:
+        """
+        (máscara, extras): las claves que coinciden con una columna del job no se
+        repiten; solo se marca su presencia en la máscara. extras = (forma, valores...).
+        """
+        mask = 0
+        keys = []
+        values = []
+        for key, value in raw.items():
+            column_bit = _RAW_COLUMN_SLOTS.get(key)
+            if column_bit is not None:
+                column = getattr(self, column_bit[0])
+                if type(column) is tuple:
+                    # celdas [x, y]: mismos valores y mismos tipos (1 y 1.0 no se confunden)
+                    same = (
+                        type(value) in (list, tuple) and len(value) == 2 == len(column)
+                        and type(value[0]) is type(column[0]) and type(value[1]) is type(column[1])
+                        and value[0] == column[0] and value[1] == column[1]
+                    )
+                else:
+                    same = type(value) is type(column) and value == column
+                if same:
+                    mask |= column_bit[1]
+                    continue
+            keys.append(key)
+            values.append(value)
+        if not keys:
+            return mask, None
+        shape = tuple(keys)
+        shape = _SHAPES.setdefault(shape, shape)
+        return mask, (shape, *values)
+
+    def _unpack_raw(self) -> Dict[str, Any]:
+        raw: Dict[str, Any] = {}
+        flags = self._flags
+        for key, bit in _RAW_COLUMN_BITS.items():
+            if flags & bit:
+                value = getattr(self, key)
+                raw[key] = list(value) if type(value) is tuple else value
+        packed = self._packed
+        if packed:
+            raw.update(zip(packed[0], packed[1:]))
+        return raw
+
+    def compact(self):
+        """Empaqueta raw y suelta el dict."""
+        if self._raw is None:
+            return
+        mask, packed = self._pack_raw(self._raw)
+        self._raw = None
+        self._packed = packed
+        self._flags = (self._flags & _FLAG_MASK) | mask
+
+    # ---------------- copia / comparación ----------------
+    def __getstate__(self):
+        # las copias (undo, snapshots) no quedan enlazadas al manager y guardan raw empaquetado
+        state = {name: getattr(self, name) for name in self.__slots__ if name not in ("_manager", "_raw")}
+        if self._raw is not None:
+            mask, state["_packed"] = self._pack_raw(self._raw)
+            state["_flags"] = (self._flags & _FLAG_MASK) | mask
+        return state
+
+    def __setstate__(self, state):
+        self._manager = None
+        self._raw = None
+        self._packed = None
+        for name, value in state.items():
+            setattr(self, name, value)
+
+    def _fields(self) -> Tuple:
+        return (self.id, self.pickup, self.dropoff, self.priority, self.weight, self.payout,
+                self.release_time, self.deadline_at, self.accepted_at, self._flags & _FLAG_MASK)
+
+    def __eq__(self, other):
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return self._fields() == other._fields() and self.raw == other.raw
+
+    __hash__ = None
+
+    def __repr__(self):
+        return (f"Job(id={self.id!r}, pickup={self.pickup!r}, dropoff={self.dropoff!r}, "
+                f"priority={self.priority!r}, weight={self.weight!r}, payout={self.payout!r}, "
+                f"state={self.state!r})")
+
+    @property
+    def state(self) -> str:
+        """Estado derivado de los flags (ver JOB_STATES)."""
+        flags = self._flags
+        bits = self._BITS
+        if flags & bits["completed"]:
+            return "completed"
+        if flags & bits["rejected"]:
+            return "rejected"
+        if flags & bits["expired"]:
+            return "expired"
+        if flags & bits["accepted"]:
+            return "carried" if flags & bits["picked_up"] else "accepted"
+        return "offered" if flags & bits["visible_pickup"] else "pending"
+
+    # ---------------- tiempos (aritmética de floats) ----------------
+    def uses_acceptance_window(self) -> bool:
+        """La ventana de entrega corre desde la aceptación (release_time > 0)."""
+        return self.accepted_at is not None and self.release_time > 0.0
+
+    def deadline_offset(self) -> Optional[float]:
+        """Deadline efectivo en segundos de juego (None si no tiene)."""
+        if self.uses_acceptance_window():
+            return self.accepted_at + self.release_time
+        return self.deadline_at
+
+    def time_remaining(self, now: float) -> float:
+        """Segundos hasta el deadline efectivo (negativo si ya venció, inf si no tiene)."""
+        deadline = self.deadline_offset()
+        return float("inf") if deadline is None else deadline - now
+
+    def total_time(self) -> float:
+        """Duración total de la ventana de entrega (inf si no tiene deadline)."""
+        if self.uses_acceptance_window():
+            return self.release_time
+        if self.deadline_at is None:
+            return float("inf")
+        return max(0.0, self.deadline_at - self.release_time)
 
     def __str__(self):
         return f"Job({self.id}, release:{self.release_time}s, payout:${self.payout})"
 
 
+def _new_job(jid: str, raw: Dict[str, Any], start_epoch: Optional[float], deadline_epoch: Optional[float],
+             compact: bool, pickup_override: Any = None,
+             deadlines: Optional[Dict[Any, Optional[float]]] = None) -> Job:
+    """
+    Valida y normaliza un job crudo; misma regla para add_job_from_raw y add_jobs_bulk.
+    Sin pickup/dropoff se usa (0, 0); un campo presente pero inválido lanza
+    ValueError/TypeError. Con `compact` raw queda empaquetado: las claves que se
+    copian tal cual a una columna se marcan al validarlas, sin volver a compararlas.
+    `deadlines` cachea los ISO ya parseados (se repiten mucho entre pedidos).
+    """
+    get = raw.get
+    value = get("id")
+    mask = _ID_BIT if type(value) is str and value == jid else 0
+
+    # celdas: camino rápido para el caso común [x, y] de enteros
+    if pickup_override is not None:
+        pickup = _strict_cell(pickup_override)
+    else:
+        value = get("pickup")
+        if type(value) is list and len(value) == 2 and type(value[0]) is int and type(value[1]) is int:
+            pickup = (value[0], value[1])
+            mask |= _PICKUP_BIT
+        else:
+            pickup = (0, 0) if value is None else _strict_cell(value)
+    value = get("dropoff")
+    if type(value) is list and len(value) == 2 and type(value[0]) is int and type(value[1]) is int:
+        dropoff = (value[0], value[1])
+        mask |= _DROPOFF_BIT
+    else:
+        dropoff = (0, 0) if value is None else _strict_cell(value)
+
+    priority = get("priority")
+    if type(priority) is int:
+        mask |= _PRIORITY_BIT
+    else:
+        priority = int(priority or 0)
+    weight = get("weight")
+    if type(weight) is float and weight > 0.0:
+        mask |= _WEIGHT_BIT
+    else:
+        weight = float(weight or get("peso") or 1.0)
+        if weight <= 0.0:
+            raise ValueError(f"peso no positivo: {weight}")
+    payout = get("payout")
+    if type(payout) is float and payout:
+        mask |= _PAYOUT_BIT
+    else:
+        payout = float(payout or get("reward") or 0.0)
+
+    # release_time: offset en segundos o epoch (> 1e9)
+    release_time = get("release_time")
+    if type(release_time) is float and 0.0 < release_time <= 1e9:
+        mask |= _RELEASE_BIT
+    else:
+        release_time = float(release_time or 0.0)
+        if release_time > 1e9:
+            release_time = max(0.0, release_time - float(start_epoch)) if start_epoch is not None else 0.0
+
+    text = get("deadline")
+    if deadlines is not None and text and get("deadline_timestamp") is None:
+        deadline_at = deadlines.get(text, _MISSING)
+        if deadline_at is _MISSING:
+            deadline_at = deadlines[text] = _deadline_offset_or_raise(raw, deadline_epoch)
+    else:
+        deadline_at = _deadline_offset_or_raise(raw, deadline_epoch)
+    accepted_at = get("accepted_at")
+    if accepted_at is not None:
+        accepted_at = float(accepted_at)
+
+    # slots asignados directo: el job aún no tiene manager
+    job = Job.__new__(Job)
+    job._manager = None
+    job.id = jid
+    job._pickup = _CELLS.setdefault(pickup, pickup)
+    job._dropoff = _CELLS.setdefault(dropoff, dropoff)
+    job.priority = priority
+    job.weight = weight
+    job.payout = payout
+    job.release_time = release_time
+    job.deadline_at = deadline_at
+    job._accepted_at = accepted_at
+    if compact:
+        job._raw = None
+        job._packed = _packed_extras(raw, mask)
+        job._flags = mask
+    else:
+        job._raw = raw
+        job._packed = None
+        job._flags = 0
+    return job
+
+
 class JobManager:
     """
     Sistema completo de gestión de trabajos con prioridades
     - Soporta release_time como offset (segundos desde game_start) o epoch.
     - Si se detecta epoch y GameManager ha registrado _game_start_epoch, se convierte a offset.
+    - Índice en dos etapas: heap por release_time de jobs aún no liberados y heap
+      por prioridad de los liberados y abiertos (con borrado perezoso). Los jobs
+      migran de uno a otro a medida que avanza el tiempo de juego; las consultas
+      no reconstruyen nada.
+    - Buckets por estado (JOB_STATES). Los métodos de transición cambian flags y el
+      job se mueve solo de bucket, incluso si el flag se asigna directamente.
+    - Índice espacial por celda: pickups de jobs aceptados y dropoffs de jobs en
+      camino, registrados en su celda y las 4 vecinas (consulta de llegada O(1)).
+    - Deadlines agendados en un DeadlineScheduler sobre el tiempo simulado;
+      poll_deadlines(now) dispara aviso, vencimiento y pérdida una sola vez.
+    - Cada Job guarda release_time, deadline_at y accepted_at como floats en
+      segundos de juego; el ISO del deadline se parsea solo al ingresar.
+    - Jobs compactos (__slots__ + bitfield); con COMPACT_RAW el dict raw se
+      empaqueta al ingresar y se reconstruye recién cuando se lee job.raw.
+    - add_jobs_bulk(lote): validación en una pasada, reporte de errores y un solo
+      heapify para el heap de liberación y la agenda de deadlines.
+    - Archivo frío: ARCHIVE_DELAY segundos después de terminar, el job sale de
+      _jobs y de los buckets y queda como registro en self.archive. get_job() y
+      jobs_in_state() solo ven jobs vivos; count_in_state() suma el archivo.
     """
 
+    DEADLINE_WARNING_LEAD = 30.0   # segundos antes del deadline
+    LOST_PACKAGE_GRACE = 120.0     # segundos después del deadline para darlo por perdido
+    COMPACT_RAW = True             # guardar raw empaquetado en una tupla hasta que alguien lo lea
+    ARCHIVE_DELAY = 10.0           # segundos que un job terminado sigue vivo antes de archivarse
+
     def __init__(self):
         self._jobs: Dict[str, Job] = {}
-        self._heap: List[Tuple[int, float, int, str]] = []  # (-priority, release_time, counter, job_id)
+        self._release_heap: List[Tuple[float, int, str]] = []  # (release_time, counter, job_id)
+        self._released: List[Tuple[int, float, int, str]] = []  # heap: (-priority, release_time, counter, job_id)
+        self._released_live: Dict[str, Tuple[int, float, int, str]] = {}  # job_id -> entrada vigente del heap
+        self._keys: Dict[str, Tuple[int, float, int, str]] = {}
+        self._buckets: Dict[str, Dict[str, Job]] = {s: {} for s in JOB_STATES}
+        self._state_of: Dict[str, str] = {}
+        # cambia con cada transición; permite cachear cálculos sobre los buckets
+        self.state_version = 0
+        self._pickup_index: Dict[Tuple[int, int], Dict[str, Job]] = {}
+        self._dropoff_index: Dict[Tuple[int, int], Dict[str, Job]] = {}
+        self._indexed_cells: Dict[str, Tuple[Dict, Tuple[int, int]]] = {}
+        self.deadlines = DeadlineScheduler(self.DEADLINE_WARNING_LEAD, self.LOST_PACKAGE_GRACE)
         self._counter = itertools.count()
         self._accepted_ids = set()
         self._rejected_ids = set()
+        self.archive = JobArchive()
+        self._finished: Dict[str, float] = {}  # terminados por archivar -> tiempo de fin
+        self._now = 0.0  # último tiempo de juego visto
+        # lo asigna UndoLog (watch_journal): cada archivado queda anotado para deshacerlo
+        self.journal: Optional[List[Tuple]] = None
         # Si GameManager lo desea puede asignar aquí el epoch de inicio:
         # ej: job_manager._game_start_epoch = game_manager.game_start_time
         self._game_start_epoch: Optional[float] = None
+        # epoch del inicio del mapa: base de los deadlines ISO sin deadline_timestamp
+        # (GameManager lo asigna desde get_game_start_timestamp())
+        self._deadline_epoch: Optional[float] = None
         print(f"[JOB_MANAGER] ✅ Sistema inicializado")
 
+    def _deadline_start(self) -> Optional[float]:
+        """Epoch contra el que se parsean los deadlines ISO."""
+        return self._deadline_epoch if self._deadline_epoch is not None else self._game_start_epoch
+
     def add_job_from_raw(self, raw: Dict[str, Any], pickup_override: Tuple[int, int] = None) -> Optional[Job]:
         """Añade un trabajo desde datos JSON.
         pickup_override: si se proporciona, sobrescribe la posición depickup
@@ -57,71 +536,27 @@ class JobManager:
             jid = str(raw.get("id") or raw.get("job_id") or raw.get("jid") or f"job_{next(self._counter)}")
 
             if jid in self._jobs:
-                job = self._jobs[jid]
-                job.raw = raw
-                if pickup_override is not None:
-                    job.pickup = tuple(pickup_override)
+                job = self._update_job(self._jobs[jid], raw, pickup_override)
                 print(f"[JOB_MANAGER] (update) Job actualizado: {job}")
                 return job
 
-            # pickup/dropoff: preferir override. Evitar tuple(None).
-            pickup_val = pickup_override if pickup_override is not None else (raw.get("pickup") or (0, 0))
-            try:
-                pickup = tuple(pickup_val)
-            except Exception:
-                pickup = (0, 0)
-
-            dropoff_val = raw.get("dropoff") or (0, 0)
             try:
-                dropoff = tuple(dropoff_val)
-            except Exception:
-                dropoff = (0, 0)
+                job = _new_job(jid, raw, self._game_start_epoch, self._deadline_start(),
+                               self.COMPACT_RAW, pickup_override)
+            except (TypeError, ValueError) as e:
+                print(f"[JOB_MANAGER] ❌ Job {jid} inválido: {e}")
+                return None
 
-            # priority / weight / payout robustos frente a None/'' etc.
-            try:
-                priority = int(raw.get("priority") or 0)
-            except Exception:
-                priority = 0
-
-            try:
-                weight = float(raw.get("weight") or raw.get("peso") or 1.0)
-            except Exception:
-                weight = 1.0
-
-            try:
-                payout = float(raw.get("payout") or raw.get("reward") or 0.0)
-            except Exception:
-                payout = 0.0
-
-            # release_time: puede venir como offset o epoch (>=1e9)
-            raw_rel = raw.get("release_time", 0.0) or 0.0
-            try:
-                release_time = float(raw_rel)
-            except Exception:
-                release_time = 0.0
-
-            # Normalizar release_time si viene en epoch y conocemos game_start_epoch
-            if release_time > 1e9:
-                if self._game_start_epoch is not None:   # distinguir 0.0 válido de None
-                    try:
-                        release_time = max(0.0, release_time - float(self._game_start_epoch))
-                        print(f"[JOB_MANAGER] Converted epoch release_time -> offset for job {jid}: {release_time}s")
-                    except Exception:
-                        release_time = 0.0
-                else:
-                    print(f"[JOB_MANAGER] Detected epoch timestamp for job {jid} but no game_start_epoch set. Marking release_time=0 (immediate).")
-                    release_time = 0.0
-
-            job = Job(
-                id=jid, raw=raw, pickup=pickup, dropoff=dropoff,
-                priority=priority, weight=weight, payout=payout,
-                release_time=release_time
-            )
             self._jobs[jid] = job
+            self._state_of[jid] = job.state
+            self._buckets[job.state][jid] = job
+            job._manager = self
+            self._schedule_deadline(job)
 
-            # Añadir al heap de prioridades
+            # Etapa 1: esperar la liberación por tiempo
             counter = next(self._counter)
-            heapq.heappush(self._heap, (-priority, release_time, counter, jid))
+            self._keys[jid] = (-job.priority, job.release_time, counter, jid)
+            heapq.heappush(self._release_heap, (job.release_time, counter, jid))
             print(f"[JOB_MANAGER] ✅ Job añadido: {job}")
             return job
 
@@ -129,85 +564,432 @@ class JobManager:
             print(f"[JOB_MANAGER] ❌ Error añadiendo job: {e}")
             return None
 
+    def _update_job(self, job: Job, raw: Dict[str, Any], pickup_override: Tuple[int, int] = None) -> Job:
+        job.raw = raw
+        if pickup_override is not None:
+            job.pickup = tuple(pickup_override)
+        job.deadline_at = parse_deadline_offset(raw, self._deadline_start())
+        if "accepted_at" in raw:
+            job.accepted_at = _as_offset(raw.get("accepted_at"))
+        self._schedule_deadline(job)
+        return job
+
+    def add_jobs_bulk(self, raws: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Carga un lote de jobs en una sola pasada.
+        Cada job se valida y normaliza; los inválidos no se cargan y quedan en el
+        reporte en lugar de imprimirse. El heap de liberación y la agenda de
+        deadlines se reconstruyen con un solo heapify al final.
+        Retorna {"added": n, "updated": n, "errors": [(índice, job_id, motivo), ...]}.
+        Los ids ya cargados se actualizan igual que en add_job_from_raw.
+        """
+        # el lote crea muchos objetos de larga vida: con el GC pausado no se
+        # repiten pasadas completas sobre ellos mientras se carga
+        gc_was_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            return self._add_jobs_bulk(raws)
+        finally:
+            if gc_was_enabled:
+                gc.enable()
+
+    def _add_jobs_bulk(self, raws: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+        errors: List[Tuple[int, Optional[str], str]] = []
+        added = updated = 0
+        jobs = self._jobs
+        state_of = self._state_of
+        pending = self._buckets["pending"]
+        keys = self._keys
+        counter = self._counter
+        start_epoch = self._game_start_epoch
+        deadline_epoch = self._deadline_start()
+        compact = self.COMPACT_RAW
+        release_entries: List[Tuple[float, int, str]] = []
+        deadline_entries: List[Tuple[str, float]] = []
+        parsed_deadlines: Dict[Any, Optional[float]] = {}
+        seen = set()
+
+        for i, raw in enumerate(raws):
+            if not isinstance(raw, dict):
+                errors.append((i, None, "no es un objeto JSON"))
+                continue
+            jid = raw.get("id") or raw.get("job_id") or raw.get("jid")
+            jid = str(jid) if jid else f"job_{next(counter)}"
+            if jid in seen:
+                errors.append((i, jid, "id duplicado en el lote"))
+                continue
+            seen.add(jid)
+            if jid in jobs:
+                self._update_job(jobs[jid], raw)
+                updated += 1
+                continue
+
+            try:
+                job = _new_job(jid, raw, start_epoch, deadline_epoch, compact, deadlines=parsed_deadlines)
+            except (TypeError, ValueError) as e:
+                errors.append((i, jid, str(e)))
+                continue
+            jobs[jid] = job
+            state_of[jid] = "pending"
+            pending[jid] = job
+            job._manager = self
+
+            release_time = job.release_time
+            n = next(counter)
+            keys[jid] = (-job.priority, release_time, n, jid)
+            release_entries.append((release_time, n, jid))
+            deadline_at = job.deadline_at
+            if job._accepted_at is not None and release_time > 0.0:
+                deadline_at = job._accepted_at + release_time  # ventana desde la aceptación
+            if deadline_at is not None:
+                deadline_entries.append((jid, deadline_at))
+            added += 1
+
+        if release_entries:
+            self._release_heap.extend(release_entries)
+            heapq.heapify(self._release_heap)
+            self.state_version += 1
+        if deadline_entries:
+            self.deadlines.schedule_many(deadline_entries)
+        print(f"[JOB_MANAGER] ✅ Lote cargado: {added} nuevos, {updated} actualizados, {len(errors)} con error")
+        return {"added": added, "updated": updated, "errors": errors}
+
+    def preview_job(self, raw: Dict[str, Any]) -> Optional[Job]:
+        """Job sin registrar (no entra a buckets, heaps ni agenda) para evaluar una oferta cruda."""
+        try:
+            jid = str(raw.get("id") or raw.get("job_id") or raw.get("jid") or "preview")
+            return _new_job(jid, raw, self._game_start_epoch, self._deadline_start(), False)
+        except Exception:
+            return None
+
     def get_job(self, job_id: str) -> Optional[Job]:
         return self._jobs.get(job_id)
 
     def all_jobs(self) -> List[Job]:
         return list(self._jobs.values())
 
-    def peek_next_eligible(self, now: float = 0.0) -> Optional[Job]:
-        """Encuentra el próximo trabajo elegible sin removerlo del heap"""
-        temp = []
-        result = None
+    # ---------------- buckets por estado ----------------
+    def _sync_state(self, job: Job):
+        """Mueve el job al bucket que corresponde a sus flags actuales."""
+        jid = job.id
+        if self._jobs.get(jid) is not job:
+            return
+        new = job.state
+        old = self._state_of.get(jid)
+        if new == old:
+            return
+        if old is not None:
+            self._buckets[old].pop(jid, None)
+        self._buckets[new][jid] = job
+        self._state_of[jid] = new
+        self.state_version += 1
+        self._index_cells(job)
+        if new in TERMINAL_STATES:
+            self.deadlines.cancel(jid)
+            self._finished.setdefault(jid, self._now)
+        elif old in TERMINAL_STATES:
+            self._finished.pop(jid, None)
+            self._schedule_deadline(job)
 
-        try:
-            while self._heap:
-                neg_prio, rel_time, counter, jid = heapq.heappop(self._heap)
-                job = self._jobs.get(jid)
+        if old in OPEN_STATES and new not in OPEN_STATES:
+            self._discard_released(jid)
+        elif new in OPEN_STATES and old not in OPEN_STATES:
+            # reabierto (p.ej. deshacer un rechazo): vuelve a esperar su liberación
+            key = self._keys.get(jid)
+            if key is not None:
+                heapq.heappush(self._release_heap, (key[1], key[2], jid))
 
-                # Filtrar jobs inválidos (no los reinsertamos)
-                if job is None or job.accepted or job.rejected or job.completed:
-                    continue
+    # ---------------- deadlines ----------------
+    def _schedule_deadline(self, job: Job):
+        if self._state_of.get(job.id) in TERMINAL_STATES:
+            return
+        deadline = job.deadline_offset()
+        if deadline is None:
+            self.deadlines.cancel(job.id)
+        else:
+            self.deadlines.schedule(job.id, deadline)
+
+    def set_deadline(self, job_id: str, deadline: Optional[float]):
+        """Fija el deadline (segundos de juego) de un job; None lo quita."""
+        job = self._jobs.get(job_id)
+        if job is None:
+            return
+        if job.raw is not None:
+            job.raw["deadline_timestamp"] = deadline
+        job.deadline_at = _as_offset(deadline)
+        self._schedule_deadline(job)
+
+    def poll_deadlines(self, now: float) -> List[Tuple[str, Job]]:
+        """
+        Eventos de deadline vencidos hasta `now`, cada uno una sola vez:
+        - ("expired", job) para ofertas abiertas: el job pasa a expired.
+        - ("late", job) cuando vence un job aceptado o en camino.
+        - ("warning", job) aviso previo de un job activo.
+        - ("lost", job) job activo no entregado tras LOST_PACKAGE_GRACE: pasa a expired.
+        """
+        self._now = now
+        events: List[Tuple[str, Job]] = []
+        for kind, jid in self.deadlines.pop_due(now):
+            job = self._jobs.get(jid)
+            state = self._state_of.get(jid)
+            if job is None or state in TERMINAL_STATES:
+                continue
+            active = state in ("accepted", "carried")
+            if kind == EXPIRED:
+                if active:
+                    events.append(("late", job))
+                else:
+                    self.mark_expired(jid)
+                    events.append((EXPIRED, job))
+            elif kind == WARNING and active:
+                events.append((WARNING, job))
+            elif kind == LOST and active:
+                self.mark_expired(jid)
+                events.append((LOST, job))
+        self.archive_finished(now - self.ARCHIVE_DELAY)
+        return events
 
-                # Guardar temporalmente para reinsertar más tarde
-                temp.append((neg_prio, rel_time, counter, jid))
+    # ---------------- archivo ----------------
+    def archive_finished(self, before: Optional[float] = None) -> int:
+        """Archiva los jobs terminados hasta `before` (todos si es None)."""
+        finished = self._finished
+        moved = 0
+        while finished:
+            jid, at = next(iter(finished.items()))
+            if before is not None and at > before:
+                break
+            del finished[jid]
+            self._archive_job(jid, at)
+            moved += 1
+        return moved
 
-                # Verificar si es elegible por tiempo y no ha sido mostrado
-                # Nota: rel_time puede ser float (offset). Aseguramos fallback si es None.
-                try:
-                    rel_time_cmp = float(rel_time)
-                except Exception:
-                    rel_time_cmp = 0.0
+    def _archive_job(self, jid: str, finished_at: float):
+        job = self._jobs.get(jid)
+        if job is None:
+            return
+        if self.journal is not None:
+            # el archivo es persistente: su snapshot es O(1)
+            self.journal.append((self, (
+                "archive", job, self._state_of.get(jid), finished_at, self._keys.get(jid),
+                jid in self._accepted_ids, jid in self._rejected_ids, self.archive.snapshot(),
+            )))
+        del self._jobs[jid]
+        state = self._state_of.pop(jid, None)
+        self._buckets[state].pop(jid, None)
+        self._keys.pop(jid, None)
+        self._discard_indexed(jid)
+        self.deadlines.cancel(jid)
+        self._accepted_ids.discard(jid)
+        self._rejected_ids.discard(jid)
+        job._manager = None
+        self.archive.record_job(job, state, finished_at)
 
-                if rel_time_cmp <= now and not job.visible_pickup:
-                    result = job
-                    break
+    def revert(self, op: Tuple):
+        """Deshace un archivado anotado en el journal: el job vuelve a estar vivo."""
+        _, job, state, finished_at, key, accepted, rejected, snapshot = op
+        jid = job.id
+        self.archive.restore(snapshot)
+        self._jobs[jid] = job
+        self._state_of[jid] = state
+        self._buckets[state][jid] = job
+        if key is not None:
+            self._keys[jid] = key
+        if accepted:
+            self._accepted_ids.add(jid)
+        if rejected:
+            self._rejected_ids.add(jid)
+        job._manager = self
+        # se revierte del más nuevo al más viejo: cada uno vuelve al frente
+        self._finished = {jid: finished_at, **self._finished}
+        self._index_cells(job)
+        self.state_version += 1
 
-            # Reinsertar todos los jobs temporales
-            for entry in temp:
-                heapq.heappush(self._heap, entry)
+    def completed_payout(self, pay_of=None) -> float:
+        """Pago total de los completados (vivos con pay_of o job.payout, más el archivo)."""
+        pay_of = pay_of or (lambda job: job.payout)
+        return sum(pay_of(job) for job in self._buckets["completed"].values()) + self.archive.total_payout()
 
-        except Exception as e:
-            print(f"[JOB_MANAGER] ❌ Error en peek_next_eligible: {e}")
-            for entry in temp:
-                try:
-                    heapq.heappush(self._heap, entry)
-                except Exception:
-                    pass
+    # ---------------- índice espacial ----------------
+    def _index_cells(self, job: Job):
+        """Registra el pickup (accepted) o dropoff (carried) del job en su vecindad."""
+        jid = job.id
+        self._discard_indexed(jid)
+        state = self._state_of.get(jid)
+        if state == "accepted":
+            index, center = self._pickup_index, _as_cell(job.pickup)
+        elif state == "carried":
+            index, center = self._dropoff_index, _as_cell(job.dropoff)
+        else:
+            return
+        if center is None:
+            return
+        cx, cy = center
+        for dx, dy in _NEIGHBORHOOD:
+            index.setdefault((cx + dx, cy + dy), {})[jid] = job
+        self._indexed_cells[jid] = (index, center)
 
-        return result
+    def _discard_indexed(self, jid: str):
+        prev = self._indexed_cells.pop(jid, None)
+        if prev is None:
+            return
+        index, (cx, cy) = prev
+        for dx, dy in _NEIGHBORHOOD:
+            cell = (cx + dx, cy + dy)
+            bucket = index.get(cell)
+            if bucket is not None:
+                bucket.pop(jid, None)
+                if not bucket:
+                    del index[cell]
 
-    def get_available_jobs(self, now: float = 0.0) -> List[Job]:
-        """Obtiene todos los trabajos disponibles"""
-        available = []
-        temp = []
+    def pickups_near(self, x: int, y: int) -> List[Job]:
+        """Jobs aceptados cuyo pickup está en (x, y) o adyacente; los exactos primero."""
+        cell = (int(x), int(y))
+        jobs = list(self._pickup_index.get(cell, {}).values())
+        jobs.sort(key=lambda j: self._indexed_cells[j.id][1] != cell)
+        return jobs
 
-        try:
-            while self._heap:
-                neg_prio, rel_time, counter, jid = heapq.heappop(self._heap)
-                job = self._jobs.get(jid)
-                temp.append((neg_prio, rel_time, counter, jid))
+    def dropoffs_near(self, x: int, y: int) -> List[Job]:
+        """Jobs en camino cuyo dropoff está en (x, y) o adyacente; los exactos primero."""
+        cell = (int(x), int(y))
+        jobs = list(self._dropoff_index.get(cell, {}).values())
+        jobs.sort(key=lambda j: self._indexed_cells[j.id][1] != cell)
+        return jobs
+
+    def jobs_in_state(self, *states: str) -> List[Job]:
+        """Jobs de los buckets pedidos (sin recorrer los demás)."""
+        out: List[Job] = []
+        for s in states:
+            out.extend(self._buckets.get(s, {}).values())
+        return out
 
-                try:
-                    rel_time_cmp = float(rel_time)
-                except Exception:
-                    rel_time_cmp = 0.0
+    def count_in_state(self, *states: str) -> int:
+        """Cantidad por estado; los terminales incluyen los ya archivados."""
+        return sum(len(self._buckets.get(s, {})) + self.archive.count(s) for s in states)
 
-                if job and not job.accepted and not job.rejected and not job.completed and rel_time_cmp <= now:
-                    available.append(job)
+    def get_state(self, job_id: str) -> Optional[str]:
+        return self._state_of.get(job_id)
 
-            for entry in temp:
-                heapq.heappush(self._heap, entry)
+    def offer_job(self, job_id: str) -> bool:
+        """pending -> offered"""
+        job = self._jobs.get(job_id)
+        if job is None or self._state_of.get(job_id) not in OPEN_STATES:
+            return False
+        job.visible_pickup = True
+        return True
+
+    def withdraw_offer(self, job_id: str) -> bool:
+        """offered -> pending"""
+        job = self._jobs.get(job_id)
+        if job is None or self._state_of.get(job_id) != "offered":
+            return False
+        job.visible_pickup = False
+        return True
+
+    def mark_picked_up(self, job_id: str) -> bool:
+        """accepted -> carried"""
+        job = self._jobs.get(job_id)
+        if job is None or self._state_of.get(job_id) != "accepted":
+            return False
+        job.picked_up = True
+        job.dropoff_visible = True
+        return True
+
+    def mark_completed(self, job_id: str) -> bool:
+        """carried/accepted -> completed"""
+        job = self._jobs.get(job_id)
+        if job is None or self._state_of.get(job_id) not in ("accepted", "carried"):
+            return False
+        job.completed = True
+        return True
+
+    def mark_expired(self, job_id: str) -> bool:
+        """Cualquier estado no terminal -> expired"""
+        job = self._jobs.get(job_id)
+        if job is None or self._state_of.get(job_id) in ("completed", "rejected", "expired"):
+            return False
+        job.expired = True
+        return True
 
+    # ---------------- índice de liberación ----------------
+    def _is_open(self, job: Optional[Job]) -> bool:
+        return job is not None and self._state_of.get(job.id) in OPEN_STATES
+
+    def _release_until(self, now: float):
+        """Migra al índice por prioridad los jobs cuyo release_time ya llegó."""
+        if now > self._now:
+            self._now = now
+        heap = self._release_heap
+        while heap and heap[0][0] <= now:
+            _, _, jid = heapq.heappop(heap)
+            key = self._keys.get(jid)
+            if key is None or jid in self._released_live or not self._is_open(self._jobs.get(jid)):
+                continue
+            # tupla nueva: la entrada vigente se reconoce por identidad
+            entry = (key[0], key[1], key[2], jid)
+            self._released_live[jid] = entry
+            heapq.heappush(self._released, entry)
+        if len(self._released) > 2 * len(self._released_live) + 64:
+            # demasiadas entradas descartadas: reconstruir con las vigentes
+            self._released = list(self._released_live.values())
+            heapq.heapify(self._released)
+        else:
+            released, live = self._released, self._released_live
+            while released and live.get(released[0][3]) is not released[0]:
+                heapq.heappop(released)
+
+    def _discard_released(self, jid: str):
+        # borrado perezoso: la entrada queda en el heap hasta que aflore o se compacte
+        self._released_live.pop(jid, None)
+
+    def _iter_released(self, now: float):
+        """
+        Recorre los jobs liberados y abiertos en orden de prioridad, purgando los cerrados.
+        Avanza por el heap con una frontera de índices: los primeros k cuestan O(k log k).
+        """
+        heap, live = self._released, self._released_live
+        stale = []
+        try:
+            frontier = [(heap[0], 0)] if heap else []
+            while frontier:
+                entry, i = heapq.heappop(frontier)
+                for child in (2 * i + 1, 2 * i + 2):
+                    if child < len(heap):
+                        heapq.heappush(frontier, (heap[child], child))
+                jid = entry[3]
+                if live.get(jid) is not entry:
+                    continue
+                job = self._jobs.get(jid)
+                if not self._is_open(job):
+                    stale.append(jid)
+                    continue
+                # now puede retroceder (p.ej. al cargar partida): se respeta release_time
+                if entry[1] <= now:
+                    yield job
+        finally:
+            for jid in stale:
+                self._discard_released(jid)
+
+    def peek_next_eligible(self, now: float = 0.0) -> Optional[Job]:
+        """Encuentra el próximo trabajo elegible (liberado y aún no mostrado) sin removerlo"""
+        try:
+            now = float(now)
+            self._release_until(now)
+            for job in self._iter_released(now):
+                if not job.visible_pickup:
+                    return job
         except Exception as e:
-            print(f"[JOB_MANAGER] ❌ Error en get_available_jobs: {e}")
-            for entry in temp:
-                try:
-                    heapq.heappush(self._heap, entry)
-                except Exception:
-                    pass
+            print(f"[JOB_MANAGER] ❌ Error en peek_next_eligible: {e}")
+        return None
 
-        return available
+    def get_available_jobs(self, now: float = 0.0) -> List[Job]:
+        """Obtiene todos los trabajos disponibles (orden de prioridad)"""
+        try:
+            now = float(now)
+            self._release_until(now)
+            return list(self._iter_released(now))
+        except Exception as e:
+            print(f"[JOB_MANAGER] ❌ Error en get_available_jobs: {e}")
+            return []
 
     def accept_job(self, job_id: str) -> bool:
         """Acepta un trabajo (API pública)."""
@@ -219,7 +1001,7 @@ class JobManager:
         if job.accepted:
             return True
 
-        if job.rejected or job.completed:
+        if job.rejected or job.completed or job.expired:
             return False
 
         job.accepted = True
@@ -242,5 +1024,5 @@ class JobManager:
         return False
 
     def get_active_jobs(self) -> List[Job]:
-        """Obtiene trabajos activos"""
-        return [job for job in self._jobs.values() if job.accepted and not job.completed]
+        """Obtiene trabajos activos (aceptados o en camino)"""
+        return self.jobs_in_state("accepted", "carried")
@@ -0,0 +1,704 @@
+# tests/jobs_test.py
+import unittest
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from game.jobs_manager import JobManager
+from game.deadline_scheduler import DeadlineScheduler
+from game.job_feed import JobFeed, JobsFile, iter_json_array, iter_ndjson
+from game.offer_ranking import OfferRanker
+from game.bundle_optimizer import BundleOptimizer, PICKUP, DROPOFF
+from game.inventory import Inventory
+
+
+def make_job(jid, priority=0, release_time=0.0, **extra):
+    raw = {
+        "id": jid,
+        "pickup": [1, 1],
+        "dropoff": [3, 3],
+        "weight": 1.0,
+        "payout": 100,
+        "priority": priority,
+        "release_time": release_time,
+    }
+    raw.update(extra)
+    return raw
+
+
+class TestJobReleaseIndex(unittest.TestCase):
+    """Índice en dos etapas: release_time y prioridad"""
+
+    def setUp(self):
+        self.jm = JobManager()
+        self.jm.add_job_from_raw(make_job("A", priority=1, release_time=0.0))
+        self.jm.add_job_from_raw(make_job("B", priority=3, release_time=20.0))
+        self.jm.add_job_from_raw(make_job("C", priority=2, release_time=5.0))
+
+    def test_01_jobs_migrate_as_time_passes(self):
+        """Los jobs pasan al índice por prioridad al llegar su release_time"""
+        print("\n🔸 Test 01: Migración por release_time")
+        self.assertEqual([j.id for j in self.jm.get_available_jobs(now=0.0)], ["A"])
+        self.assertEqual([j.id for j in self.jm.get_available_jobs(now=10.0)], ["C", "A"])
+        self.assertEqual([j.id for j in self.jm.get_available_jobs(now=30.0)], ["B", "C", "A"])
+        # consultar con un tiempo anterior no expone jobs aún no liberados
+        self.assertEqual([j.id for j in self.jm.get_available_jobs(now=6.0)], ["C", "A"])
+        print("✅ Migración por release_time: OK")
+
+    def test_02_peek_skips_visible_and_closed(self):
+        """peek_next_eligible respeta prioridad y omite mostrados/cerrados"""
+        print("\n🔸 Test 02: Próximo elegible")
+        self.assertEqual(self.jm.peek_next_eligible(30.0).id, "B")
+        self.jm.get_job("B").visible_pickup = True
+        self.assertEqual(self.jm.peek_next_eligible(30.0).id, "C")
+        self.jm.mark_rejected("C")
+        self.jm.get_job("A").completed = True
+        self.assertIsNone(self.jm.peek_next_eligible(30.0))
+        self.jm.get_job("B").visible_pickup = False
+        self.assertEqual(self.jm.peek_next_eligible(30.0).id, "B")
+        self.jm.accept_job("B")
+        self.assertEqual(self.jm.get_available_jobs(now=30.0), [])
+        print("✅ Próximo elegible: OK")
+
+    def test_03_released_heap_discards_lazily(self):
+        """Los liberados viven en un heap: cerrar y reabrir no lo hace crecer sin límite"""
+        print("\n🔸 Test 03: Heap de liberados")
+        jm = JobManager()
+        jm.add_jobs_bulk([make_job(f"J{i:03d}", priority=(i * 7) % 5, release_time=float(i % 9))
+                          for i in range(120)])
+        expected = sorted(jm.all_jobs(), key=lambda j: (-j.priority, j.release_time))
+        self.assertEqual(jm.get_available_jobs(now=10.0), expected)
+
+        job = jm.get_job("J007")
+        for _ in range(200):
+            jm.mark_rejected("J007")
+            self.assertNotIn(job, jm.get_available_jobs(now=10.0))
+            job.rejected = False
+            self.assertEqual(jm.get_available_jobs(now=10.0), expected)
+        self.assertLessEqual(len(jm._released), 2 * len(jm._released_live) + 64)
+        self.assertEqual(jm.peek_next_eligible(10.0), expected[0])
+        print("✅ Heap de liberados: OK")
+
+
+class TestJobStateBuckets(unittest.TestCase):
+    """Buckets por estado sincronizados con los flags"""
+
+    def setUp(self):
+        self.jm = JobManager()
+        for jid in ("A", "B", "C"):
+            self.jm.add_job_from_raw(make_job(jid))
+
+    def ids(self, *states):
+        return sorted(j.id for j in self.jm.jobs_in_state(*states))
+
+    def test_01_transition_methods(self):
+        """offer -> accept -> pickup -> complete recorre los buckets"""
+        print("\n🔸 Test 01: Transiciones de estado")
+        self.assertEqual(self.ids("pending"), ["A", "B", "C"])
+        self.assertTrue(self.jm.offer_job("A"))
+        self.assertEqual(self.jm.get_state("A"), "offered")
+        self.assertTrue(self.jm.accept_job("A"))
+        self.assertFalse(self.jm.mark_completed("B"))
+        self.assertTrue(self.jm.mark_picked_up("A"))
+        self.assertTrue(self.jm.get_job("A").dropoff_visible)
+        self.assertEqual(self.ids("carried"), ["A"])
+        self.assertEqual([j.id for j in self.jm.get_active_jobs()], ["A"])
+        self.assertTrue(self.jm.mark_completed("A"))
+        self.assertEqual(self.ids("completed"), ["A"])
+        self.assertEqual(self.jm.get_active_jobs(), [])
+        self.assertTrue(self.jm.mark_expired("C"))
+        self.assertFalse(self.jm.accept_job("C"))
+        self.assertEqual(self.ids("pending"), ["B"])
+        print("✅ Transiciones de estado: OK")
+
+    def test_02_direct_flag_writes_stay_in_sync(self):
+        """Asignar flags directamente también mueve el job de bucket"""
+        print("\n🔸 Test 02: Flags sincronizados")
+        job = self.jm.get_job("B")
+        job.accepted = True
+        job.picked_up = True
+        self.assertEqual(self.ids("carried"), ["B"])
+        version = self.jm.state_version
+        job.rejected = True
+        self.assertEqual(self.ids("rejected"), ["B"])
+        self.assertGreater(self.jm.state_version, version)
+        self.assertNotIn("B", [j.id for j in self.jm.get_available_jobs(now=0.0)])
+
+        # deshacer el rechazo lo devuelve a los disponibles
+        job.rejected = False
+        job.accepted = False
+        job.picked_up = False
+        self.assertIn("B", [j.id for j in self.jm.get_available_jobs(now=0.0)])
+        print("✅ Flags sincronizados: OK")
+
+    def test_03_copies_are_detached(self):
+        """Las copias de un job no alteran los buckets del manager"""
+        print("\n🔸 Test 03: Copias desacopladas")
+        import copy
+        clone = copy.deepcopy(self.jm.get_job("A"))
+        clone.completed = True
+        self.assertEqual(self.jm.get_state("A"), "pending")
+        self.assertEqual(self.ids("completed"), [])
+        print("✅ Copias desacopladas: OK")
+
+
+class TestJobSpatialIndex(unittest.TestCase):
+    """Índice por celda de pickups y dropoffs"""
+
+    def setUp(self):
+        self.jm = JobManager()
+        self.jm.add_job_from_raw(make_job("A", pickup=[2, 2], dropoff=[8, 8]))
+        self.jm.add_job_from_raw(make_job("B", pickup=[3, 2], dropoff=[8, 9]))
+
+    def test_01_index_follows_lifecycle(self):
+        """Solo los aceptados tienen pickup indexado y solo los en camino dropoff"""
+        print("\n🔸 Test 01: Índice espacial")
+        self.assertEqual(self.jm.pickups_near(2, 2), [])
+        self.jm.accept_job("A")
+        self.jm.accept_job("B")
+        # (2,2) es exacto para A y adyacente para B: los exactos primero
+        self.assertEqual([j.id for j in self.jm.pickups_near(2, 2)], ["A", "B"])
+        self.assertEqual([j.id for j in self.jm.pickups_near(3, 3)], ["B"])
+        self.assertEqual(self.jm.pickups_near(4, 4), [])
+
+        self.jm.mark_picked_up("A")
+        self.assertEqual([j.id for j in self.jm.pickups_near(2, 2)], ["B"])
+        self.assertEqual([j.id for j in self.jm.dropoffs_near(8, 7)], ["A"])
+
+        self.jm.mark_completed("A")
+        self.assertEqual(self.jm.dropoffs_near(8, 8), [])
+        print("✅ Índice espacial: OK")
+
+    def test_02_moving_pickup_reindexes(self):
+        """Cambiar el pickup de un job aceptado actualiza el índice"""
+        print("\n🔸 Test 02: Reindexado de pickup")
+        self.jm.accept_job("A")
+        self.jm.get_job("A").pickup = (10, 10)
+        self.assertEqual(self.jm.pickups_near(2, 2), [])
+        self.assertEqual([j.id for j in self.jm.pickups_near(10, 11)], ["A"])
+        print("✅ Reindexado de pickup: OK")
+
+
+class TestDeadlineScheduler(unittest.TestCase):
+    """Eventos de deadline disparados una sola vez sobre tiempo simulado"""
+
+    def test_01_scheduler_fires_once_in_order(self):
+        """Aviso, vencimiento y pérdida salen en orden y una sola vez"""
+        print("\n🔸 Test 01: Agenda de deadlines")
+        sched = DeadlineScheduler(warning_lead=10.0, lost_grace=20.0)
+        sched.schedule("A", 50.0)
+        sched.schedule("B", 45.0)
+        self.assertEqual(sched.next_time(), 35.0)
+        self.assertEqual(sched.pop_due(30.0), [])
+        self.assertEqual(sched.pop_due(50.0), [("warning", "B"), ("warning", "A"), ("expired", "B"), ("expired", "A")])
+        self.assertEqual(sched.pop_due(50.0), [])
+
+        # reprogramar invalida los eventos viejos
+        sched.schedule("A", 100.0)
+        sched.cancel("B")
+        self.assertEqual(sched.pop_due(99.0), [("warning", "A")])
+        self.assertEqual(sched.pop_due(1000.0), [("expired", "A"), ("lost", "A")])
+        self.assertEqual(len(sched), 0)
+        print("✅ Agenda de deadlines: OK")
+
+    def test_02_job_manager_deadline_events(self):
+        """Ofertas vencidas expiran; pedidos activos avisan, llegan tarde y se pierden"""
+        print("\n🔸 Test 02: Eventos de deadline en JobManager")
+        jm = JobManager()
+        jm.add_job_from_raw(make_job("OPEN", deadline_timestamp=60.0))
+        jm.add_job_from_raw(make_job("ACTIVE", deadline_timestamp=60.0))
+        jm.add_job_from_raw(make_job("DONE", deadline_timestamp=60.0))
+        jm.accept_job("ACTIVE")
+        jm.accept_job("DONE")
+        jm.mark_completed("DONE")
+
+        events = [(kind, job.id) for kind, job in jm.poll_deadlines(60.0)]
+        self.assertIn(("warning", "ACTIVE"), events)
+        self.assertIn(("late", "ACTIVE"), events)
+        self.assertIn(("expired", "OPEN"), events)
+        self.assertNotIn("DONE", [jid for _, jid in events])
+        self.assertEqual(jm.get_state("OPEN"), "expired")
+        self.assertEqual(jm.get_state("ACTIVE"), "accepted")
+
+        lost = [(kind, job.id) for kind, job in jm.poll_deadlines(60.0 + JobManager.LOST_PACKAGE_GRACE)]
+        self.assertEqual(lost, [("lost", "ACTIVE")])
+        self.assertEqual(jm.get_state("ACTIVE"), "expired")
+        self.assertEqual(jm.poll_deadlines(10000.0), [])
+        print("✅ Eventos de deadline: OK")
+
+    def test_03_acceptance_window_reschedules(self):
+        """accepted_at con release_time abre una ventana nueva desde la aceptación"""
+        print("\n🔸 Test 03: Ventana desde la aceptación")
+        jm = JobManager()
+        job = jm.add_job_from_raw(make_job("W", release_time=40.0, deadline_timestamp=500.0))
+        jm.accept_job("W")
+        job.accepted_at = 100.0
+        self.assertEqual(jm.deadlines.deadline_of("W"), 140.0)
+        print("✅ Ventana desde la aceptación: OK")
+
+
+class TestJobTimeOffsets(unittest.TestCase):
+    """Offsets de tiempo normalizados al ingresar el job"""
+
+    def test_01_iso_deadline_parsed_once(self):
+        """El deadline ISO se convierte a segundos de juego al ingresar"""
+        print("\n🔸 Test 01: Deadline normalizado")
+        from datetime import datetime, timezone
+        start = datetime(2025, 9, 1, 12, 0, tzinfo=timezone.utc).timestamp()
+        jm = JobManager()
+        jm._game_start_epoch = start
+        job = jm.add_job_from_raw(make_job("D", release_time=60.0, deadline="2025-09-01T12:10:00Z"))
+        self.assertEqual(job.deadline_at, 600.0)
+        self.assertIsNone(job.accepted_at)
+        self.assertEqual(job.time_remaining(100.0), 500.0)
+        self.assertEqual(job.total_time(), 540.0)
+        self.assertEqual(jm.deadlines.deadline_of("D"), 600.0)
+
+        # un deadline_timestamp ya calculado tiene prioridad sobre el ISO
+        other = jm.add_job_from_raw(make_job("T", deadline="2025-09-01T12:10:00Z", deadline_timestamp=90.0))
+        self.assertEqual(other.deadline_at, 90.0)
+
+        # el ISO se mide desde el inicio del mapa, no desde el arranque real del juego
+        launched = JobManager()
+        launched._game_start_epoch = start + 3600.0
+        launched._deadline_epoch = start
+        single = launched.add_job_from_raw(make_job("S", deadline="2025-09-01T12:10:00Z"))
+        launched.add_jobs_bulk([make_job("B", deadline="2025-09-01T12:05:00Z")])
+        self.assertEqual(single.deadline_at, 600.0)
+        self.assertEqual(launched.get_job("B").deadline_at, 300.0)
+        print("✅ Deadline normalizado: OK")
+
+    def test_02_acceptance_window_math(self):
+        """Con accepted_at la ventana corre desde la aceptación"""
+        print("\n🔸 Test 02: Ventana desde aceptación")
+        jm = JobManager()
+        job = jm.add_job_from_raw(make_job("W", release_time=40.0, deadline_timestamp=500.0))
+        self.assertEqual(job.time_remaining(0.0), 500.0)
+        job.accepted_at = 100.0
+        self.assertEqual(job.time_remaining(130.0), 10.0)
+        self.assertEqual(job.total_time(), 40.0)
+        self.assertEqual(job.time_remaining(150.0), -10.0)
+        self.assertEqual(jm.add_job_from_raw(make_job("N")).time_remaining(5.0), float("inf"))
+        print("✅ Ventana desde aceptación: OK")
+
+
+class TestCompactJob(unittest.TestCase):
+    """Jobs con __slots__, flags en bitfield y raw perezoso"""
+
+    def test_01_slots_and_flags(self):
+        """Los flags viven en un entero y siguen moviendo el job de bucket"""
+        print("\n🔸 Test 01: Bitfield de flags")
+        jm = JobManager()
+        job = jm.add_job_from_raw(make_job("A"))
+        self.assertFalse(hasattr(job, "__dict__"))
+        job.accepted = True
+        job.picked_up = True
+        job.dropoff_visible = True
+        self.assertTrue(job.accepted and job.picked_up and job.dropoff_visible)
+        self.assertFalse(job.completed)
+        self.assertEqual(jm.get_state("A"), "carried")
+        job.picked_up = False
+        self.assertEqual(jm.get_state("A"), "accepted")
+        print("✅ Bitfield de flags: OK")
+
+    def test_02_raw_rebuilt_on_demand(self):
+        """raw se empaqueta al ingresar y se reconstruye igual al leerlo"""
+        print("\n🔸 Test 02: raw perezoso")
+        import copy
+        jm = JobManager()
+        raw = make_job("B", deadline="2025-09-01T12:10:00Z", description="Caja frágil")
+        job = jm.add_job_from_raw(dict(raw))
+        self.assertIsNone(job._raw)
+        # las columnas no se repiten en la tupla empaquetada
+        self.assertNotIn("pickup", job._packed[0])
+
+        clone = copy.deepcopy(job)
+        self.assertIs(clone._packed, job._packed)
+        self.assertEqual(job.raw, raw)
+        self.assertIs(job.raw, job.raw)
+        job.raw["note"] = "x"
+        self.assertEqual(copy.copy(job).raw["note"], "x")
+        self.assertEqual(clone, copy.deepcopy(clone))
+        print("✅ raw perezoso: OK")
+
+    def test_03_inventory_keeps_raw_packed(self):
+        """Aceptar un job en el inventario no reconstruye su raw"""
+        print("\n🔸 Test 03: Inventario sin raw")
+        jm = JobManager()
+        job = jm.add_job_from_raw(make_job("C", weight=2.5))
+        inv = Inventory(max_weight=10.0)
+        self.assertTrue(inv.can_add(job))
+        self.assertTrue(inv.add(job))
+        self.assertEqual(inv.current_weight, 2.5)
+        self.assertIsNone(job._raw)
+        print("✅ Inventario sin raw: OK")
+
+    def test_04_offer_payload_keeps_raw_packed(self):
+        """La copia para ofertas no deja el raw desempaquetado en el job"""
+        print("\n🔸 Test 04: Payload de oferta")
+        jm = JobManager()
+        raw = make_job("D", description="Sobre")
+        job = jm.add_job_from_raw(dict(raw))
+        packed = job._packed
+        payload = job.raw_copy()
+        self.assertEqual(payload, raw)
+        self.assertIsNone(job._raw)
+        self.assertIs(job._packed, packed)
+        payload["note"] = "x"
+        self.assertNotIn("note", job.raw)
+        self.assertIsNot(job.raw_copy(), job.raw)
+        self.assertEqual(job.raw_copy(), job.raw)
+        print("✅ Payload de oferta: OK")
+
+
+class TestBulkIngestion(unittest.TestCase):
+    """Carga por lotes con reporte de errores"""
+
+    def test_01_bulk_load_with_report(self):
+        """Los jobs válidos se cargan; los inválidos quedan en el reporte"""
+        print("\n🔸 Test 01: Carga por lotes")
+        jm = JobManager()
+        jm.add_job_from_raw(make_job("OLD", priority=1))
+        batch = [
+            make_job("A", priority=2, release_time=10.0, deadline_timestamp=300.0),
+            make_job("B", priority=5, release_time=0.0),
+            make_job("BAD_CELL", pickup=[1]),
+            make_job("BAD_WEIGHT", weight="pesado"),
+            make_job("A"),
+            "no soy un job",
+            make_job("OLD", payout=999),
+        ]
+        report = jm.add_jobs_bulk(batch)
+        self.assertEqual(report["added"], 2)
+        self.assertEqual(report["updated"], 1)
+        self.assertEqual([(i, jid) for i, jid, _ in report["errors"]],
+                         [(2, "BAD_CELL"), (3, "BAD_WEIGHT"), (4, "A"), (5, None)])
+
+        self.assertEqual([j.id for j in jm.get_available_jobs(now=0.0)], ["B", "OLD"])
+        self.assertEqual([j.id for j in jm.get_available_jobs(now=10.0)], ["B", "A", "OLD"])
+        self.assertEqual(jm.get_job("OLD").raw["payout"], 999)
+        self.assertEqual(jm.deadlines.deadline_of("A"), 300.0)
+        self.assertEqual(jm.count_in_state("pending"), 3)
+        print("✅ Carga por lotes: OK")
+
+    def test_02_bulk_and_single_validate_alike(self):
+        """add_jobs_bulk y add_job_from_raw aceptan y rechazan lo mismo"""
+        print("\n🔸 Test 02: Misma validación en lote e individual")
+        cases = [
+            make_job("OK"),
+            {k: v for k, v in make_job("NO_PICKUP").items() if k != "pickup"},
+            make_job("TUPLE_CELL", pickup=(2, 2)),
+            make_job("FLOATS", weight=2.5, payout=80.0, release_time=12.0),
+            make_job("BAD_CELL", pickup=[1]),
+            make_job("BAD_WEIGHT", weight="pesado"),
+            make_job("NEG_WEIGHT", weight=-1),
+            make_job("BAD_DEADLINE", deadline="mañana"),
+        ]
+        bulk = JobManager()
+        bulk._deadline_epoch = 0.0
+        report = bulk.add_jobs_bulk([dict(raw) for raw in cases])
+        rejected = {jid for _, jid, _ in report["errors"]}
+        self.assertEqual(rejected, {"BAD_CELL", "BAD_WEIGHT", "NEG_WEIGHT", "BAD_DEADLINE"})
+
+        single = JobManager()
+        single._deadline_epoch = 0.0
+        for raw in cases:
+            job = single.add_job_from_raw(dict(raw))
+            self.assertEqual(job is None, raw["id"] in rejected, raw["id"])
+            if job is not None:
+                self.assertEqual(job, bulk.get_job(raw["id"]))
+                self.assertEqual(job.raw, raw)  # raw empaquetado se reconstruye igual
+        self.assertEqual(single.get_job("NO_PICKUP").pickup, (0, 0))
+        print("✅ Misma validación en lote e individual: OK")
+
+
+class TestJobFeed(unittest.TestCase):
+    """Ingesta incremental por release_time"""
+
+    def test_01_incremental_parsers(self):
+        """Los parsers decodifican objetos aunque lleguen partidos en trozos"""
+        print("\n🔸 Test 01: Parsers incrementales")
+        import json
+        jobs = [make_job("A", note="a,]b"), make_job("B"), make_job("C")]
+        text = json.dumps({"meta": {"v": 1}, "data": jobs})
+        chunks = [text[i:i + 7] for i in range(0, len(text), 7)]
+        self.assertEqual(list(iter_json_array(chunks)), jobs)
+        plain = json.dumps(jobs)
+        self.assertEqual(list(iter_json_array(iter(plain))), jobs)
+        with self.assertRaises(ValueError):
+            list(iter_json_array([plain[:-20]]))
+        lines = [json.dumps(j) + "\n" for j in jobs] + ["\n"]
+        self.assertEqual(list(iter_ndjson(lines)), jobs)
+        print("✅ Parsers incrementales: OK")
+
+    def test_02_feed_reads_lazily(self):
+        """El feed solo lee de la fuente lo que entra en la ventana"""
+        print("\n🔸 Test 02: Feed perezoso")
+        read = []
+
+        def source():
+            for i, release in enumerate([0.0, 5.0, 40.0, 20.0, 100.0, 200.0]):
+                read.append(i)
+                yield make_job(f"J{i}", release_time=release)
+
+        feed = JobFeed(source(), lookahead=10.0)
+        self.assertEqual([r["id"] for r in feed.pull(0.0)], ["J0", "J1"])
+        self.assertEqual(read, [0, 1, 2])
+        self.assertEqual(len(feed), 1)
+        # J3 llega desordenado, pero se entrega antes que J2
+        self.assertEqual([r["id"] for r in feed.pull(30.0)], ["J3", "J2"])
+        self.assertEqual(feed.pull(30.0), [])
+
+        jm = JobManager()
+        report = feed.feed(jm, 95.0)
+        self.assertEqual(report["added"], 1)
+        self.assertIsNone(feed.feed(jm, 95.0))
+        self.assertFalse(feed.done)
+        self.assertEqual([r["id"] for r in feed.drain()], ["J5"])
+        self.assertTrue(feed.done)
+        self.assertEqual(feed.delivered, 6)
+        print("✅ Feed perezoso: OK")
+
+
+    def test_03_streamed_catalog_round_trips_save(self):
+        """Un catálogo en streaming se lee de a poco y el guardado igual lo incluye"""
+        print("\n🔸 Test 03: Guardado con carga en streaming")
+        import json
+        import tempfile
+        from game.player_state import PlayerState
+
+        jobs = [make_job(f"J{i}", release_time=10.0 * i) for i in range(5)] + [{"id": "BAD"}]
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "city_jobs.json")
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump({"version": 1, "data": jobs}, f)
+            source = JobsFile(path, chunk_size=16, accept=lambda job: "pickup" in job)
+
+            feed = JobFeed(source, lookahead=5.0)
+            self.assertEqual([r["id"] for r in feed.pull(0.0)], ["J0"])
+            self.assertFalse(feed.exhausted)  # el resto sigue en disco
+
+            state = PlayerState()
+            state.initialize_game({"max_time": 900}, source, {}, 900)
+            saved = json.loads(json.dumps(state.to_dict()))
+            self.assertEqual(source.rejected, 1)
+            self.assertEqual(saved["jobs_data"], jobs[:5])
+            self.assertEqual(PlayerState.from_dict(saved).jobs_data, jobs[:5])
+            # el feed sigue entregando en orden después de guardar
+            self.assertEqual([r["id"] for r in feed.pull(20.0)], ["J1", "J2"])
+        print("✅ Guardado con carga en streaming: OK")
+
+
+class TestJobArchive(unittest.TestCase):
+    """Archivo frío de jobs terminados"""
+
+    def test_01_finished_jobs_leave_hot_set(self):
+        """Tras ARCHIVE_DELAY los terminados salen de _jobs y quedan en el archivo"""
+        print("\n🔸 Test 01: Archivo de terminados")
+        jm = JobManager()
+        jm.add_jobs_bulk([make_job("A", payout=100), make_job("B"), make_job("C"),
+                          make_job("D", deadline_timestamp=50.0)])
+        jm.accept_job("A")
+        jm.mark_picked_up("A")
+        jm.poll_deadlines(5.0)
+        jm.mark_completed("A")
+        jm.mark_rejected("B")
+
+        jm.poll_deadlines(10.0)
+        self.assertIsNotNone(jm.get_job("A"))  # aún dentro de la espera
+        # un rechazo deshecho antes de archivarse vuelve a estar abierto
+        jm.get_job("B").rejected = False
+        self.assertEqual(jm.get_state("B"), "pending")
+
+        jm.poll_deadlines(60.0)  # D vence y A se archiva
+        self.assertIsNone(jm.get_job("A"))
+        self.assertEqual(sorted(j.id for j in jm.all_jobs()), ["B", "C", "D"])
+        rec = jm.archive.get("A")
+        self.assertEqual((rec.outcome, rec.payout, rec.finished_at), ("completed", 100.0, 5.0))
+        self.assertEqual(jm.count_in_state("completed"), 1)
+        self.assertEqual(jm.completed_payout(), 100.0)
+        self.assertEqual(jm.jobs_in_state("completed"), [])
+
+        jm.poll_deadlines(100.0)
+        self.assertEqual(jm.archive.get("D").outcome, "expired")
+        self.assertEqual(jm.count_in_state("expired", "completed"), 2)
+        self.assertNotIn("D", jm._keys)
+        print("✅ Archivo de terminados: OK")
+
+    def test_02_archive_round_trip(self):
+        """El archivo se serializa y se restaura con sus totales"""
+        print("\n🔸 Test 02: Archivo guardado")
+        jm = JobManager()
+        jm.add_job_from_raw(make_job("A", payout=40))
+        jm.accept_job("A")
+        jm.mark_completed("A")
+        self.assertEqual(jm.archive_finished(), 1)
+
+        other = JobManager()
+        self.assertEqual(other.archive.extend(jm.archive.to_list() + [{"id": "X"}]), 1)
+        self.assertIn("A", other.archive)
+        self.assertEqual(other.archive.total_payout(), 40.0)
+
+        snap = other.archive.snapshot()
+        other.archive.extend([dict(jm.archive.to_list()[0], id="B")])
+        self.assertEqual((len(snap), len(other.archive)), (1, 2))
+        self.assertNotIn("B", snap)
+        print("✅ Archivo guardado: OK")
+
+
+class _WalledMap:
+    """Mapa 5x5 con una pared en x=2 (salvo y=4)."""
+    width = height = 5
+
+    def is_walkable(self, x, y):
+        return x != 2 or y == 4
+
+
+class _Inv:
+    max_weight = 10.0
+    current_weight = 2.0
+
+
+class TestOfferRanking(unittest.TestCase):
+    """Ranking de ofertas por ganancia/segundo"""
+
+    def setUp(self):
+        self.jm = JobManager()
+        self.jm.add_jobs_bulk([
+            make_job("NEAR", pickup=[1, 0], dropoff=[1, 2]),
+            make_job("FAR", pickup=[3, 0], dropoff=[4, 0], payout=150),
+            make_job("HEAVY", pickup=[1, 0], dropoff=[1, 1], weight=20),
+            make_job("LATE", pickup=[1, 0], dropoff=[1, 1], deadline_timestamp=0.1),
+            make_job("WALLED", pickup=[2, 0], dropoff=[1, 1]),
+        ])
+        self.ranker = OfferRanker(_WalledMap(), cells_per_sec=9.0)
+
+    def test_01_rank_by_profit_rate(self):
+        """Gana el mejor payout/segundo; los inviables quedan fuera"""
+        print("\n🔸 Test 01: Ranking por ganancia/segundo")
+        ranked = self.ranker.rank(self.jm.all_jobs(), (0, 0), 0.0, inventory=_Inv())
+        self.assertEqual([job.id for _, job in ranked], ["NEAR", "FAR"])
+        # FAR rodea la pared: 11 celdas hasta el pickup + 1 de entrega
+        speed = 9.0 * max(0.8, 1.0 - 0.03 * 3.0)
+        self.assertAlmostEqual(ranked[1][0], 150 / (12 / speed))
+        # con lluvia todo es más lento y el puntaje baja
+        wet = self.ranker.rank(self.jm.all_jobs(), (0, 0), 0.0, inventory=_Inv(), weather_multiplier=0.5)
+        self.assertAlmostEqual(wet[1][0], ranked[1][0] * 0.5)
+        print("✅ Ranking por ganancia/segundo: OK")
+
+    def test_02_cached_per_cell_and_budget(self):
+        """Los ETA se reutilizan por celda y el presupuesto difiere lo nuevo"""
+        print("\n🔸 Test 02: Caché por celda y presupuesto")
+        jobs = self.jm.all_jobs()
+        first = self.ranker.rank(jobs, (0, 0), 0.0, inventory=_Inv())
+        self.assertIs(self.ranker.rank(jobs, (0, 0), 0.0, inventory=_Inv())[0][1], first[0][1])
+        self.assertEqual(len(self.ranker._fields), 1)
+
+        self.jm.add_job_from_raw(make_job("NEW", pickup=[0, 1], dropoff=[0, 2]))
+        ranked = self.ranker.rank(self.jm.all_jobs(), (0, 1), 0.0, inventory=_Inv(), budget_ms=0.0)
+        self.assertEqual(self.ranker.deferred, 1)
+        self.assertEqual([job.id for _, job in ranked], ["NEAR", "FAR"])  # ETA previos
+        ranked = self.ranker.rank(self.jm.all_jobs(), (0, 1), 0.0, inventory=_Inv())
+        self.assertEqual(ranked[0][1].id, "NEW")
+        self.assertEqual(self.ranker.deferred, 0)
+        print("✅ Caché por celda y presupuesto: OK")
+
+    def test_03_rank_raw_offers_without_registering(self):
+        """Las ofertas crudas de la cola se rankean con jobs de vista previa"""
+        print("\n🔸 Test 03: Ranking de ofertas crudas")
+        queue = [
+            make_job("Q_FAR", pickup=[3, 0], dropoff=[4, 0]),
+            make_job("Q_NEAR", pickup=[1, 0], dropoff=[1, 2]),
+            make_job("Q_LATE", pickup=[1, 0], dropoff=[1, 1], deadline_timestamp=0.1),
+        ]
+        before = len(self.jm.all_jobs())
+        previews = [self.jm.preview_job(raw) for raw in queue]
+        self.assertIsNone(self.jm.preview_job({"id": "BAD", "pickup": "x"}))
+        self.assertEqual(len(self.jm.all_jobs()), before)
+        self.assertTrue(all(job._manager is None for job in previews))
+        self.assertIs(previews[1].raw, queue[1])
+
+        best = self.ranker.best(previews, (0, 0), 0.0, inventory=_Inv())
+        self.assertIs(queue[previews.index(best)], queue[1])
+        print("✅ Ranking de ofertas crudas: OK")
+
+
+class TestBundleOptimizer(unittest.TestCase):
+    """Lotes de ofertas bajo capacidad y deadlines"""
+
+    def setUp(self):
+        self.jm = JobManager()
+        self.jm.add_jobs_bulk([
+            make_job("HELD", pickup=[0, 0], dropoff=[0, 3], weight=1.0),
+            make_job("A", pickup=[1, 0], dropoff=[2, 0], weight=6, payout=100),
+            make_job("B", pickup=[0, 1], dropoff=[0, 2], weight=4.0, payout=70),
+            make_job("C", pickup=[1, 1], dropoff=[2, 1], weight=4.0, payout=70),
+            make_job("F", pickup=[30, 30], dropoff=[31, 31], weight=1, payout=5),
+            make_job("LATE", pickup=[5, 5], dropoff=[6, 6], weight=0.5, payout=50, deadline_timestamp=0.1),
+            make_job("HUGE", weight=11, payout=500),
+        ])
+        self.jm.accept_job("HELD")
+        self.jm.mark_picked_up("HELD")
+        self.inv = Inventory(max_weight=10.0)
+        self.inv.add(self.jm.get_job("HELD"))
+        self.offers = [j for j in self.jm.all_jobs() if j.id != "HELD"]
+
+    def test_01_best_payout_bundle(self):
+        """La mochila elige B+C+F y la ruta incluye lo que ya se lleva"""
+        print("\n🔸 Test 01: Lote por pago")
+        plan = BundleOptimizer().recommend(self.offers, (0, 0), 0.0, inventory=self.inv, budget_ms=1000)
+        self.assertTrue(plan.complete)
+        self.assertEqual(sorted(j.id for j in plan.jobs), ["B", "C", "F"])
+        self.assertEqual(plan.payout, 145.0)
+        stops = [(kind, job.id) for kind, job, _ in plan.route]
+        self.assertIn((DROPOFF, "HELD"), stops)
+        for jid in ("B", "C", "F"):
+            self.assertLess(stops.index((PICKUP, jid)), stops.index((DROPOFF, jid)))
+        print("✅ Lote por pago: OK")
+
+    def test_02_rate_objective_and_budget(self):
+        """Por pago/segundo se descartan desvíos; sin presupuesto queda codicioso"""
+        print("\n🔸 Test 02: Lote por pago/segundo")
+        optimizer = BundleOptimizer()
+        plan = optimizer.recommend(self.offers, (0, 0), 0.0, inventory=self.inv,
+                                   objective="rate", budget_ms=1000)
+        # B queda de camino al dropoff de HELD: es el lote con mejor pago por celda
+        self.assertEqual([j.id for j in plan.jobs], ["B"])
+        rushed = optimizer.recommend(self.offers, (0, 0), 0.0, inventory=self.inv, budget_ms=0)
+        self.assertFalse(rushed.complete)
+        self.assertTrue(rushed.jobs)  # inserción codiciosa, no un lote vacío
+        self.assertLessEqual(sum(j.weight for j in rushed.jobs), 10.0)
+        print("✅ Lote por pago/segundo: OK")
+
+    def test_03_fields_shared_with_ranker(self):
+        """Los BFS quedan en el caché del OfferRanker y sirven a la llamada siguiente"""
+        print("\n🔸 Test 03: BFS compartidos entre llamadas")
+        game_map = _WalledMap()
+        ranker = OfferRanker(game_map)
+        optimizer = BundleOptimizer(game_map, ranker=ranker)
+        jm = JobManager()
+        jm.add_jobs_bulk([
+            make_job("NEAR", pickup=[1, 0], dropoff=[1, 2], payout=80),
+            make_job("FAR", pickup=[3, 0], dropoff=[4, 0], payout=150),
+        ])
+        offers = jm.all_jobs()
+
+        # sin tiempo ni caché no se lanza ningún BFS: todo queda para después
+        cold = optimizer.recommend(offers, (0, 0), 0.0, max_weight=10.0, budget_ms=0)
+        self.assertEqual(cold.jobs, [])
+        self.assertFalse(cold.complete)
+
+        full = optimizer.recommend(offers, (0, 0), 0.0, max_weight=10.0, budget_ms=1000)
+        self.assertTrue(full.complete)
+        self.assertIn((3, 0), ranker._fields)
+        # con los BFS en caché el filtro ya no gasta presupuesto y la ruta sale codiciosa
+        warm = optimizer.recommend(offers, (0, 1), 0.0, max_weight=10.0, budget_ms=0)
+        self.assertEqual(sorted(j.id for j in warm.jobs), ["FAR", "NEAR"])
+        # FAR rodea la pared por y=4
+        self.assertEqual(optimizer._distances()((1, 0), (3, 0)), 10)
+        print("✅ BFS compartidos entre llamadas: OK")
+
+
+if __name__ == "__main__":
+    unittest.main()
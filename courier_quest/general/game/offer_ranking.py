@@ -0,0 +1,167 @@
+# game/offer_ranking.py
+"""
+OfferRanker: ordena ofertas de trabajo por ganancia esperada por segundo.
+
+    eta   = (d(jugador→pickup) + d(pickup→dropoff)) / velocidad
+    score = payout * margen_de_deadline / eta
+
+La velocidad sigue la fórmula del jugador (v0 * Mclima * Mpeso) con el peso
+que llevaría tras recoger el pedido. Se descartan los pedidos que no caben en
+el inventario, los inalcanzables y los que no llegarían antes del deadline.
+
+Distancias: un BFS desde la celda del jugador (cacheado por celda) resuelve
+jugador→pickup para todas las ofertas a la vez; pickup→dropoff no depende del
+jugador y se cachea por par de celdas. El ETA de cada job se guarda con su
+contexto (celda, peso cargado, clima) y rank() solo recalcula los invalidados,
+dentro de un presupuesto de milisegundos por frame.
+"""
+
+from __future__ import annotations
+import time
+from collections import OrderedDict, deque
+from typing import Any, Dict, List, Optional, Tuple
+
+from .pathfinding import a_star, manhattan, neighbors
+
+Cell = Tuple[int, int]
+
+
+def bfs_distances(game_map, start: Cell) -> Dict[Cell, int]:
+    """Pasos mínimos desde `start` a cada celda transitable alcanzable."""
+    dist = {start: 0}
+    queue = deque([start])
+    width, height = game_map.width, game_map.height
+    walkable = game_map.is_walkable
+    while queue:
+        cell = queue.popleft()
+        d = dist[cell] + 1
+        for nb in neighbors(cell):
+            if nb in dist:
+                continue
+            nx, ny = nb
+            if 0 <= nx < width and 0 <= ny < height and walkable(nx, ny):
+                dist[nb] = d
+                queue.append(nb)
+    return dist
+
+
+class OfferRanker:
+    FIELD_CACHE_SIZE = 64      # celdas con BFS guardado (jugador y paradas de BundleOptimizer)
+    MIN_ETA = 0.25             # evita premiar de más pedidos a 0 celdas
+    SLACK_MARGIN = 0.5         # holgura (fracción del eta) para puntaje completo
+
+    def __init__(self, game_map=None, cells_per_sec: float = 9.0):
+        self.game_map = game_map
+        self.cells_per_sec = float(cells_per_sec)
+        self._fields: "OrderedDict[Cell, Dict[Cell, int]]" = OrderedDict()
+        self._legs: Dict[Tuple[Cell, Cell], Optional[int]] = {}
+        self._eta: Dict[str, Tuple[Tuple, Optional[float]]] = {}  # job_id -> (contexto, eta)
+        self.deferred = 0  # jobs sin evaluar en el último rank() por presupuesto
+
+    def set_game_map(self, game_map):
+        self.game_map = game_map
+        self.invalidate()
+
+    def invalidate(self):
+        """Descarta distancias y ETAs (p. ej. si cambió el mapa)."""
+        self._fields.clear()
+        self._legs.clear()
+        self._eta.clear()
+
+    def forget(self, job_id: str):
+        self._eta.pop(job_id, None)
+
+    # ---------------- distancias ----------------
+    def _field(self, cell: Cell) -> Optional[Dict[Cell, int]]:
+        if self.game_map is None:
+            return None
+        field = self._fields.get(cell)
+        if field is None:
+            field = bfs_distances(self.game_map, cell)
+            self._fields[cell] = field
+            if len(self._fields) > self.FIELD_CACHE_SIZE:
+                self._fields.popitem(last=False)
+        else:
+            self._fields.move_to_end(cell)
+        return field
+
+    def _leg(self, a: Cell, b: Cell) -> Optional[int]:
+        key = (a, b)
+        if key not in self._legs:
+            if self.game_map is None:
+                self._legs[key] = manhattan(a, b)
+            else:
+                path = a_star(self.game_map, a, b)
+                self._legs[key] = None if path is None else len(path) - 1
+        return self._legs[key]
+
+    # ---------------- puntaje ----------------
+    def _compute_eta(self, job, field, cell: Cell, carried: float, weather: float) -> Optional[float]:
+        to_pickup = manhattan(cell, job.pickup) if field is None else field.get(job.pickup)
+        leg = self._leg(job.pickup, job.dropoff)
+        if to_pickup is None or leg is None:
+            return None
+        weight_mul = max(0.8, 1.0 - 0.03 * (carried + float(job.weight)))
+        speed = self.cells_per_sec * weather * weight_mul
+        if speed <= 0:
+            return None
+        return (to_pickup + leg) / speed
+
+    def score(self, job, eta: Optional[float], now: float) -> Optional[float]:
+        """Ganancia esperada por segundo; None si el job no es viable."""
+        if eta is None:
+            return None
+        slack = job.time_remaining(now) - eta
+        if slack < 0:
+            return None
+        eta = max(eta, self.MIN_ETA)
+        margin = min(1.0, slack / (eta * self.SLACK_MARGIN))
+        return float(job.payout) * margin / eta
+
+    def rank(self, jobs, player_cell: Cell, now: float, inventory: Any = None,
+             weather_multiplier: float = 1.0, budget_ms: Optional[float] = None) -> List[Tuple[float, Any]]:
+        """Devuelve [(score, job)] de mayor a menor, solo con los viables.
+
+        Con budget_ms, los ETA vencidos que no alcancen a recalcularse usan su
+        valor anterior y los jobs nunca evaluados quedan para el próximo frame.
+        """
+        start = time.perf_counter()
+        deadline = None if budget_ms is None else start + budget_ms / 1000.0
+        cell = (int(player_cell[0]), int(player_cell[1]))
+        carried = float(getattr(inventory, "current_weight", 0.0)) if inventory is not None else 0.0
+        headroom = (float(inventory.max_weight) - carried) if inventory is not None else float("inf")
+        weather = float(weather_multiplier)
+        context = (cell, round(carried, 3), round(weather, 3))
+
+        field = None
+        ranked: List[Tuple[float, Any]] = []
+        self.deferred = 0
+        for job in jobs:
+            if float(job.weight) > headroom:
+                continue
+            cached = self._eta.get(job.id)
+            if cached is not None and cached[0] == context:
+                eta = cached[1]
+            elif deadline is not None and time.perf_counter() > deadline:
+                if cached is None:
+                    self.deferred += 1
+                    continue
+                eta = cached[1]  # valor anterior mientras no haya tiempo
+            else:
+                if field is None:
+                    field = self._field(cell)
+                eta = self._compute_eta(job, field, cell, carried, weather)
+                self._eta[job.id] = (context, eta)
+            s = self.score(job, eta, now)
+            if s is not None:
+                ranked.append((s, job))
+        if len(self._eta) > 4 * len(ranked) + 256:
+            # podar ETAs de jobs que ya no se ofrecen
+            live = {job.id for job in jobs}
+            self._eta = {jid: v for jid, v in self._eta.items() if jid in live}
+        ranked.sort(key=lambda item: item[0], reverse=True)
+        return ranked
+
+    def best(self, jobs, player_cell: Cell, now: float, **kwargs) -> Optional[Any]:
+        ranked = self.rank(jobs, player_cell, now, **kwargs)
+        return ranked[0][1] if ranked else None
@@ -0,0 +1,384 @@
+# game/persistent.py
+"""
+Estructuras persistentes (inmutables) con estructura compartida.
+
+- PVector: vector persistente (trie de 32 ramas + cola, como el de Clojure).
+  append/set/pop devuelven un vector nuevo en O(log32 n) copiando solo el
+  camino modificado; el resto de los nodos se comparte con la versión anterior.
+- PMap: mapa persistente sobre un HAMT (hash array mapped trie) con nodos
+  bitmap de 32 ramas y nodos de colisión.
+
+Tomar un snapshot es guardar la referencia: copy.copy y copy.deepcopy devuelven
+el mismo objeto, así que los snapshots de undo y del guardado comparten todo lo
+que no cambió. Los elementos se tratan como inmutables (no modificarlos en el
+lugar).
+"""
+
+from __future__ import annotations
+from collections.abc import Mapping, Sequence
+from typing import Any, Iterable, Iterator, Optional, Tuple
+
+_BITS = 5
+_WIDTH = 1 << _BITS
+_MASK = _WIDTH - 1
+_HASH_MASK = (1 << 64) - 1
+
+
+# ---------------- PVector ----------------
+class PVector(Sequence):
+    __slots__ = ("_count", "_shift", "_root", "_tail")
+
+    def __init__(self, items: Iterable[Any] = ()):
+        self._count, self._shift, self._root, self._tail = 0, _BITS, (), ()
+        vec = self
+        for item in items:
+            vec = vec.append(item)
+        self._count, self._shift, self._root, self._tail = vec._count, vec._shift, vec._root, vec._tail
+
+    @classmethod
+    def _make(cls, count: int, shift: int, root: Tuple, tail: Tuple) -> "PVector":
+        vec = cls.__new__(cls)
+        vec._count, vec._shift, vec._root, vec._tail = count, shift, root, tail
+        return vec
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _tail_offset(self) -> int:
+        return 0 if self._count < _WIDTH else ((self._count - 1) >> _BITS) << _BITS
+
+    def _leaf(self, i: int) -> Tuple:
+        if i >= self._tail_offset():
+            return self._tail
+        node = self._root
+        for level in range(self._shift, 0, -_BITS):
+            node = node[(i >> level) & _MASK]
+        return node
+
+    def _index(self, i: int) -> int:
+        if i < 0:
+            i += self._count
+        if not 0 <= i < self._count:
+            raise IndexError("PVector index out of range")
+        return i
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return PVector(self[j] for j in range(*i.indices(self._count)))
+        i = self._index(i)
+        return self._leaf(i)[i & _MASK]
+
+    def __iter__(self) -> Iterator[Any]:
+        for base in range(0, self._tail_offset(), _WIDTH):
+            yield from self._leaf(base)
+        yield from self._tail
+
+    def append(self, value: Any) -> "PVector":
+        count, shift, root = self._count, self._shift, self._root
+        if count - self._tail_offset() < _WIDTH:
+            return self._make(count + 1, shift, root, self._tail + (value,))
+        # cola llena: pasa al árbol y se empieza una nueva
+        if (count >> _BITS) > (1 << shift):
+            root = (root, self._new_path(shift, self._tail))
+            shift += _BITS
+        else:
+            root = self._push_tail(shift, root, self._tail)
+        return self._make(count + 1, shift, root, (value,))
+
+    def extend(self, values: Iterable[Any]) -> "PVector":
+        vec = self
+        for value in values:
+            vec = vec.append(value)
+        return vec
+
+    @classmethod
+    def _new_path(cls, level: int, node: Tuple) -> Tuple:
+        return node if level == 0 else (cls._new_path(level - _BITS, node),)
+
+    def _push_tail(self, level: int, parent: Tuple, tail: Tuple) -> Tuple:
+        sub = ((self._count - 1) >> level) & _MASK
+        if level == _BITS:
+            child = tail
+        elif sub < len(parent):
+            child = self._push_tail(level - _BITS, parent[sub], tail)
+        else:
+            child = self._new_path(level - _BITS, tail)
+        return parent[:sub] + (child,) + parent[sub + 1:]
+
+    def set(self, i: int, value: Any) -> "PVector":
+        i = self._index(i)
+        if i >= self._tail_offset():
+            tail = self._tail
+            j = i & _MASK
+            return self._make(self._count, self._shift, self._root, tail[:j] + (value,) + tail[j + 1:])
+        return self._make(self._count, self._shift, self._assoc(self._shift, self._root, i, value), self._tail)
+
+    @classmethod
+    def _assoc(cls, level: int, node: Tuple, i: int, value: Any) -> Tuple:
+        sub = (i >> level) & _MASK
+        child = value if level == 0 else cls._assoc(level - _BITS, node[sub], i, value)
+        return node[:sub] + (child,) + node[sub + 1:]
+
+    def pop(self) -> "PVector":
+        """Vector sin el último elemento."""
+        count = self._count
+        if count == 0:
+            raise IndexError("pop from empty PVector")
+        if count == 1:
+            return PVector()
+        if count - self._tail_offset() > 1:
+            return self._make(count - 1, self._shift, self._root, self._tail[:-1])
+        tail = self._leaf(count - 2)
+        shift = self._shift
+        root = self._pop_tail(shift, self._root) or ()
+        if shift > _BITS and len(root) == 1:
+            root, shift = root[0], shift - _BITS
+        return self._make(count - 1, shift, root, tail)
+
+    def _pop_tail(self, level: int, node: Tuple) -> Optional[Tuple]:
+        sub = ((self._count - 2) >> level) & _MASK
+        if level > _BITS:
+            child = self._pop_tail(level - _BITS, node[sub])
+            if child is None:
+                return node[:sub] or None
+            return node[:sub] + (child,)
+        return node[:sub] or None
+
+    def truncate(self, length: int) -> "PVector":
+        """Primeros `length` elementos."""
+        vec = self
+        while len(vec) > max(0, length):
+            vec = vec.pop()
+        return vec
+
+    def to_list(self) -> list:
+        return list(self)
+
+    def __eq__(self, other):
+        if isinstance(other, (PVector, list, tuple)):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    __hash__ = None
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __reduce__(self):
+        return (PVector, (list(self),))
+
+    def __repr__(self) -> str:
+        return f"PVector({list(self)!r})"
+
+
+# ---------------- PMap (HAMT) ----------------
+def _hash(key: Any) -> int:
+    return hash(key) & _HASH_MASK
+
+
+def _bit(h: int, shift: int) -> int:
+    return 1 << ((h >> shift) & _MASK)
+
+
+class _Bitmap:
+    """Nodo con hasta 32 ramas; cada rama es una entrada (h, k, v) o un subnodo."""
+    __slots__ = ("bitmap", "array")
+
+    def __init__(self, bitmap: int, array: Tuple):
+        self.bitmap = bitmap
+        self.array = array
+
+
+class _Collision:
+    """Entradas distintas con el mismo hash completo."""
+    __slots__ = ("hash", "entries")
+
+    def __init__(self, h: int, entries: Tuple):
+        self.hash = h
+        self.entries = entries
+
+
+_EMPTY = _Bitmap(0, ())
+_MISSING = object()
+
+
+def _merge(shift: int, a: Tuple, b: Tuple) -> Any:
+    if a[0] == b[0]:
+        return _Collision(a[0], (a, b))
+    ba, bb = _bit(a[0], shift), _bit(b[0], shift)
+    if ba == bb:
+        return _Bitmap(ba, (_merge(shift + _BITS, a, b),))
+    return _Bitmap(ba | bb, (a, b) if ba < bb else (b, a))
+
+
+def _lookup(node: Any, h: int, shift: int, key: Any, default: Any) -> Any:
+    while True:
+        if isinstance(node, _Collision):
+            for eh, ek, ev in node.entries:
+                if ek == key:
+                    return ev
+            return default
+        bit = _bit(h, shift)
+        if not node.bitmap & bit:
+            return default
+        child = node.array[bin(node.bitmap & (bit - 1)).count("1")]
+        if isinstance(child, tuple):
+            return child[2] if child[0] == h and child[1] == key else default
+        node, shift = child, shift + _BITS
+
+
+def _assoc(node: Any, shift: int, entry: Tuple) -> Tuple[Any, bool]:
+    """(nodo nuevo, si se agregó una clave)."""
+    h, key, value = entry
+    if isinstance(node, _Collision):
+        if node.hash != h:
+            wrapped = _Bitmap(_bit(node.hash, shift), (node,))
+            return _assoc(wrapped, shift, entry)
+        for i, (eh, ek, ev) in enumerate(node.entries):
+            if ek == key:
+                if ev is value:
+                    return node, False
+                return _Collision(h, node.entries[:i] + (entry,) + node.entries[i + 1:]), False
+        return _Collision(h, node.entries + (entry,)), True
+    bit = _bit(h, shift)
+    idx = bin(node.bitmap & (bit - 1)).count("1")
+    array = node.array
+    if not node.bitmap & bit:
+        return _Bitmap(node.bitmap | bit, array[:idx] + (entry,) + array[idx:]), True
+    child = array[idx]
+    if isinstance(child, tuple):
+        if child[0] == h and child[1] == key:
+            if child[2] is value:
+                return node, False
+            new_child, added = entry, False
+        else:
+            new_child, added = _merge(shift + _BITS, child, entry), True
+    else:
+        new_child, added = _assoc(child, shift + _BITS, entry)
+        if new_child is child:
+            return node, False
+    return _Bitmap(node.bitmap, array[:idx] + (new_child,) + array[idx + 1:]), added
+
+
+def _dissoc(node: Any, h: int, shift: int, key: Any) -> Any:
+    """Nodo sin `key` (el mismo si no estaba, None si quedó vacío)."""
+    if isinstance(node, _Collision):
+        entries = tuple(e for e in node.entries if e[1] != key)
+        if len(entries) == len(node.entries):
+            return node
+        if len(entries) == 1:
+            return _Bitmap(_bit(h, shift), entries)
+        return _Collision(h, entries)
+    bit = _bit(h, shift)
+    if not node.bitmap & bit:
+        return node
+    idx = bin(node.bitmap & (bit - 1)).count("1")
+    array = node.array
+    child = array[idx]
+    if isinstance(child, tuple):
+        if not (child[0] == h and child[1] == key):
+            return node
+        new_child = None
+    else:
+        new_child = _dissoc(child, h, shift + _BITS, key)
+        if new_child is child:
+            return node
+        if isinstance(new_child, _Bitmap) and len(new_child.array) == 1 and isinstance(new_child.array[0], tuple):
+            new_child = new_child.array[0]  # subir la entrada que quedó sola
+    if new_child is None:
+        if node.bitmap == bit:
+            return None
+        return _Bitmap(node.bitmap & ~bit, array[:idx] + array[idx + 1:])
+    return _Bitmap(node.bitmap, array[:idx] + (new_child,) + array[idx + 1:])
+
+
+def _entries(node: Any) -> Iterator[Tuple]:
+    if isinstance(node, _Collision):
+        yield from node.entries
+        return
+    for child in node.array:
+        if isinstance(child, tuple):
+            yield child
+        else:
+            yield from _entries(child)
+
+
+class PMap(Mapping):
+    __slots__ = ("_root", "_count")
+
+    def __init__(self, items: Any = None, **kwargs):
+        self._root, self._count = _EMPTY, 0
+        if items or kwargs:
+            m = self.update(items or {}, **kwargs)
+            self._root, self._count = m._root, m._count
+
+    @classmethod
+    def _make(cls, root: Any, count: int) -> "PMap":
+        m = cls.__new__(cls)
+        m._root, m._count = root, count
+        return m
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, key):
+        value = _lookup(self._root, _hash(key), 0, key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def get(self, key, default=None):
+        return _lookup(self._root, _hash(key), 0, key, default)
+
+    def __contains__(self, key) -> bool:
+        return _lookup(self._root, _hash(key), 0, key, _MISSING) is not _MISSING
+
+    def __iter__(self) -> Iterator[Any]:
+        return (e[1] for e in _entries(self._root))
+
+    def items(self):
+        return [(e[1], e[2]) for e in _entries(self._root)]
+
+    def set(self, key, value) -> "PMap":
+        root, added = _assoc(self._root, 0, (_hash(key), key, value))
+        if root is self._root:
+            return self
+        return self._make(root, self._count + added)
+
+    def delete(self, key) -> "PMap":
+        if key not in self:
+            raise KeyError(key)
+        return self.discard(key)
+
+    def discard(self, key) -> "PMap":
+        """Mapa sin `key` (el mismo si no estaba)."""
+        root = _dissoc(self._root, _hash(key), 0, key)
+        if root is self._root:
+            return self
+        return self._make(_EMPTY if root is None else root, self._count - 1)
+
+    def update(self, items: Any = (), **kwargs) -> "PMap":
+        m = self
+        pairs = items.items() if isinstance(items, Mapping) else items
+        for key, value in pairs:
+            m = m.set(key, value)
+        for key, value in kwargs.items():
+            m = m.set(key, value)
+        return m
+
+    __hash__ = None
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __reduce__(self):
+        return (PMap, (dict(self.items()),))
+
+    def __repr__(self) -> str:
+        return f"PMap({dict(self.items())!r})"
@@ -4,6 +4,8 @@ from typing import Tuple, Optional, Any
 
 import arcade
 
+from .weather_markov import WeatherMarkov
+
 # Velocidad base en celdas/segundo (ajustable)
 CELLS_PER_SEC = 9.0
 
@@ -114,20 +116,17 @@ class Player:
 
     def _get_climate_penalty_value(self, weather_cond: str) -> float:
         """Valor numérico de penalización por clima usado al consumir stamina por celda."""
-        if weather_cond in ["rain", "wind"]:
-            return 0.1
-        if weather_cond == "storm":
-            return 0.3
-        if weather_cond == "heat":
-            return 0.2
-        return 0.0
+        return WeatherMarkov.stamina_penalty(weather_cond)
 
     # player_manager.py - PARCHE PARA FÓRMULA DE VELOCIDAD
 
-    def update(self, dt: float, player_stats: Any = None, weather_system: Any = None, inventory: Any = None) -> None:
+    def update(self, dt: float, player_stats: Any = None, weather_system: Any = None, inventory: Any = None,
+               weather_grid: Any = None, weather_snapshot: Any = None) -> None:
         """
         Actualiza la posición (moviéndose hacia target). Al llegar al centro de la celda
         consume stamina POR CELDA completada llamando a player_stats.consume_stamina(...).
+        Si se pasa weather_grid (clima regional), el clima se toma del distrito de la celda actual;
+        si no, weather_snapshot (snapshot del tick) tiene prioridad sobre weather_system.
 
         FÓRMULA CORREGIDA SEGÚN PDF:
         v = v0 * Mclima * Mpeso * Mrep * Mresistencia * surface_weight(tile)
@@ -159,7 +158,11 @@ class Player:
         # 1. Mclima - multiplicador climático
         climate_mul = 1.0
         try:
-            if weather_system is not None:
+            if weather_grid is not None:
+                climate_mul = float(weather_grid.multiplier_at(self.cell_x, self.cell_y))
+            elif weather_snapshot is not None:
+                climate_mul = float(weather_snapshot.multiplier)
+            elif weather_system is not None:
                 if hasattr(weather_system, "current_multiplier"):
                     climate_mul = float(weather_system.current_multiplier)
                 elif hasattr(weather_system, "get_state"):
@@ -225,7 +228,11 @@ class Player:
                     current_weather = "clear"
                     intensity = 1.0
                     try:
-                        if weather_system is not None and hasattr(weather_system, "current_condition"):
+                        if weather_grid is not None:
+                            current_weather = weather_grid.condition_at(self.cell_x, self.cell_y)
+                        elif weather_snapshot is not None:
+                            current_weather = weather_snapshot.condition
+                        elif weather_system is not None and hasattr(weather_system, "current_condition"):
                             current_weather = weather_system.current_condition
                         elif weather_system is not None and hasattr(weather_system, "get_state"):
                             state = weather_system.get_state()
@@ -139,11 +139,22 @@ class PlayerState:
     # =======================
     # Serialización (guardar/cargar)
     # =======================
+    def _saved_jobs(self) -> list:
+        """jobs_data como lista: una fuente en streaming re-iterable (JobsFile) se vuelve
+        a leer del disco; un iterador de un solo uso ya lo consume el JobFeed y no se guarda."""
+        jobs = self.jobs_data
+        if isinstance(jobs, (list, tuple)):
+            return list(jobs)
+        if iter(jobs) is jobs:
+            print("⚠️  jobs_data es un iterador de un solo uso: el guardado no incluye pedidos")
+            return []
+        return list(jobs)
+
     def to_dict(self):
         """Convierte el estado completo en un diccionario serializable."""
         return {
             "map_data": self.map_data,
-            "jobs_data": self.jobs_data,
+            "jobs_data": self._saved_jobs(),
             "weather_data": self.weather_data,
             "money": self.money,
             "stamina": self.stamina,
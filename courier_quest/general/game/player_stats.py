@@ -1,6 +1,9 @@
 # game/player_stats.py
 import time
-from typing import Dict, Any
+from typing import Dict, Any, Optional
+
+from .game_clock import Clock, RealTimeClock
+from .persistent import PVector
 
 
 class PlayerStats:
@@ -21,7 +24,10 @@ class PlayerStats:
         "defeat": 20
     }
 
-    def __init__(self):
+    def __init__(self, clock: Optional[Clock] = None):
+        # reloj para marcas de tiempo (last_rest_time); GameManager inyecta su reloj simulado
+        self.clock: Clock = clock if clock is not None else RealTimeClock()
+
         self.stamina: float = 100.0
 
         # Cuando la stamina llega a 0, activamos un bloqueo que impide
@@ -38,14 +44,14 @@ class PlayerStats:
         # flags y estado
         self.is_resting = False
         self.is_at_rest_point = False
-        self.last_rest_time = time.time()
+        self.last_rest_time = self.clock.now()
 
         # reputación
         self.reputation: int = 70
         self.consecutive_on_time_deliveries = 0
         self.first_late_delivery_of_day = True
-        # historial de reputación para auditoría
-        self.reputation_history = []
+        # historial de reputación para auditoría (persistente: se comparte entre snapshots)
+        self.reputation_history = PVector()
 
     def update(self,
                delta_time: float,
@@ -78,7 +84,7 @@ class PlayerStats:
                 self._idle_recover_accum -= ticks * self.RECOVER_TICK_SEC
                 self.stamina = min(100.0, self.stamina + ticks * self.RECOVER_PER_TICK)
             self.is_resting = True
-            self.last_rest_time = time.time()
+            self.last_rest_time = self.clock.now()
         else:
             # actividad de entrada evita recuperación y resetea acumulador
             self._idle_recover_accum = 0.0
@@ -92,6 +98,17 @@ class PlayerStats:
         except Exception:
             pass
 
+    def set_clock(self, clock: Clock):
+        """Cambia el reloj; last_rest_time se re-expresa en la base del nuevo reloj."""
+        if clock is None or clock is self.clock:
+            return
+        try:
+            idle_for = max(0.0, self.clock.now() - float(self.last_rest_time))
+        except (TypeError, ValueError):
+            idle_for = 0.0
+        self.clock = clock
+        self.last_rest_time = clock.now() - idle_for
+
     def get_stamina_state(self) -> str:
         """
         Retorna:
@@ -192,7 +209,7 @@ class PlayerStats:
         self.reputation = max(0, min(100, self.reputation))
         try:
             # registrar en historial
-            self.reputation_history.append({
+            self.reputation_history = self.reputation_history.append({
                 "timestamp": time.time(),
                 "event": event_type,
                 "change": reputation_change,
@@ -216,7 +233,4 @@ class PlayerStats:
         self.consecutive_on_time_deliveries = 0
         self.first_late_delivery_of_day = True
         self._idle_recover_accum = 0.0
-        try:
-            self.reputation_history.clear()
-        except Exception:
-            self.reputation_history = []
+        self.reputation_history = PVector()
@@ -0,0 +1,139 @@
+# game/undo_history.py
+"""
+SnapshotHistory: historial de snapshots de deshacer limitado por memoria.
+
+Los `hot_steps` snapshots más recientes se guardan tal cual; los anteriores se
+serializan con pickle y se comprimen con zlib. El límite es en bytes
+(`max_bytes`, sobre los comprimidos) además de en cantidad (`max_steps`): al
+pasarse se descartan los más antiguos.
+
+pop_n(n) salta n pasos atrás descartando los intermedios sin descomprimirlos,
+así deshacer N pasos cuesta lo mismo que deshacer uno.
+
+Los objetos registrados con share() (p. ej. el mapa) se serializan como
+referencia: los snapshots comprimidos no guardan una copia de ellos.
+"""
+
+from __future__ import annotations
+import io
+import pickle
+import zlib
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from .adts import Queue
+
+
+class SnapshotHistory:
+    COMPRESS_LEVEL = 6
+
+    def __init__(self, max_steps: int = 50, max_bytes: int = 4 * 1024 * 1024, hot_steps: int = 4):
+        self.max_steps = max(1, int(max_steps))
+        self.max_bytes = max(0, int(max_bytes))
+        self.hot_steps = max(1, int(hot_steps))
+        self._hot: Queue = Queue(capacity=self.hot_steps + 1)  # snapshots sin comprimir
+        self._cold: Queue = Queue()                            # (comprimido, payload, bytes)
+        self.cold_bytes = 0
+        self._shared: Dict[int, Any] = {}                      # id -> objeto compartido
+
+    def __len__(self) -> int:
+        return len(self._hot) + len(self._cold)
+
+    def is_empty(self) -> bool:
+        return len(self) == 0
+
+    def share(self, obj: Any):
+        """Registra un objeto que los snapshots comparten por referencia."""
+        if obj is not None:
+            self._shared[id(obj)] = obj
+
+    # ---------------- frío ----------------
+    def _dumps(self, state: Any) -> bytes:
+        buf = io.BytesIO()
+        pickler = pickle.Pickler(buf, pickle.HIGHEST_PROTOCOL)
+        shared = self._shared
+        pickler.persistent_id = lambda obj: id(obj) if id(obj) in shared else None
+        pickler.dump(state)
+        return buf.getvalue()
+
+    def _loads(self, data: bytes) -> Any:
+        unpickler = pickle.Unpickler(io.BytesIO(data))
+        unpickler.persistent_load = self._shared.__getitem__
+        return unpickler.load()
+
+    def _freeze(self, state: Any) -> Tuple[bool, Any, int]:
+        try:
+            data = zlib.compress(self._dumps(state), self.COMPRESS_LEVEL)
+            return True, data, len(data)
+        except Exception as e:
+            # no serializable: se queda como objeto (cuenta para max_steps, no para max_bytes)
+            print(f"[UNDO] Snapshot sin comprimir: {e}")
+            return False, state, 0
+
+    def _thaw(self, entry: Tuple[bool, Any, int]) -> Any:
+        compressed, payload, _ = entry
+        return self._loads(zlib.decompress(payload)) if compressed else payload
+
+    def _drop_oldest(self):
+        if self._cold:
+            self.cold_bytes -= self._cold.dequeue()[2]
+        else:
+            self._hot.dequeue()
+
+    def _enforce(self):
+        while len(self._hot) > self.hot_steps:
+            entry = self._freeze(self._hot.dequeue())
+            self._cold.enqueue(entry)
+            self.cold_bytes += entry[2]
+        while len(self) > self.max_steps:
+            self._drop_oldest()
+        while self.cold_bytes > self.max_bytes and self._cold:
+            self._drop_oldest()
+
+    # ---------------- API ----------------
+    def push(self, state: Any):
+        self._hot.enqueue(state)
+        self._enforce()
+
+    def pop(self) -> Any:
+        return self.pop_n(1)
+
+    def pop_n(self, n: int) -> Any:
+        """Descarta los n-1 más recientes y devuelve el n-ésimo (n se acota al tamaño)."""
+        n = min(max(1, int(n)), len(self))
+        if n == 0:
+            raise IndexError("pop from empty history")
+        for _ in range(n - 1):
+            if self._hot:
+                self._hot.pop()
+            else:
+                self.cold_bytes -= self._cold.pop()[2]
+        if self._hot:
+            return self._hot.pop()
+        entry = self._cold.pop()
+        self.cold_bytes -= entry[2]
+        return self._thaw(entry)
+
+    def peek(self) -> Optional[Any]:
+        if self._hot:
+            return self._hot.peek_tail()
+        return self._thaw(self._cold.peek_tail()) if self._cold else None
+
+    def resize(self, max_steps: int):
+        self.max_steps = max(1, int(max_steps))
+        self._enforce()
+
+    def set_budget(self, max_bytes: int):
+        self.max_bytes = max(0, int(max_bytes))
+        self._enforce()
+
+    def clear(self):
+        self._hot.clear()
+        self._cold.clear()
+        self.cold_bytes = 0
+        self._shared.clear()
+
+    def __iter__(self) -> Iterator[Any]:
+        """Snapshots del más antiguo al más reciente (descomprime los fríos)."""
+        for entry in self._cold:
+            yield self._thaw(entry)
+        yield from self._hot
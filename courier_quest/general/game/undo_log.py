@@ -0,0 +1,263 @@
+# game/undo_log.py
+"""
+UndoLog: deshacer por deltas en lugar de snapshots completos.
+
+Se guarda un único estado "sombra" (los escalares del último record: posición,
+dinero, stamina, reputación, tiempo y clima) y, por cada paso anterior, solo
+los valores que cambiaron junto con las operaciones que ocurrieron entre ambos
+records: operaciones de los inventarios (su journal) y atributos anotados con
+note(). Deshacer aplica los valores guardados y revierte las operaciones en
+orden inverso, así que el costo por movimiento no depende del tamaño del
+inventario ni del largo del historial del clima.
+
+Es el único motor de deshacer del juego: GameManager registra su estado en
+record() y la vista suma sus propios valores e inventario con watch() y
+watch_inventory(), así una acción produce un solo paso para ambas capas.
+Otras fuentes con journal (p. ej. JobManager, que anota lo que archiva) se
+registran con watch_journal() y se revierten en el mismo orden.
+
+El historial se limita por pasos (max_steps) y por memoria (max_bytes); al
+pasarse se descartan los pasos más antiguos. El tamaño por paso es una
+heurística: cuenta el dict de valores previos, la lista de operaciones y
+OP_BYTES por operación, pero no lo que esas operaciones mantienen vivo (jobs
+archivados, snapshots del archivo, nodos del inventario). max_bytes es por eso
+un tope aproximado; el límite duro es max_steps.
+"""
+
+from __future__ import annotations
+import sys
+from typing import Any, Dict, List, Optional, Tuple
+
+from .adts import Queue
+
+
+def _get(obj: Any, attr: str) -> Any:
+    return obj.get(attr) if isinstance(obj, dict) else getattr(obj, attr, None)
+
+
+def _set(obj: Any, attr: str, value: Any):
+    if isinstance(obj, dict):
+        obj[attr] = value
+    else:
+        setattr(obj, attr, value)
+
+
+class UndoLog:
+    OP_BYTES = 120  # estimado por operación: tupla y punteros, sin los objetos referenciados
+
+    def __init__(self, max_steps: int = 50, max_bytes: int = 256 * 1024):
+        self.max_steps = max(1, int(max_steps))
+        self.max_bytes = max(0, int(max_bytes))
+        self.bytes_used = 0
+        self._entries: Queue = Queue(capacity=self.max_steps)  # (valores previos, operaciones, bytes)
+        self._shadow: Optional[Dict[str, Any]] = None           # estado del último record
+        self._ops: List[Tuple] = []                             # (dueño, operación) desde ese record
+        self._inventory = None                                  # inventario de record()
+        self._watched: List[Any] = []                           # fuentes con journal
+        self._fields: Dict[str, Tuple[Any, str]] = {}           # clave -> (objeto o dict, atributo)
+
+    # ---------------- historial ----------------
+    def set_max_steps(self, new_max: int):
+        self.max_steps = max(1, int(new_max))
+        for _, _, size in self._entries.resize(self.max_steps):
+            self.bytes_used -= size
+        self._trim()
+
+    def set_memory_budget(self, max_bytes: int):
+        self.max_bytes = max(0, int(max_bytes))
+        self._trim()
+
+    def _trim(self):
+        # el estado sombra cuenta como un paso más
+        while self._entries and (len(self._entries) > self.max_steps - 1 or self.bytes_used > self.max_bytes):
+            self.bytes_used -= self._entries.dequeue()[2]
+
+    def _pop_entry(self) -> Tuple[Dict[str, Any], List[Tuple]]:
+        back, ops, size = self._entries.pop()
+        self.bytes_used -= size
+        return back, ops
+
+    def can_undo(self) -> bool:
+        return self._shadow is not None
+
+    def get_history_size(self) -> int:
+        return 0 if self._shadow is None else len(self._entries) + 1
+
+    def clear_history(self):
+        self._entries.clear()
+        self.bytes_used = 0
+        self._shadow = None
+        self._set_ops([])
+
+    # ---------------- fuentes de estado ----------------
+    def _journaled(self) -> List[Any]:
+        sources = list(self._watched)
+        if self._inventory is not None and all(src is not self._inventory for src in sources):
+            sources.append(self._inventory)
+        return sources
+
+    def _set_ops(self, ops: List[Tuple]):
+        self._ops = ops
+        for source in self._journaled():
+            if hasattr(source, "journal"):
+                source.journal = ops
+
+    def _attach(self, inventory):
+        if inventory is self._inventory:
+            return
+        if self._inventory is not None:
+            if all(src is not self._inventory for src in self._watched):
+                self._inventory.journal = None
+            self.clear_history()  # el historial era de otro inventario
+        self._inventory = inventory
+        self._set_ops(self._ops)
+
+    def watch(self, key: str, obj: Any, attr: str):
+        """Suma un valor (atributo o clave de dict) al estado que se guarda y restaura."""
+        current = self._fields.get(key)
+        if current is None or current[0] is not obj or current[1] != attr:
+            self._fields[key] = (obj, attr)
+            self.clear_history()  # los pasos anteriores no tienen este valor
+
+    def watch_inventory(self, inventory):
+        """Registra otro inventario cuyas operaciones se deshacen junto con el resto."""
+        self.watch_journal(inventory)
+
+    def watch_journal(self, source):
+        """Registra una fuente con `journal` y `revert(op)` (inventario, JobManager...)."""
+        if source is None or any(src is source for src in self._journaled()):
+            return
+        self._watched.append(source)
+        self.clear_history()
+
+    def note(self, obj: Any, *names: str):
+        """Anota el valor actual de atributos que se van a modificar (deshacer los restaura)."""
+        if self._shadow is None:
+            return
+        for name in names:
+            self._ops.append((self, ("attr", obj, name, getattr(obj, name, None))))
+
+    def revert(self, op: Tuple):
+        """Deshace una anotación de note()."""
+        _, obj, name, value = op
+        try:
+            setattr(obj, name, value)
+        except Exception as e:
+            print(f"[UNDO] No se pudo restaurar {name}: {e}")
+
+    # ---------------- captura ----------------
+    def _read(self, player_state, weather_system, player_manager) -> Dict[str, Any]:
+        state: Dict[str, Any] = {}
+        if player_state is not None:
+            stats = getattr(player_state, "player_stats", None)
+            state["money"] = getattr(player_state, "money", 0.0)
+            state["stamina"] = getattr(stats, "stamina", None)
+            state["reputation"] = getattr(stats, "reputation", None)
+            state["current_time"] = getattr(player_state, "current_time", None)
+        if player_manager is not None:
+            state["position"] = (player_manager.cell_x, player_manager.cell_y)
+            state["pixel_position"] = (player_manager.pixel_x, player_manager.pixel_y)
+        if weather_system is not None:
+            state["weather"] = (getattr(weather_system, "current_condition", None),
+                                getattr(weather_system, "current_intensity", None))
+            history = getattr(weather_system, "history", None)
+            state["weather_history"] = None if history is None else len(history)
+            prequeue = getattr(weather_system, "prequeue", None)
+            state["prequeue"] = tuple(prequeue) if prequeue is not None else ()
+        for key, (obj, attr) in self._fields.items():
+            state["watch:" + key] = _get(obj, attr)
+        return state
+
+    def record(self, player_state, inventory, weather_system, player_manager) -> bool:
+        """Registra el estado actual como punto al que se puede volver.
+
+        Si nada cambió desde el último record (p. ej. dos capas capturando la
+        misma acción) no se agrega un paso y retorna False.
+        """
+        self._attach(inventory)
+        current = self._read(player_state, weather_system, player_manager)
+        if self._shadow is not None:
+            shadow = self._shadow
+            if not self._ops and current == shadow:
+                return False
+            back = {k: shadow.get(k) for k, v in current.items() if shadow.get(k) != v}
+            # heurística (ver docstring del módulo): no mide los objetos referenciados
+            size = sys.getsizeof(back) + sys.getsizeof(self._ops) + self.OP_BYTES * len(self._ops)
+            self._entries.enqueue((back, self._ops, size))
+            self.bytes_used += size
+            self._trim()
+        self._shadow = current
+        self._set_ops([])
+        return True
+
+    # ---------------- deshacer ----------------
+    @staticmethod
+    def _revert(ops: List[Tuple]):
+        for owner, op in reversed(ops):
+            owner.revert(op)
+
+    def undo(self, player_state, inventory, weather_system, player_manager, n: int = 1) -> int:
+        """Vuelve n pasos atrás (aplicando el estado final una sola vez); retorna cuántos."""
+        steps = min(max(0, int(n)), self.get_history_size())
+        if not steps:
+            return 0
+        self._attach(inventory)
+        target = dict(self._shadow)
+        self._revert(self._ops)
+        for _ in range(steps - 1):
+            back, ops = self._pop_entry()
+            target.update(back)
+            self._revert(ops)
+        self._apply(target, player_state, weather_system, player_manager)
+        if self._entries:
+            back, ops = self._pop_entry()
+            target.update(back)
+            self._shadow = target
+            self._set_ops(ops)
+        else:
+            self._shadow = None
+            self._set_ops([])
+        return steps
+
+    def _apply(self, state: Dict[str, Any], player_state, weather_system, player_manager):
+        if player_state is not None and "money" in state:
+            player_state.money = state["money"]
+            stats = getattr(player_state, "player_stats", None)
+            if stats is not None:
+                stats.stamina = state["stamina"]
+                stats.reputation = state["reputation"]
+            player_state.current_time = state["current_time"]
+
+        if player_manager is not None and "position" in state:
+            player_manager.cell_x, player_manager.cell_y = state["position"]
+            player_manager.pixel_x, player_manager.pixel_y = state["pixel_position"]
+            player_manager.target_pixel_x, player_manager.target_pixel_y = state["pixel_position"]
+            player_manager.moving = False
+            try:
+                player_manager.sprite.center_x = player_manager.pixel_x
+                player_manager.sprite.center_y = player_manager.pixel_y
+            except Exception:
+                pass
+
+        if weather_system is not None and "weather" in state:
+            cond, intensity = state["weather"]
+            if (weather_system.current_condition, weather_system.current_intensity) != (cond, intensity):
+                weather_system.force_state(cond, intensity, save_history=False)
+            length = state.get("weather_history")
+            history = getattr(weather_system, "history", None)
+            if length is not None and history is not None and len(history) > length:
+                if hasattr(weather_system, "truncate_history"):
+                    weather_system.truncate_history(length)
+                else:
+                    del history[length:]
+            prequeue = state.get("prequeue", ())
+            if tuple(getattr(weather_system, "prequeue", ())) != prequeue and hasattr(weather_system, "set_prequeue"):
+                weather_system.set_prequeue(list(prequeue))
+
+        for key, (obj, attr) in self._fields.items():
+            skey = "watch:" + key
+            if skey in state:
+                try:
+                    _set(obj, attr, state[skey])
+                except Exception as e:
+                    print(f"[UNDO] No se pudo restaurar {key}: {e}")
@@ -1,17 +1,20 @@
 # undo_system.py
 import copy
 from typing import Dict, Any, List
-from game.adts import Stack
+from game.adts import Queue
 
 
 class UndoSystem:
     """
     Sistema para deshacer acciones del jugador.
-    Guarda estados anteriores del juego en una pila.
+    Guarda estados anteriores del juego en un buffer circular de capacidad
+    max_steps: se deshace desde la cola y al llenarse se descarta el más
+    antiguo desde la cabeza, ambos en O(1).
     """
 
     def __init__(self, max_steps: int = 50):
-        self.undo_stack = Stack()
+        max_steps = max(1, int(max_steps))
+        self.undo_stack = Queue(capacity=max_steps)
         self.max_steps = max_steps
         self.current_step = 0
 
@@ -20,19 +23,19 @@ class UndoSystem:
         if new_max < 1:
             new_max = 1
         self.max_steps = new_max
-        # Si hay más estados que el nuevo límite, eliminar los antiguos
-        while self.undo_stack.__len__() > self.max_steps:
-            self._remove_oldest()
+        # Si hay más estados que el nuevo límite se descartan los antiguos
+        # (solo se reacomodan referencias, no se copian snapshots)
+        self.undo_stack.resize(new_max)
 
     def save_state(self, game_state: Dict[str, Any]):
         """Guarda el estado actual del juego en la pila de deshacer."""
-        if self.undo_stack.__len__() >= self.max_steps:
+        if len(self.undo_stack) >= self.max_steps:
             # Eliminar el estado más antiguo si excedemos el límite
             self._remove_oldest()
 
         # Guardar copia profunda del estado
         state_copy = self._deep_copy_state(game_state)
-        self.undo_stack.push(state_copy)
+        self.undo_stack.enqueue(state_copy)
         self.current_step += 1
 
     def undo(self) -> Dict[str, Any]:
@@ -40,7 +43,7 @@ class UndoSystem:
         if self.undo_stack.is_empty():
             raise ValueError("No hay estados anteriores para restaurar")
 
-        previous_state = self.undo_stack.pop()
+        previous_state = self.undo_stack.pop()  # el más reciente
         self.current_step -= 1
         return previous_state
 
@@ -68,8 +71,8 @@ class UndoSystem:
 
     def get_state_snapshot(self, player_state, inventory, weather_system, player_manager) -> Dict[str, Any]:
         """Crea un snapshot del estado actual del juego."""
-        # Obtener estado del clima desde WeatherMarkov
-        weather_state = weather_system.get_state()
+        # Obtener estado del clima desde WeatherMarkov (snapshot del tick si existe)
+        weather_state = weather_system.snapshot() if hasattr(weather_system, 'snapshot') else weather_system.get_state()
 
         return {
             'player_position': (player_manager.cell_x, player_manager.cell_y),
@@ -85,7 +88,7 @@ class UndoSystem:
                 'current_intensity': weather_state.get('intensity', 0.5),
                 'current_multiplier': weather_state.get('multiplier', 1.0),
                 'history': copy.copy(getattr(weather_system, 'history', [])),
-                'prequeue': copy.copy(getattr(weather_system, 'prequeue', []))
+                'prequeue': list(getattr(weather_system, 'prequeue', []))
             },
             'step_count': self.current_step
         }
@@ -112,8 +115,7 @@ class UndoSystem:
         # Restaurar inventario
         # Necesitamos reconstruir el inventario usando los métodos existentes
         inventory_items = state['inventory']
-        inventory.deque = Stack()  # Reiniciar inventario
-        inventory.current_weight = 0.0
+        inventory.clear()  # Reiniciar inventario (deque, índice y peso)
 
         for job in inventory_items:
             inventory.add(job)
@@ -125,9 +127,13 @@ class UndoSystem:
             weather_state_data['current_intensity']
         )
         # Restaurar historial y cola si existen
-        if hasattr(weather_system, 'history'):
+        if hasattr(weather_system, 'set_history'):
+            weather_system.set_history(weather_state_data.get('history', []))
+        elif hasattr(weather_system, 'history'):
             weather_system.history = weather_state_data.get('history', [])
-        if hasattr(weather_system, 'prequeue'):
+        if hasattr(weather_system, 'set_prequeue'):
+            weather_system.set_prequeue(weather_state_data.get('prequeue', []))
+        elif hasattr(weather_system, 'prequeue'):
             weather_system.prequeue = weather_state_data.get('prequeue', [])
 
         self.current_step = state['step_count']
@@ -137,23 +143,13 @@ class UndoSystem:
         return copy.deepcopy(state)
 
     def _remove_oldest(self):
-        """Elimina el estado más antiguo (implementación básica)."""
-        # Para una implementación más eficiente, podríamos usar deque en lugar de Stack
-        temp_states = []
-        while not self.undo_stack.is_empty():
-            temp_states.append(self.undo_stack.pop())
-
-        # Eliminar el más antiguo (primero en la lista)
-        if temp_states:
-            temp_states.pop(0)
-
-        # Volver a poner los estados en la pila
-        for state in reversed(temp_states):
-            self.undo_stack.push(state)
+        """Elimina el estado más antiguo (cabeza del buffer) en O(1)."""
+        if not self.undo_stack.is_empty():
+            self.undo_stack.dequeue()
 
     def clear_history(self):
         """Limpia todo el historial de deshacer."""
-        self.undo_stack = Stack()
+        self.undo_stack.clear()
         self.current_step = 0
 
     def get_history_size(self) -> int:
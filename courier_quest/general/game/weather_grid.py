@@ -0,0 +1,174 @@
+# game/weather_grid.py
+"""
+WeatherGrid: clima regional opcional. El mapa se divide en distritos cuadrados,
+cada uno con su propia cadena de Markov acoplada a sus vecinos.
+
+- Reutiliza la matriz compilada (tablas alias) y el reloj de un WeatherMarkov,
+  por lo que usa las mismas transiciones de city_weather_*.json.
+- El estado vive en listas paralelas (una entrada por distrito) y los cambios se
+  agendan en un heap por tiempo: update() solo toca los distritos que vencen,
+  así el costo por frame no crece con el tamaño del mapa.
+- Acoplamiento: al vencer su burst, un distrito copia la condición de un vecino
+  con probabilidad `coupling`; si no, muestrea su propia fila de la matriz.
+"""
+
+from __future__ import annotations
+import heapq
+import random
+from typing import Any, Dict, List, Optional, Tuple
+
+from .weather_markov import WeatherMarkov, alias_sample, lerp
+
+
+class WeatherGrid:
+    def __init__(
+        self,
+        weather: WeatherMarkov,
+        rows: int,
+        cols: int,
+        district_size: int = 8,
+        coupling: float = 0.35,
+        seed: Optional[int] = None,
+    ):
+        self.weather = weather
+        self.rows = max(1, int(rows))
+        self.cols = max(1, int(cols))
+        self.district_size = max(1, int(district_size))
+        self.coupling = min(1.0, max(0.0, float(coupling)))
+        self.rng = random.Random(seed)
+
+        self.d_rows = (self.rows + self.district_size - 1) // self.district_size
+        self.d_cols = (self.cols + self.district_size - 1) // self.district_size
+        n = self.d_rows * self.d_cols
+
+        weather._ensure_compiled()
+        now = weather.clock.now()
+        start = weather._state_index.get(weather.current_condition, -1)
+
+        # listas paralelas por distrito; todos arrancan con el clima global
+        self.state: List[int] = [start] * n
+        self.condition: List[str] = [weather.current_condition] * n
+        self.intensity: List[float] = [weather.current_intensity] * n
+        self.from_mult: List[float] = [weather.current_multiplier] * n
+        self.to_mult: List[float] = [weather.current_multiplier] * n
+        self.switch_at: List[float] = [now - weather.transition_smooth_seconds] * n
+        self.next_switch: List[float] = [0.0] * n
+        self.version = 0
+        self._compiled = weather._compiled_matrix
+        self._clock = weather.clock  # base de tiempo de next_switch/switch_at
+
+        self._neighbors: List[Tuple[int, ...]] = [self._district_neighbors(d) for d in range(n)]
+        self._heap: List[Tuple[float, int]] = []
+        for d in range(n):
+            # duraciones escalonadas para que los distritos diverjan
+            self._schedule(d, now - self.rng.uniform(0.0, weather.min_duration))
+
+    # ---------------- geometría ----------------
+    def _district_neighbors(self, d: int) -> Tuple[int, ...]:
+        r, c = divmod(d, self.d_cols)
+        out = []
+        for dr, dc in ((-1, 0), (1, 0), (0, -1), (0, 1)):
+            rr, cc = r + dr, c + dc
+            if 0 <= rr < self.d_rows and 0 <= cc < self.d_cols:
+                out.append(rr * self.d_cols + cc)
+        return tuple(out)
+
+    def district_of(self, cx: int, cy: int) -> int:
+        """Índice del distrito que contiene la celda (cx, cy); se recorta a los bordes."""
+        ds = self.district_size
+        c = min(self.d_cols - 1, max(0, int(cx) // ds))
+        r = min(self.d_rows - 1, max(0, int(cy) // ds))
+        return r * self.d_cols + c
+
+    # ---------------- reloj ----------------
+    def set_clock(self, clock):
+        """Pasa los tiempos agendados a la base de `clock` (ver WeatherMarkov.set_clock)."""
+        if clock is None or clock is self._clock:
+            return
+        self.rebase(clock.now() - self._clock.now())
+        self._clock = clock
+
+    def rebase(self, shift: float):
+        """Desplaza switch_at/next_switch y el heap en `shift` segundos."""
+        if not shift:
+            return
+        self.switch_at = [t + shift for t in self.switch_at]
+        self.next_switch = [t + shift for t in self.next_switch]
+        # sumar una constante conserva el orden del heap
+        self._heap = [(at + shift, d) for at, d in self._heap]
+
+    # ---------------- avance ----------------
+    def _schedule(self, d: int, base: float):
+        w = self.weather
+        self.next_switch[d] = base + self.rng.randint(w.min_duration, w.max_duration)
+        heapq.heappush(self._heap, (self.next_switch[d], d))
+
+    def _multiplier(self, d: int, now: float) -> float:
+        k = (now - self.switch_at[d]) / max(1e-9, self.weather.transition_smooth_seconds)
+        if k >= 1.0:
+            return self.to_mult[d]
+        return lerp(self.from_mult[d], self.to_mult[d], max(0.0, k))
+
+    def _transition(self, d: int, at: float):
+        w = self.weather
+        neighbors = self._neighbors[d]
+        if neighbors and self.rng.random() < self.coupling:
+            src = neighbors[self.rng.randrange(len(neighbors))]
+            nxt, cond = self.state[src], self.condition[src]
+        else:
+            s = self.state[d]
+            prob, alias = w._fallback_alias if s < 0 else w._alias_tables[s]
+            nxt = alias_sample(self.rng, prob, alias)
+            cond = w._states[nxt]
+        intensity = round(self.rng.uniform(0.25, 1.0), 3)
+        self.from_mult[d] = self._multiplier(d, at)
+        self.state[d] = nxt
+        self.condition[d] = cond
+        self.intensity[d] = intensity
+        self.to_mult[d] = w.base_multiplier.get(cond, 1.0) * intensity
+        self.switch_at[d] = at
+        self._schedule(d, at)
+
+    def update(self, dt: float = 0.0) -> int:
+        """
+        Avanza los distritos cuyo burst venció según el reloj del clima.
+        No avanza el reloj (lo hace el dueño, como WeatherMarkov.update).
+        Retorna cuántos distritos cambiaron.
+        """
+        w = self.weather
+        w._ensure_compiled()
+        if self._compiled is not w._compiled_matrix:
+            # la matriz cambió: reindexar estados por nombre
+            self.state = [w._state_index.get(c, -1) for c in self.condition]
+            self._compiled = w._compiled_matrix
+        now = w.clock.now()
+        heap = self._heap
+        changed = 0
+        while heap and heap[0][0] <= now:
+            at, d = heapq.heappop(heap)
+            if at != self.next_switch[d]:
+                continue  # entrada obsoleta
+            self._transition(d, at)
+            changed += 1
+        if changed:
+            self.version += 1
+        return changed
+
+    # ---------------- consultas ----------------
+    def condition_at(self, cx: int, cy: int) -> str:
+        return self.condition[self.district_of(cx, cy)]
+
+    def multiplier_at(self, cx: int, cy: int) -> float:
+        return self._multiplier(self.district_of(cx, cy), self.weather.clock.now())
+
+    def state_at(self, cx: int, cy: int) -> Dict[str, Any]:
+        """Estado local con las mismas claves que WeatherMarkov.get_state()."""
+        d = self.district_of(cx, cy)
+        now = self.weather.clock.now()
+        return {
+            "condition": self.condition[d],
+            "intensity": round(self.intensity[d], 3),
+            "multiplier": round(self._multiplier(d, now), 3),
+            "time_left": max(0, int(self.next_switch[d] - now)),
+            "transitioning": (now - self.switch_at[d]) < self.weather.transition_smooth_seconds,
+        }
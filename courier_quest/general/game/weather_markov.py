@@ -5,14 +5,81 @@ prequeue (cola) y historial (pila). Tiene API simple para integrarse con GameSta
 """
 
 from __future__ import annotations
-import time
 import random
+from dataclasses import dataclass
 from typing import Dict, Optional, Callable, List, Any, Tuple
 
+from .adts import Queue
+from .persistent import PVector
+from .game_clock import Clock, SimulatedClock
+
 
 def lerp(a: float, b: float, t: float) -> float:
     return a + (b - a) * t
 
+
+def build_alias_table(weights: List[float]) -> Tuple[List[float], List[int]]:
+    """
+    Tablas alias de Walker/Vose para muestrear una distribución discreta en O(1).
+    Construcción O(n). `weights` no necesita estar normalizado (suma > 0).
+    """
+    n = len(weights)
+    total = float(sum(weights))
+    scaled = [w * n / total for w in weights]
+    prob = [1.0] * n
+    alias = list(range(n))
+    small = [i for i, p in enumerate(scaled) if p < 1.0]
+    large = [i for i, p in enumerate(scaled) if p >= 1.0]
+    while small and large:
+        s = small.pop()
+        l = large.pop()
+        prob[s] = scaled[s]
+        alias[s] = l
+        scaled[l] = scaled[l] + scaled[s] - 1.0
+        (small if scaled[l] < 1.0 else large).append(l)
+    # residuos numéricos: quedan con probabilidad 1
+    return prob, alias
+
+
+def alias_sample(rng: random.Random, prob: List[float], alias: List[int]) -> int:
+    """Muestrea un índice con una sola llamada a rng.random()."""
+    u = rng.random() * len(prob)
+    i = int(u)
+    return i if (u - i) < prob[i] else alias[i]
+
+
+def _mat_mul(a: List[List[float]], b: List[List[float]]) -> List[List[float]]:
+    cols = list(zip(*b))
+    return [[sum(x * y for x, y in zip(row, col)) for col in cols] for row in a]
+
+@dataclass(frozen=True)
+class WeatherSnapshot:
+    """
+    Estado del clima congelado para un tick. `version` cambia solo cuando cambia
+    la condición, la intensidad o el multiplicador (no con time_left), así los
+    consumidores pueden saltarse trabajo si el clima no cambió.
+    """
+    condition: str
+    intensity: float
+    multiplier: float
+    time_left: int
+    transitioning: bool
+    version: int
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Compatibilidad con consumidores que esperan el dict de get_state()."""
+        return getattr(self, key, default)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "condition": self.condition,
+            "intensity": self.intensity,
+            "multiplier": self.multiplier,
+            "time_left": self.time_left,
+            "transitioning": self.transitioning,
+        }
+
+
 class WeatherMarkov:
     DEFAULT_CONDITIONS = [
         "clear", "clouds", "rain_light", "rain", "storm", "fog", "wind", "heat", "cold", "snow"
@@ -29,6 +96,13 @@ class WeatherMarkov:
         "cold": 0.92,
         "snow": 0.88
     }
+    # penalización de stamina por celda (se suma al costo base en consume_stamina)
+    DEFAULT_STAMINA_PENALTY = {
+        "rain": 0.1,
+        "wind": 0.1,
+        "storm": 0.3,
+        "heat": 0.2,
+    }
 
     def __init__(
         self,
@@ -40,9 +114,16 @@ class WeatherMarkov:
         transition_smooth_seconds: float = 3.0,
         enable_history: bool = True,
         debug: bool = False,   #  nuevo parámetro
+        clock: Optional[Clock] = None,
     ):
         self.rng = random.Random(seed)
 
+        # Reloj: si no se inyecta uno, el clima usa su propio reloj simulado
+        # avanzado con el dt de update(). Con un reloj compartido (p.ej. el de
+        # GameManager) quien avanza el tiempo es el dueño del reloj.
+        self._owns_clock = clock is None
+        self.clock: Clock = clock if clock is not None else SimulatedClock()
+
         if debug:
             self.min_duration = 3
             self.max_duration = 5
@@ -59,7 +140,7 @@ class WeatherMarkov:
         if api is not None:
             try:
                 api_weather = api.get_weather() or {}
-                for key in ("transition_matrix", "transitions", "forecast", "series"):
+                for key in ("transition_matrix", "transition", "transitions", "forecast", "series"):
                     candidate = api_weather.get(key)
                     if isinstance(candidate, dict) and candidate:
                         self.transition_matrix = candidate
@@ -80,7 +161,7 @@ class WeatherMarkov:
         ) * self.current_intensity
 
         # tiempo y duración
-        self.start_time = time.time()
+        self.start_time = self.clock.now()
         self.duration = self._pick_duration()
 
         # transición (interpolación)
@@ -90,15 +171,23 @@ class WeatherMarkov:
         self._transition_start_time = 0.0
         self._transition_duration = float(self.transition_smooth_seconds)
 
-        # prequeue: cola FIFO de estados forzados
-        self.prequeue: List[str] = []
+        # prequeue: cola FIFO (buffer circular) de estados forzados
+        self.prequeue: Queue = Queue()
+
+        # matriz compilada (índices densos + tablas alias) y caché de potencias
+        self._compiled_matrix: Optional[Dict[str, Dict[str, float]]] = None
+        self._compile_transitions()
 
-        # history stack (lista simple LIFO)
-        self.history: List[Tuple[str, float]] = [] if enable_history else []
+        # history stack (LIFO) persistente: un snapshot solo guarda la referencia
+        self.history: PVector = PVector()
 
         # callbacks
         self._subs: List[Callable[[Dict], None]] = []
 
+        # snapshot por tick y versión de cambios
+        self.version = 0
+        self._snapshot: Optional[WeatherSnapshot] = None
+
     def _default_transition_matrix(self) -> Dict[str, Dict[str, float]]:
         """
         Genera una matriz de transición más aleatoria y no lineal.
@@ -124,26 +213,187 @@ class WeatherMarkov:
             m[s] = row
         return m
 
+    @classmethod
+    def stamina_penalty(cls, condition: str) -> float:
+        return cls.DEFAULT_STAMINA_PENALTY.get(condition, 0.0)
+
     def _pick_duration(self) -> int:
         return self.rng.randint(self.min_duration, self.max_duration)
 
+    # ---------------- matriz compilada ----------------
+    def _compile_transitions(self):
+        """
+        Compila transition_matrix una sola vez: estados -> índices, filas densas
+        normalizadas y tablas alias por fila. Conserva la semántica original:
+        fila ausente -> uniforme entre los estados con fila; fila con pesos
+        que suman 0 -> uniforme entre sus destinos.
+        """
+        matrix = self.transition_matrix
+        states: List[str] = list(matrix.keys())
+        index: Dict[str, int] = {s: i for i, s in enumerate(states)}
+        for row in matrix.values():
+            for target in (row or {}):
+                if target not in index:
+                    index[target] = len(states)
+                    states.append(target)
+        n = len(states)
+
+        row_keys = [index[s] for s in matrix.keys()]
+        fallback = [0.0] * n
+        for i in row_keys:
+            fallback[i] = 1.0 / len(row_keys)
+
+        dense: List[List[float]] = []
+        for s in states:
+            probs = matrix.get(s) or {}
+            weights = [0.0] * n
+            for target, w in probs.items():
+                try:
+                    weights[index[target]] += max(0.0, float(w))
+                except (TypeError, ValueError):
+                    pass
+            total = sum(weights)
+            if not probs:
+                row = list(fallback)
+            elif total <= 0:
+                row = [0.0] * n
+                for target in probs:
+                    row[index[target]] = 1.0 / len(probs)
+            else:
+                row = [w / total for w in weights]
+            dense.append(row)
+
+        self._states = states
+        self._state_index = index
+        self._dense = dense
+        self._fallback_row = fallback
+        self._alias_tables = [build_alias_table(row) for row in dense]
+        self._fallback_alias = build_alias_table(fallback)
+        self._power_cache: Dict[int, List[List[float]]] = {1: dense}
+        self._stationary: Optional[Dict[str, float]] = None
+        self._compiled_matrix = matrix
+
+    def _ensure_compiled(self):
+        if self._compiled_matrix is not self.transition_matrix:
+            self._compile_transitions()
+
+    def set_transition_matrix(self, matrix: Dict[str, Dict[str, float]]):
+        """Reemplaza la matriz de transición y recompila tablas y cachés."""
+        self.transition_matrix = matrix or self._default_transition_matrix()
+        self._compile_transitions()
+
+    def _sample_next_index(self, condition: str) -> int:
+        idx = self._state_index.get(condition)
+        prob, alias = self._fallback_alias if idx is None else self._alias_tables[idx]
+        return alias_sample(self.rng, prob, alias)
+
     def _choose_next_condition(self) -> str:
         if self.prequeue:
-            return self.prequeue.pop(0)
-        probs = self.transition_matrix.get(self.current_condition, {})
-        if not probs:
-            return self.rng.choice(list(self.transition_matrix.keys()))
-        choices, weights = zip(*probs.items())
-        if sum(weights) <= 0:
-            return self.rng.choice(choices)
-        return self.rng.choices(choices, weights=weights, k=1)[0]
+            return self.prequeue.dequeue()
+        self._ensure_compiled()
+        return self._states[self._sample_next_index(self.current_condition)]
+
+    # ---------------- pronóstico ----------------
+    def _matrix_power(self, k: int) -> List[List[float]]:
+        """P^k por exponenciación binaria reutilizando las potencias cacheadas."""
+        cached = self._power_cache.get(k)
+        if cached is not None:
+            return cached
+        result = None
+        power = 1
+        remaining = k
+        while True:
+            if remaining & 1:
+                base = self._power_cache[power]
+                result = base if result is None else _mat_mul(result, base)
+            remaining >>= 1
+            if not remaining:
+                break
+            nxt = power * 2
+            if nxt not in self._power_cache:
+                half = self._power_cache[power]
+                self._power_cache[nxt] = _mat_mul(half, half)
+            power = nxt
+        self._power_cache[k] = result
+        return result
+
+    def forecast(self, steps: int = 1, condition: Optional[str] = None) -> Dict[str, float]:
+        """
+        Distribución de probabilidad de la condición tras `steps` transiciones.
+        Sin `condition` parte del clima actual y respeta los estados forzados en prequeue.
+        """
+        self._ensure_compiled()
+        steps = max(0, int(steps))
+        start = self.current_condition if condition is None else condition
+        if condition is None and len(self.prequeue):
+            queued = list(self.prequeue)
+            if steps == 0:
+                return {start: 1.0}
+            if steps <= len(queued):
+                return {queued[steps - 1]: 1.0}
+            start = queued[-1]
+            steps -= len(queued)
+        if steps == 0:
+            return {start: 1.0}
+
+        idx = self._state_index.get(start)
+        if idx is None:
+            # estado desconocido: el primer paso es uniforme entre filas conocidas
+            dist = self._fallback_row
+            if steps > 1:
+                pk = self._matrix_power(steps - 1)
+                n = len(self._states)
+                dist = [sum(dist[i] * pk[i][j] for i in range(n)) for j in range(n)]
+        else:
+            dist = self._matrix_power(steps)[idx]
+        return {s: p for s, p in zip(self._states, dist) if p > 0.0}
+
+    def stationary_distribution(self, tol: float = 1e-12, max_iter: int = 10000) -> Dict[str, float]:
+        """Distribución estacionaria (iteración de potencia sobre la cadena perezosa, cacheada)."""
+        self._ensure_compiled()
+        if self._stationary is not None:
+            return dict(self._stationary)
+        n = len(self._states)
+        dense = self._dense
+        dist = [1.0 / n] * n
+        for _ in range(max_iter):
+            # (P + I) / 2 tiene la misma estacionaria y converge aunque P sea periódica
+            step = [sum(dist[i] * dense[i][j] for i in range(n)) for j in range(n)]
+            nxt = [0.5 * (a + b) for a, b in zip(dist, step)]
+            delta = sum(abs(a - b) for a, b in zip(nxt, dist))
+            dist = nxt
+            if delta < tol:
+                break
+        self._stationary = {s: p for s, p in zip(self._states, dist)}
+        return dict(self._stationary)
 
     def _push_history(self, cond: str, intensity: float):
         if self.history is not None:
-            self.history.append((cond, float(intensity)))
+            self.history = self.history.append((cond, float(intensity)))
+
+    def set_history(self, entries):
+        """Reemplaza el historial (lista o PVector de (condición, intensidad))."""
+        self.history = entries if isinstance(entries, PVector) else PVector(tuple(e) for e in entries or [])
+
+    def truncate_history(self, length: int):
+        """Descarta las entradas posteriores a las primeras `length`."""
+        self.history = self.history.truncate(length)
+
+    def set_clock(self, clock: Clock):
+        """Cambia el reloj conservando el tiempo transcurrido del burst y de la transición."""
+        if clock is None or clock is self.clock:
+            return
+        shift = clock.now() - self.clock.now()
+        self.start_time += shift
+        self._transition_start_time += shift
+        self.clock = clock
+        self._owns_clock = False
+        self._snapshot = None
 
     def update(self, dt: float):
-        now = time.time()
+        if self._owns_clock:
+            self.clock.advance(dt)
+        now = self.clock.now()
 
         if self._transitioning:
             t = (now - self._transition_start_time) / max(1e-9, self._transition_duration)
@@ -154,17 +404,37 @@ class WeatherMarkov:
                 self.current_multiplier = lerp(
                     self._transition_from_multiplier, self._transition_to_multiplier, t
                 )
+            self.version += 1
 
         elapsed = now - self.start_time
         if (not self._transitioning) and (elapsed >= self.duration):
             next_cond = self._choose_next_condition()
             self._start_transition_to(next_cond)
 
+        # un solo snapshot por tick, compartido por todos los consumidores
+        self._snapshot = self._build_snapshot(now)
+
+    def _build_snapshot(self, now: float) -> WeatherSnapshot:
+        return WeatherSnapshot(
+            condition=self.current_condition,
+            intensity=round(self.current_intensity, 3),
+            multiplier=round(self.current_multiplier, 3),
+            time_left=max(0, int(self.duration - (now - self.start_time))),
+            transitioning=bool(self._transitioning),
+            version=self.version,
+        )
+
+    def snapshot(self) -> WeatherSnapshot:
+        """Snapshot inmutable del último update(); se construye solo si aún no existe."""
+        if self._snapshot is None:
+            self._snapshot = self._build_snapshot(self.clock.now())
+        return self._snapshot
+
     def _start_transition_to(self, new_condition: str):
         self._push_history(self.current_condition, self.current_intensity)
 
         self._transitioning = True
-        self._transition_start_time = time.time()
+        self._transition_start_time = self.clock.now()
         self._transition_duration = self.transition_smooth_seconds
         self._transition_from_multiplier = self.current_multiplier
 
@@ -175,16 +445,21 @@ class WeatherMarkov:
         self.current_intensity = new_intensity
         self._transition_to_multiplier = new_multiplier
 
-        self.start_time = time.time()
+        self.start_time = self.clock.now()
         self.duration = self._pick_duration()
+        self._mark_changed()
         self._emit_state()
 
+    def _mark_changed(self):
+        self.version += 1
+        self._snapshot = None
+
     def get_state(self) -> Dict[str, Any]:
         return {
             "condition": self.current_condition,
             "intensity": round(self.current_intensity, 3),
             "multiplier": round(self.current_multiplier, 3),
-            "time_left": max(0, int(self.duration - (time.time() - self.start_time))),
+            "time_left": max(0, int(self.duration - (self.clock.now() - self.start_time))),
             "transitioning": bool(self._transitioning),
         }
 
@@ -195,17 +470,25 @@ class WeatherMarkov:
         self.current_intensity = float(intensity) if intensity is not None else round(self.rng.uniform(0.25, 1.0), 3)
         self._transitioning = False
         self.current_multiplier = self.base_multiplier.get(condition, 1.0) * self.current_intensity
-        self.start_time = time.time()
+        self.start_time = self.clock.now()
         self.duration = self._pick_duration()
+        self._mark_changed()
         self._emit_state()
 
     def push_future(self, condition: str):
-        self.prequeue.append(condition)
+        self.prequeue.enqueue(condition)
+
+    def set_prequeue(self, conditions):
+        """Reemplaza la cola de estados forzados (p.ej. al restaurar un snapshot)."""
+        self.prequeue = Queue()
+        for cond in conditions or []:
+            self.prequeue.enqueue(cond)
 
     def undo(self) -> Optional[Tuple[str, float]]:
         if not self.history:
             return None
-        cond, intensity = self.history.pop()
+        cond, intensity = self.history[-1]
+        self.history = self.history.pop()
         self.force_state(cond, intensity, save_history=False)
         return (cond, intensity)
 
@@ -221,15 +504,8 @@ class WeatherMarkov:
             except Exception:
                 pass
 
-    def apply_to_game_state(self, game_state: Any):
-        s = self.get_state()
-        payload = {
-            "condition": s["condition"],
-            "intensity": s["intensity"],
-            "multiplier": s["multiplier"],
-            "time_left": s["time_left"],
-            "transitioning": s["transitioning"],
-        }
+    def apply_to_game_state(self, game_state: Any, snapshot: Optional[WeatherSnapshot] = None):
+        payload = (snapshot or self.snapshot()).to_dict()
         try:
             if hasattr(game_state, "weather_state"):
                 game_state.weather_state = payload
@@ -0,0 +1,232 @@
+# game/weather_rollout.py
+"""
+WeatherRollout: simulación Monte Carlo por lotes de la cadena de WeatherMarkov.
+
+Simula miles de cadenas desde el estado actual del clima y devuelve,
+por bucket de tiempo, el multiplicador de velocidad esperado y la penalización de
+stamina esperada. Las curvas se cachean hasta que cambie el estado del clima
+(condición, burst, prequeue o matriz), así que consultarlas cada frame es barato.
+
+Cada cadena avanza de burst en burst reutilizando las tablas alias compiladas por
+WeatherMarkov y acumula sus tramos en arreglos de diferencias por bucket.
+GameManager usa el multiplicador medio esperado para los ETA de ofertas y lotes.
+"""
+
+from __future__ import annotations
+import random
+from bisect import bisect_right
+from typing import Any, Dict, List, Optional, Tuple
+
+from .weather_markov import WeatherMarkov, lerp
+
+
+class WeatherRollout:
+    MEAN_INTENSITY = 0.625  # media de uniform(0.25, 1.0), como muestrea WeatherMarkov
+
+    def __init__(
+        self,
+        weather: WeatherMarkov,
+        n_chains: int = 2000,
+        horizon: float = 300.0,
+        bucket_seconds: float = 30.0,
+        seed: Optional[int] = None,
+    ):
+        self.weather = weather
+        self.n_chains = max(1, int(n_chains))
+        self.horizon = max(0.0, float(horizon))
+        self.bucket_seconds = max(1e-3, float(bucket_seconds))
+        # RNG propio: las simulaciones no alteran la secuencia del clima real
+        self.rng = random.Random(seed)
+
+        self._cache_key: Optional[Tuple] = None
+        self._cache_origin: float = 0.0
+        self._cache_mult: List[float] = []
+        self._cache_pen: List[float] = []
+
+    # ---------------- caché ----------------
+    def _state_key(self) -> Tuple:
+        w = self.weather
+        w._ensure_compiled()
+        return (
+            w.current_condition,
+            w.current_intensity,
+            w.start_time,
+            w.duration,
+            bool(w._transitioning),
+            w._transition_from_multiplier,
+            w._transition_start_time,
+            tuple(w.prequeue),
+            id(w._compiled_matrix),
+            self.n_chains,
+            self.horizon,
+            self.bucket_seconds,
+        )
+
+    def invalidate(self):
+        self._cache_key = None
+
+    # ---------------- simulación ----------------
+    def _simulate(self):
+        """
+        Corre las cadenas desde el inicio del burst actual. Las curvas quedan en
+        tiempo absoluto del reloj del clima, así siguen siendo válidas mientras
+        dure el burst: solo se recortan según el tiempo transcurrido.
+
+        Cada cadena se recorre por bursts, no por bucket: el tramo constante de
+        un burst se suma con un arreglo de diferencias y solo los buckets que
+        caen en la transición suave se evalúan uno a uno. La intensidad entra
+        lineal en el multiplicador esperado, así que se usa su media en vez de
+        muestrearla (misma esperanza, menos varianza y un número aleatorio
+        menos por cambio). El primer burst es igual para todas y se suma una vez.
+        """
+        w = self.weather
+        rnd = self.rng.random
+        states = w._states
+        index = w._state_index
+        tables = w._alias_tables
+        fallback = w._fallback_alias
+        n_states = len(states)
+
+        target_of = [w.base_multiplier.get(st, 1.0) * self.MEAN_INTENSITY for st in states]
+        penalty = [WeatherMarkov.stamina_penalty(st) for st in states]
+        smooth = max(1e-9, w.transition_smooth_seconds)
+        lo, width = w.min_duration, w.max_duration - w.min_duration + 1
+
+        origin = w.start_time
+        bucket = self.bucket_seconds
+        n_buckets = int((w.duration + self.horizon) // bucket) + 1
+        n = self.n_chains
+
+        # estados fuera de la matriz compilada (p.ej. forzados) se tratan como "desconocidos"
+        cur = index.get(w.current_condition, -1)
+        cur_mult = w.base_multiplier.get(states[cur], 1.0) * w.current_intensity if cur >= 0 else w.current_multiplier
+        cur_pen = penalty[cur] if cur >= 0 else WeatherMarkov.stamina_penalty(w.current_condition)
+        queued = [index.get(c, -1) for c in w.prequeue]
+        n_queued = len(queued)
+
+        d_mult = [0.0] * (n_buckets + 1)  # diferencias del tramo constante
+        d_pen = [0.0] * (n_buckets + 1)
+        ramp = [0.0] * n_buckets          # buckets dentro de una transición suave
+
+        def add_burst(weight: float, b0: int, b1: int, switch_at: float, frm: float, target: float, pen: float):
+            """Suma un burst que cubre los buckets [b0, b1) y arranca su transición en switch_at."""
+            d_pen[b0] += weight * pen
+            d_pen[b1] -= weight * pen
+            b = b0
+            while b < b1:
+                k = (origin + b * bucket - switch_at) / smooth
+                if k >= 1.0:
+                    break
+                ramp[b] += weight * lerp(frm, target, k)
+                b += 1
+            d_mult[b] += weight * target
+            d_mult[b1] -= weight * target
+
+        # primer burst: igual para todas las cadenas
+        first_end = origin + float(w.duration)
+        first_b = min(n_buckets, int(-((origin - first_end) // bucket)))  # primer bucket >= first_end
+        if w._transitioning:
+            frm0, switch0 = w._transition_from_multiplier, w._transition_start_time
+        else:
+            frm0, switch0 = cur_mult, origin
+        add_burst(n, 0, first_b, switch0, frm0, cur_mult, cur_pen)
+        k = (first_end - switch0) / smooth
+        end_mult = cur_mult if k >= 1.0 else lerp(frm0, cur_mult, k)
+
+        if first_b < n_buckets:
+            for _ in range(n):
+                at, frm, st, q, b0 = first_end, end_mult, cur, 0, first_b
+                while b0 < n_buckets:
+                    if q < n_queued:
+                        nxt = queued[q]
+                        q += 1
+                    else:
+                        prob, alias = fallback if st < 0 else tables[st]
+                        u = rnd() * len(prob)
+                        j = int(u)
+                        nxt = j if (u - j) < prob[j] else alias[j]
+                    if 0 <= nxt < n_states:
+                        target, pen = target_of[nxt], penalty[nxt]
+                    else:
+                        target, pen = self.MEAN_INTENSITY, 0.0
+                    end = at + lo + int(rnd() * width)
+                    # buckets [b0, b1): los de tiempo en [at, end); un cambio justo en el bucket ya cuenta
+                    b1 = int(-((origin - end) // bucket))
+                    if b1 > n_buckets:
+                        b1 = n_buckets
+                    # lo mismo que add_burst con peso 1, en línea: es el bucle caliente
+                    d_pen[b0] += pen
+                    d_pen[b1] -= pen
+                    b = b0
+                    while b < b1:
+                        k = (origin + b * bucket - at) / smooth
+                        if k >= 1.0:
+                            break
+                        ramp[b] += frm + (target - frm) * k
+                        b += 1
+                    d_mult[b] += target
+                    d_mult[b1] -= target
+                    k = (end - at) / smooth
+                    frm = target if k >= 1.0 else frm + (target - frm) * k
+                    at, st, b0 = end, nxt, b1
+
+        exp_mult: List[float] = []
+        exp_pen: List[float] = []
+        run_mult = run_pen = 0.0
+        for b in range(n_buckets):
+            run_mult += d_mult[b]
+            run_pen += d_pen[b]
+            exp_mult.append((run_mult + ramp[b]) / n)
+            exp_pen.append(run_pen / n)
+
+        self._cache_origin = origin
+        self._cache_mult = exp_mult
+        self._cache_pen = exp_pen
+
+    # ---------------- API ----------------
+    def expected_curves(self) -> Dict[str, List[float]]:
+        """
+        Curvas esperadas desde ahora hasta `horizon` segundos.
+        Retorna {"times": [...], "multiplier": [...], "stamina_penalty": [...]},
+        con `times` en segundos relativos a ahora (inicio de cada bucket).
+        """
+        key = self._state_key()
+        if key != self._cache_key:
+            self._simulate()
+            self._cache_key = key
+
+        elapsed = max(0.0, self.weather.clock.now() - self._cache_origin)
+        first = int(elapsed // self.bucket_seconds)
+        count = int(self.horizon // self.bucket_seconds) + 1
+        mult = self._cache_mult[first:first + count]
+        pen = self._cache_pen[first:first + count]
+        offset = first * self.bucket_seconds - elapsed
+        times = [max(0.0, offset + i * self.bucket_seconds) for i in range(len(mult))]
+        return {"times": times, "multiplier": mult, "stamina_penalty": pen}
+
+    def expected_multiplier(self, seconds_ahead: float) -> float:
+        """Multiplicador esperado en el bucket que contiene `seconds_ahead`."""
+        return self._value_at("multiplier", seconds_ahead, 1.0)
+
+    def expected_stamina_penalty(self, seconds_ahead: float) -> float:
+        """Penalización de stamina por celda esperada en el bucket de `seconds_ahead`."""
+        return self._value_at("stamina_penalty", seconds_ahead, 0.0)
+
+    def expected_mean_multiplier(self, seconds: float) -> float:
+        """Multiplicador esperado promedio de los buckets que empiezan en los próximos
+        `seconds` (para el ETA de un recorrido que dura eso)."""
+        curves = self.expected_curves()
+        values = [m for t, m in zip(curves["times"], curves["multiplier"]) if t < max(float(seconds), 1e-9)]
+        return sum(values) / len(values) if values else 1.0
+
+    def _value_at(self, name: str, seconds_ahead: Any, default: float) -> float:
+        curves = self.expected_curves()
+        values = curves[name]
+        if not values:
+            return default
+        try:
+            ahead = max(0.0, float(seconds_ahead))
+        except (TypeError, ValueError):
+            ahead = 0.0
+        i = bisect_right(curves["times"], ahead) - 1
+        return values[max(0, min(i, len(values) - 1))]
@@ -0,0 +1,288 @@
+# tests/weather_test.py
+import unittest
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from game.game_clock import SimulatedClock
+from game.weather_markov import WeatherMarkov
+from game.player_stats import PlayerStats
+from game.weather_rollout import WeatherRollout
+from game.weather_grid import WeatherGrid
+
+
+class TestWeatherClock(unittest.TestCase):
+    """Clima y stamina gobernados por un reloj inyectable"""
+
+    def test_01_simulated_match_runs_instantly(self):
+        """Una partida de 15 minutos se simula sin esperar tiempo real"""
+        print("\n🔸 Test 01: Partida simulada con reloj inyectado")
+        clock = SimulatedClock()
+        weather = WeatherMarkov(seed=7, clock=clock)
+
+        for _ in range(15 * 60):
+            clock.advance(1.0)
+            weather.update(1.0)
+
+        # 900 s con bursts de 45-60 s -> al menos 14 transiciones
+        self.assertGreaterEqual(len(weather.history), 14)
+        self.assertLessEqual(weather.get_state()["time_left"], weather.max_duration)
+        print("✅ Reloj simulado: OK")
+
+    def test_02_own_clock_uses_dt(self):
+        """Sin reloj inyectado el clima avanza con el dt de update()"""
+        print("\n🔸 Test 02: dt de update() gobierna el clima")
+        weather = WeatherMarkov(seed=3, debug=True)
+        weather.force_state("clear", 1.0)
+        weather.update(weather.duration + 0.01)
+        self.assertTrue(weather.get_state()["transitioning"])
+        self.assertEqual(weather.history[-1][0], "clear")
+        print("✅ dt respetado: OK")
+
+    def test_03_set_clock_keeps_elapsed(self):
+        """Cambiar de reloj conserva el tiempo transcurrido del burst"""
+        print("\n🔸 Test 03: Cambio de reloj")
+        weather = WeatherMarkov(seed=1)
+        weather.force_state("rain", 0.5)
+        weather.update(10.0)
+        left_before = weather.get_state()["time_left"]
+
+        shared = SimulatedClock(start=500.0)
+        weather.set_clock(shared)
+        self.assertEqual(weather.get_state()["time_left"], left_before)
+
+        # con reloj compartido update() no avanza el tiempo por su cuenta
+        weather.update(5.0)
+        self.assertEqual(weather.get_state()["time_left"], left_before)
+        print("✅ Cambio de reloj: OK")
+
+    def test_04_player_stats_rest_time(self):
+        """last_rest_time usa el reloj inyectado"""
+        print("\n🔸 Test 04: last_rest_time con reloj simulado")
+        clock = SimulatedClock(start=42.0)
+        stats = PlayerStats(clock=clock)
+        self.assertEqual(stats.last_rest_time, 42.0)
+        clock.advance(3.0)
+        stats.update(1.0, is_moving=False)
+        self.assertEqual(stats.last_rest_time, 45.0)
+        print("✅ Stamina con reloj simulado: OK")
+
+
+class TestWeatherForecast(unittest.TestCase):
+    """Muestreo alias O(1) y pronóstico por potencias de la matriz"""
+
+    MATRIX = {
+        "clear": {"clear": 0.6, "clouds": 0.3, "rain": 0.1},
+        "clouds": {"clear": 0.3, "clouds": 0.5, "rain": 0.2},
+        "rain": {"clouds": 0.4, "rain": 0.4, "storm": 0.2},
+    }
+
+    def setUp(self):
+        self.weather = WeatherMarkov(transition_matrix=self.MATRIX, seed=11)
+
+    def test_01_alias_sampling_matches_row(self):
+        """Las frecuencias muestreadas siguen la fila de la matriz"""
+        print("\n🔸 Test 01: Muestreo alias")
+        self.weather.force_state("clear", 1.0)
+        counts = {}
+        n = 20000
+        for _ in range(n):
+            c = self.weather._choose_next_condition()
+            counts[c] = counts.get(c, 0) + 1
+        for target, p in self.MATRIX["clear"].items():
+            self.assertAlmostEqual(counts.get(target, 0) / n, p, delta=0.02)
+        print("✅ Muestreo alias: OK")
+
+    def test_02_forecast_distribution(self):
+        """forecast(k) coincide con el cálculo manual de dos pasos"""
+        print("\n🔸 Test 02: Pronóstico k pasos")
+        two = self.weather.forecast(2, "clear")
+        self.assertAlmostEqual(sum(two.values()), 1.0, places=9)
+        m = self.MATRIX
+        expected_rain = sum(m["clear"][mid] * m.get(mid, {}).get("rain", 0.0) for mid in m["clear"])
+        self.assertAlmostEqual(two["rain"], expected_rain, places=9)
+        # storm no tiene fila: transiciona uniforme entre los estados con fila
+        after_storm = self.weather.forecast(1, "storm")
+        self.assertAlmostEqual(after_storm["clear"], 1.0 / 3.0, places=9)
+        print("✅ Pronóstico: OK")
+
+    def test_03_forecast_respects_prequeue(self):
+        """Los estados forzados en prequeue son deterministas en el pronóstico"""
+        print("\n🔸 Test 03: Pronóstico con prequeue")
+        self.weather.force_state("clear", 1.0)
+        self.weather.push_future("rain")
+        self.assertEqual(self.weather.forecast(1), {"rain": 1.0})
+        self.assertAlmostEqual(self.weather.forecast(2)["storm"], 0.2, places=9)
+        self.assertEqual(self.weather._choose_next_condition(), "rain")
+        self.assertEqual(len(self.weather.prequeue), 0)
+        print("✅ Prequeue: OK")
+
+    def test_04_stationary_distribution(self):
+        """La estacionaria es invariante bajo un paso de la cadena"""
+        print("\n🔸 Test 04: Distribución estacionaria")
+        pi = self.weather.stationary_distribution()
+        self.assertAlmostEqual(sum(pi.values()), 1.0, places=9)
+        states = list(pi)
+        for target in states:
+            stepped = sum(pi[s] * self.weather.forecast(1, s).get(target, 0.0) for s in states)
+            self.assertAlmostEqual(stepped, pi[target], places=6)
+        print("✅ Estacionaria: OK")
+
+
+class TestWeatherRollout(unittest.TestCase):
+    """Curvas esperadas de multiplicador y penalización por Monte Carlo"""
+
+    def setUp(self):
+        self.clock = SimulatedClock()
+        self.weather = WeatherMarkov(seed=5, clock=self.clock)
+        self.weather.force_state("storm", 1.0)
+        self.rollout = WeatherRollout(self.weather, n_chains=500, horizon=240.0, bucket_seconds=30.0, seed=9)
+
+    def test_01_curves_start_at_current_state(self):
+        """El primer bucket refleja el clima actual y luego tiende a la estacionaria"""
+        print("\n🔸 Test 01: Curvas de rollout")
+        curves = self.rollout.expected_curves()
+        self.assertEqual(len(curves["times"]), 9)
+        self.assertAlmostEqual(curves["multiplier"][0], WeatherMarkov.DEFAULT_BASE_MULTIPLIER["storm"])
+        self.assertAlmostEqual(curves["stamina_penalty"][0], WeatherMarkov.stamina_penalty("storm"))
+
+        pi = self.weather.stationary_distribution()
+        # intensidad uniforme en [0.25, 1.0] -> media 0.625
+        expected = sum(p * self.weather.base_multiplier.get(s, 1.0) * 0.625 for s, p in pi.items())
+        self.assertAlmostEqual(curves["multiplier"][-1], expected, delta=0.03)
+        print("✅ Curvas de rollout: OK")
+
+    def test_02_cache_until_state_changes(self):
+        """Las curvas se reutilizan mientras el burst no cambie"""
+        print("\n🔸 Test 02: Caché de rollout")
+        first = self.rollout.expected_curves()
+        self.clock.advance(10.0)
+        again = self.rollout.expected_curves()
+        self.assertEqual(first["multiplier"], again["multiplier"])
+        self.assertAlmostEqual(again["times"][1], 20.0)
+        self.assertAlmostEqual(self.rollout.expected_multiplier(5.0), first["multiplier"][0])
+
+        self.weather.push_future("clear")
+        changed = self.rollout.expected_curves()
+        # a los 60 s del burst todas las cadenas ya consumieron el "clear" forzado
+        self.assertEqual(changed["stamina_penalty"][2], 0.0)
+        print("✅ Caché de rollout: OK")
+
+    def test_03_mean_multiplier_for_trip(self):
+        """El promedio para un recorrido pondera los buckets que abarca"""
+        print("\n🔸 Test 03: Multiplicador medio del recorrido")
+        curves = self.rollout.expected_curves()
+        self.assertAlmostEqual(self.rollout.expected_mean_multiplier(10.0), curves["multiplier"][0])
+        self.assertAlmostEqual(self.rollout.expected_mean_multiplier(90.0), sum(curves["multiplier"][:3]) / 3)
+        # en un recorrido largo pesa también el clima que sigue a la tormenta actual
+        long_trip = self.rollout.expected_mean_multiplier(240.0)
+        self.assertLess(long_trip, curves["multiplier"][0])
+        self.assertGreater(long_trip, min(curves["multiplier"]))
+        print("✅ Multiplicador medio del recorrido: OK")
+
+
+class TestWeatherGrid(unittest.TestCase):
+    """Clima regional por distritos acoplados"""
+
+    def setUp(self):
+        self.clock = SimulatedClock()
+        self.weather = WeatherMarkov(seed=4, clock=self.clock)
+        self.weather.force_state("clear", 1.0)
+        self.grid = WeatherGrid(self.weather, rows=40, cols=40, district_size=8, seed=8)
+
+    def test_01_lookup_by_cell(self):
+        """Las celdas del mismo distrito comparten clima y arrancan con el global"""
+        print("\n🔸 Test 01: Consulta por celda")
+        self.assertEqual(self.grid.d_rows * self.grid.d_cols, 25)
+        self.assertEqual(self.grid.district_of(0, 0), self.grid.district_of(7, 7))
+        self.assertNotEqual(self.grid.district_of(0, 0), self.grid.district_of(8, 0))
+        self.assertEqual(self.grid.condition_at(39, 39), "clear")
+        self.assertEqual(self.grid.district_of(500, -3), self.grid.district_of(39, 0))
+        print("✅ Consulta por celda: OK")
+
+    def test_02_districts_diverge_over_time(self):
+        """Con el tiempo los distritos evolucionan por separado"""
+        print("\n🔸 Test 02: Distritos independientes")
+        changed = 0
+        for _ in range(600):
+            self.clock.advance(1.0)
+            changed += self.grid.update(1.0)
+        self.assertGreater(changed, 25)
+        self.assertGreater(len(set(self.grid.condition)), 1)
+        state = self.grid.state_at(20, 20)
+        for key in ("condition", "intensity", "multiplier", "time_left", "transitioning"):
+            self.assertIn(key, state)
+        print("✅ Distritos independientes: OK")
+
+    def test_03_uses_city_transition_key(self):
+        """La matriz "transition" de city_weather_*.json llega al clima"""
+        print("\n🔸 Test 03: Matriz de la API")
+
+        class FakeApi:
+            def get_weather(self):
+                return {"transition": {"fog": {"fog": 1.0}}}
+
+        weather = WeatherMarkov(api=FakeApi(), seed=1)
+        self.assertEqual(weather.forecast(3, "fog"), {"fog": 1.0})
+        print("✅ Matriz de la API: OK")
+
+
+    def test_04_set_clock_rebases_schedule(self):
+        """Al cambiar de reloj los distritos conservan su tiempo restante"""
+        print("\n🔸 Test 04: Cambio de reloj en el clima regional")
+        self.clock.advance(10.0)
+        self.grid.update(0.0)
+        left_before = [t - self.clock.now() for t in self.grid.next_switch]
+
+        shared = SimulatedClock(start=5000.0)
+        self.weather.set_clock(shared)
+        self.grid.set_clock(shared)
+        left_after = [t - shared.now() for t in self.grid.next_switch]
+        for a, b in zip(left_before, left_after):
+            self.assertAlmostEqual(a, b)
+
+        # sin el rebase todos los distritos vencerían en el primer update
+        self.assertEqual(self.grid.update(0.0), 0)
+        self.assertEqual(self.grid.state_at(0, 0)["multiplier"], self.grid.to_mult[0])
+        print("✅ Cambio de reloj regional: OK")
+
+
+class TestWeatherSnapshot(unittest.TestCase):
+    """Snapshot inmutable por tick con número de versión"""
+
+    def test_01_snapshot_shared_within_tick(self):
+        """update() construye un solo snapshot; la versión sigue los cambios"""
+        print("\n🔸 Test 01: Snapshot por tick")
+        weather = WeatherMarkov(seed=2)
+        weather.force_state("rain", 0.8)
+        weather.update(1.0)
+        snap = weather.snapshot()
+        self.assertIs(weather.snapshot(), snap)
+        self.assertEqual(snap.condition, "rain")
+        self.assertEqual(snap.get("multiplier"), round(0.85 * 0.8, 3))
+        with self.assertRaises(Exception):
+            snap.condition = "clear"
+
+        # un tick sin cambios de clima conserva la versión
+        weather.update(1.0)
+        self.assertIsNot(weather.snapshot(), snap)
+        self.assertEqual(weather.snapshot().version, snap.version)
+
+        weather.force_state("storm", 1.0)
+        self.assertGreater(weather.snapshot().version, snap.version)
+        print("✅ Snapshot por tick: OK")
+
+    def test_02_apply_to_game_state_uses_snapshot(self):
+        """apply_to_game_state publica el mismo payload que get_state()"""
+        print("\n🔸 Test 02: Payload del snapshot")
+        weather = WeatherMarkov(seed=6)
+        weather.force_state("fog", 0.5)
+        state = {}
+        weather.apply_to_game_state(state)
+        self.assertEqual(state["weather_state"], weather.get_state())
+        print("✅ Payload del snapshot: OK")
+
+
+if __name__ == "__main__":
+    unittest.main()
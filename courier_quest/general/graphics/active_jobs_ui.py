@@ -30,14 +30,13 @@ class ActiveJobsUI:
 
         if v.job_manager and v.game_manager:
             try:
-                active_jobs = [j for j in v.job_manager.all_jobs() if
-                               getattr(j, "accepted", False) and not getattr(j, "completed", False)]
+                active_jobs = list(v.job_manager.get_active_jobs())
 
                 # Ordenar por deadline (tiempo restante)
                 def get_deadline_priority(job):
                     try:
                         if v.game_manager and hasattr(v.game_manager, 'get_job_time_remaining'):
-                            remaining = v.game_manager.get_job_time_remaining(getattr(job, "raw", {}))
+                            remaining = v.game_manager.get_job_time_remaining(job)
                             return remaining if remaining != float('inf') else 999999
                         return 999999
                     except Exception:
@@ -105,42 +104,35 @@ class ActiveJobsUI:
         else:
             arcade.Text("Sistemas cargando...", left + 16, top - 40, (180, 196, 220), 10).draw()
 
+    @staticmethod
+    def _acceptance_window(job):
+        """(release_time, accepted_at) ya normalizados en el Job; accepted_at None si no aplica."""
+        release_time = getattr(job, "release_time", 0.0) or 0.0
+        accepted_at = getattr(job, "accepted_at", None)
+        if accepted_at is None or release_time <= 0.0:
+            return release_time, None
+        return release_time, accepted_at
+
     def _get_release_time_text(self, view, job) -> str:
         """Muestra el cronómetro de entrega basado en release_time desde la aceptación.
         Si no hay aceptación registrada, se usa el comportamiento anterior (liberación)."""
         try:
             current_time = view.game_manager.get_game_time() if view.game_manager else 0
-            raw_data = getattr(job, "raw", {}) or {}
-            release_time = raw_data.get("release_time", 0)
-            accepted_at = raw_data.get("accepted_at", None)
-            if accepted_at is None:
-                accepted_at = getattr(job, "accepted_at", None)
+            release_time, accepted_at = self._acceptance_window(job)
 
-            try:
-                release_time = float(release_time or 0.0)
-            except (TypeError, ValueError):
-                release_time = 0.0
-            try:
-                accepted_at = float(accepted_at) if accepted_at is not None else None
-            except (TypeError, ValueError):
-                accepted_at = None
-
-            if accepted_at is not None and release_time > 0.0:
-                remaining = release_time - (float(current_time) - accepted_at)
+            if accepted_at is not None:
+                remaining = release_time - (current_time - accepted_at)
                 minutes = int(abs(remaining) // 60)
                 seconds = int(abs(remaining) % 60)
                 # Mostrar porcentaje restante cuando está en curso
                 if remaining >= 0:
-                    try:
-                        percent = (remaining / release_time) * 100 if release_time else 0
-                    except Exception:
-                        percent = 0
+                    percent = (remaining / release_time) * 100
                     return f"⏳ Tiempo restante: {minutes:02d}:{seconds:02d} ({percent:.0f}%)"
                 else:
                     return f"⏰ Tarde: {minutes:02d}:{seconds:02d}"
 
             # Fallback: comportamiento original de liberación
-            elapsed_since_release = float(current_time) - float(raw_data.get("release_time", 0) or 0.0)
+            elapsed_since_release = current_time - release_time
             if elapsed_since_release < 0:
                 remaining = abs(elapsed_since_release)
                 minutes = int(remaining // 60)
@@ -158,25 +150,11 @@ class ActiveJobsUI:
         Retorna None si no aplica (no aceptado, sin release_time o ya tarde)."""
         try:
             current_time = view.game_manager.get_game_time() if view.game_manager else 0
-            raw_data = getattr(job, "raw", {}) or {}
-            release_time = raw_data.get("release_time", 0)
-            accepted_at = raw_data.get("accepted_at", None)
-            if accepted_at is None:
-                accepted_at = getattr(job, "accepted_at", None)
-
-            try:
-                release_time = float(release_time or 0.0)
-            except (TypeError, ValueError):
-                release_time = 0.0
-            try:
-                accepted_at = float(accepted_at) if accepted_at is not None else None
-            except (TypeError, ValueError):
-                accepted_at = None
-
-            if accepted_at is not None and release_time > 0.0:
-                remaining = release_time - (float(current_time) - accepted_at)
+            release_time, accepted_at = self._acceptance_window(job)
+            if accepted_at is not None:
+                remaining = release_time - (current_time - accepted_at)
                 if remaining >= 0:
-                    return max(0.0, (remaining / release_time) * 100) if release_time else 0.0
+                    return max(0.0, (remaining / release_time) * 100)
             return None
         except Exception:
             return None
@@ -186,12 +164,11 @@ class ActiveJobsUI:
         Si no hay deadline, retorna (None, arcade.color.WHITE).
         """
         try:
-            raw = getattr(job, "raw", {}) or {}
-            if not raw.get("deadline"):
+            if getattr(job, "deadline_at", None) is None:
                 return None, arcade.color.WHITE
 
-            remaining = view.game_manager.get_job_time_remaining(raw)
-            total = view.game_manager.get_job_total_time(raw)
+            remaining = view.game_manager.get_job_time_remaining(job)
+            total = view.game_manager.get_job_total_time(job)
 
             if remaining == float('inf') or total == float('inf'):
                 return None, arcade.color.WHITE
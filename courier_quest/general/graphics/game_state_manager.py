@@ -9,6 +9,7 @@ from typing import Any
 
 from ..game.game_manager import GameManager
 from ..game.jobs_manager import JobManager
+from ..game.job_feed import JobFeed
 
 
 class GameStateManager:
@@ -196,21 +197,23 @@ class GameStateManager:
             orders = self.parent.state.get("orders") or self.parent.state.get("jobs_data", [])
         else:
             orders = getattr(self.parent.state, "orders", None) or getattr(self.parent.state, "jobs_data", [])
-        orders = list(orders or [])
+        orders = orders or []
 
         self.parent.incoming_raw_jobs = []
         self.parent.rejected_raw_jobs = []
         self.parent.accepted_raw_jobs = []
 
-        # 2) separar aceptados vs pendientes
-        for r in orders:
-            if r and r.get("accepted"):
-                self.parent.accepted_raw_jobs.append(r)
-            else:
-                self.parent.incoming_raw_jobs.append(r)
+        # 2) separar aceptados; los pendientes no se copian, los entrega el JobFeed
+        if isinstance(orders, (list, tuple)):
+            self.parent.accepted_raw_jobs = [r for r in orders if r and r.get("accepted") and not r.get("archived")]
+        else:
+            orders = iter(orders)  # streaming (p. ej. ApiClient.iter_jobs): sin aceptados guardados
 
-        # 3) sembrar los aceptados usando coordenadas guardadas
+        # 3) sembrar los aceptados usando coordenadas guardadas (y el historial archivado)
         if self.job_manager:
+            saved_archive = self.parent.state.get("job_archive") if isinstance(self.parent.state, dict) else None
+            if saved_archive and hasattr(self.job_manager, "archive") and not len(self.job_manager.archive):
+                self.job_manager.archive.extend(saved_archive)
             for raw in self.parent.accepted_raw_jobs:
                 try:
                     jid = raw.get("id") or raw.get("job_id")
@@ -259,19 +262,21 @@ class GameStateManager:
                 except Exception as e:
                     print(f"[SEED] Error sembrando job aceptado: {e}")
 
-        # 4) filtrar pendientes por ids ya aceptados
+        # 4) pendientes (sin los ya aceptados) se liberan por release_time
         accepted_ids = {(r.get("id") or r.get("job_id")) for r in self.parent.accepted_raw_jobs}
-        self.parent.incoming_raw_jobs = [r for r in self.parent.incoming_raw_jobs if (r.get("id") or r.get("job_id")) not in accepted_ids]
-        print(f"[JOBS] Cargados {len(self.parent.incoming_raw_jobs)} pendientes, {len(self.parent.accepted_raw_jobs)} aceptados")
+        self.parent.job_feed = JobFeed(
+            (r for r in orders if r and not r.get("accepted") and not r.get("archived")
+             and (r.get("id") or r.get("job_id")) not in accepted_ids),
+            lookahead=getattr(self.parent, "JOB_FEED_LOOKAHEAD", 30.0),
+        )
+        print(f"[JOBS] {len(self.parent.accepted_raw_jobs)} aceptados; pendientes por release_time vía JobFeed")
 
         # 5) Limpiar inventario: remover trabajos completados y recalcular peso
         try:
             inv = self.parent.state.get("inventory") if isinstance(self.parent.state, dict) else getattr(self.parent.state, "inventory", None)
-            if inv and hasattr(inv, 'deque') and inv.deque:
-                # Remover trabajos completados
-                inv.deque = [job for job in inv.deque if not getattr(job, 'completed', False)]
-                # Recalcular peso actual
-                inv.current_weight = sum(float(getattr(job, 'weight', 0.0)) for job in inv.deque)
+            if inv and hasattr(inv, "prune"):
+                # Remover trabajos completados (prune también descuenta su peso)
+                inv.prune(lambda job: getattr(job, 'completed', False))
                 print(f"[INVENTORY] Limpiado: {len(inv.deque)} items restantes, peso total {inv.current_weight:.1f}")
         except Exception as e:
             print(f"[LOAD] Error limpiando inventario: {e}")
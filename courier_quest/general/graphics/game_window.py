@@ -9,6 +9,7 @@ from .map_manager import GameMap, FLIP_Y
 from ..game.player_manager import Player
 from ..game.player_stats import PlayerStats
 from ..game.weather_markov import WeatherMarkov
+from ..game.weather_grid import WeatherGrid
 from .weather_renderer import WeatherRenderer
 from .inventory_ui import InventoryUI
 from .notification_manager import NotificationManager
@@ -32,6 +33,7 @@ from .drawing_utils import _draw_rect_lrbt_filled, _draw_rect_lrbt_outline
 
 from ..game.game_manager import GameManager
 from ..game.jobs_manager import JobManager
+from ..game.job_feed import JobFeed
 
 # Intento de import (para partidas nuevas) — no falla si no existe
 try:
@@ -46,6 +48,10 @@ TILE_SIZE = 24
 
 
 class MapPlayerView(View):
+    # Clima regional por distritos (WeatherGrid); desactivado = clima global único
+    REGIONAL_WEATHER = False
+    WEATHER_DISTRICT_SIZE = 8
+
     def __init__(self, state) -> None:
         super().__init__()
         self.state = state or {}
@@ -103,6 +109,8 @@ class MapPlayerView(View):
 
         # notifs/jobs
         self.incoming_raw_jobs: List[dict] = []
+        self.job_feed = None
+        self.JOB_FEED_LOOKAHEAD = 30.0
         self.rejected_raw_jobs: List[dict] = []
         self.accepted_job_ids = set()
         self.accepted_raw_jobs: List[dict] = []
@@ -131,6 +139,9 @@ class MapPlayerView(View):
 
         self.weather_markov = WeatherMarkov(api=ApiClient())
         self.weather_renderer = WeatherRenderer(self)
+        self.weather_grid = None
+        if self.REGIONAL_WEATHER and rows and cols:
+            self.weather_grid = WeatherGrid(self.weather_markov, rows, cols, self.WEATHER_DISTRICT_SIZE)
 
         self._last_input_time = 0.0
         self.INPUT_ACTIVE_WINDOW = 0.25
@@ -468,6 +479,12 @@ class MapPlayerView(View):
                 game_manager.player_manager = self.player
             except Exception:
                 pass
+            # clima y stamina de la vista avanzan con el reloj simulado (respeta time_scale)
+            try:
+                if hasattr(game_manager, "bind_clock"):
+                    game_manager.bind_clock(self)
+            except Exception:
+                pass
         self._load_initial_jobs()
 
     def _load_initial_jobs(self):
@@ -476,21 +493,23 @@ class MapPlayerView(View):
             orders = self.state.get("orders") or self.state.get("jobs_data", [])
         else:
             orders = getattr(self.state, "orders", None) or getattr(self.state, "jobs_data", [])
-        orders = list(orders or [])
+        orders = orders or []
 
         self.incoming_raw_jobs = []
         self.rejected_raw_jobs = []
         self.accepted_raw_jobs = []
 
-        # 2) separar aceptados vs pendientes
-        for r in orders:
-            if r and r.get("accepted"):
-                self.accepted_raw_jobs.append(r)
-            else:
-                self.incoming_raw_jobs.append(r)
+        # 2) separar aceptados; los pendientes no se copian, los entrega el JobFeed
+        if isinstance(orders, (list, tuple)):
+            self.accepted_raw_jobs = [r for r in orders if r and r.get("accepted") and not r.get("archived")]
+        else:
+            orders = iter(orders)  # streaming (p. ej. ApiClient.iter_jobs): sin aceptados guardados
 
-        # 3) sembrar los aceptados usando coordenadas guardadas
+        # 3) sembrar los aceptados usando coordenadas guardadas (y el historial archivado)
         if self.job_manager:
+            saved_archive = self.state.get("job_archive") if isinstance(self.state, dict) else None
+            if saved_archive and hasattr(self.job_manager, "archive") and not len(self.job_manager.archive):
+                self.job_manager.archive.extend(saved_archive)
             for raw in self.accepted_raw_jobs:
                 try:
                     jid = raw.get("id") or raw.get("job_id")
@@ -541,21 +560,22 @@ class MapPlayerView(View):
                 except Exception as e:
                     print(f"[SEED] Error sembrando job aceptado: {e}")
 
-        # 4) filtrar pendientes por ids ya aceptados
+        # 4) pendientes (sin los ya aceptados) se liberan por release_time
         accepted_ids = {(r.get("id") or r.get("job_id")) for r in self.accepted_raw_jobs}
-        self.incoming_raw_jobs = [r for r in self.incoming_raw_jobs if
-                                  (r.get("id") or r.get("job_id")) not in accepted_ids]
-        print(f"[JOBS] Cargados {len(self.incoming_raw_jobs)} pendientes, {len(self.accepted_raw_jobs)} aceptados")
+        self.job_feed = JobFeed(
+            (r for r in orders if r and not r.get("accepted") and not r.get("archived")
+             and (r.get("id") or r.get("job_id")) not in accepted_ids),
+            lookahead=self.JOB_FEED_LOOKAHEAD,
+        )
+        print(f"[JOBS] {len(self.accepted_raw_jobs)} aceptados; pendientes por release_time vía JobFeed")
 
         # 5) Limpiar inventario: remover trabajos completados y recalcular peso
         try:
             inv = self.state.get("inventory") if isinstance(self.state, dict) else getattr(self.state, "inventory",
                                                                                            None)
-            if inv and hasattr(inv, 'deque') and inv.deque:
-                # Remover trabajos completados
-                inv.deque = [job for job in inv.deque if not getattr(job, 'completed', False)]
-                # Recalcular peso actual
-                inv.current_weight = sum(float(getattr(job, 'weight', 0.0)) for job in inv.deque)
+            if inv and hasattr(inv, "prune"):
+                # Remover trabajos completados (prune también descuenta su peso)
+                inv.prune(lambda job: getattr(job, 'completed', False))
                 print(f"[INVENTORY] Limpiado: {len(inv.deque)} items restantes, peso total {inv.current_weight:.1f}")
         except Exception as e:
             print(f"[LOAD] Error limpiando inventario: {e}")
@@ -756,6 +776,9 @@ class MapPlayerView(View):
                         deliveries += 1
                         if getattr(j, "delivered_on_time", False):
                             on_time += 1
+                archive = getattr(self.job_manager, "archive", None)
+                if archive is not None:
+                    deliveries += archive.count("completed")
         except Exception:
             pass
         try:
@@ -1110,7 +1133,13 @@ class MapPlayerView(View):
                 pass
             return
 
-        # Eliminado: snapshots de UndoManager para evitar conflictos con GameManager.undo
+        # una captura de deshacer por acción (UndoManager delega en el UndoLog de GameManager)
+        if key in (arcade.key.UP, arcade.key.DOWN, arcade.key.LEFT, arcade.key.RIGHT,
+                   arcade.key.P, arcade.key.E):
+            try:
+                self.undo.snapshot()
+            except Exception:
+                pass
 
         # P: pickup manual (misma o adyacente)
         if key == arcade.key.P:
@@ -1164,9 +1193,7 @@ class MapPlayerView(View):
                         on_time = True
                         try:
                             if hasattr(self.game_manager, "get_job_time_remaining"):
-                                rem = self.game_manager.get_job_time_remaining(
-                                    getattr(job, "raw", {}) if job is not None else {}
-                                )
+                                rem = self.game_manager.get_job_time_remaining(job if job is not None else {})
                                 # on_time = True si no hay deadline o si aún hay tiempo restante
                                 on_time = (rem == float("inf")) or (rem >= 0)
                         except Exception:
@@ -1369,12 +1396,10 @@ class MapPlayerView(View):
                 pass
 
     def _undo_one_step(self):
-        undone = False
-        if self.game_manager and hasattr(self.game_manager, 'undo_last_action'):
-            try:
-                undone = bool(self.game_manager.undo_last_action())
-            except Exception:
-                undone = False
+        try:
+            undone = bool(self.undo.restore())
+        except Exception:
+            undone = False
         if undone:
             self.show_notification("Última acción deshecha")
         else:
@@ -1689,23 +1714,10 @@ class MapPlayerView(View):
         steps_done = 0
         success = False
         try:
-            if self.game_manager and hasattr(self.game_manager, "undo_system") and self.game_manager.undo_system:
-                try:
-                    avail = int(self.game_manager.undo_system.get_history_size())
-                except Exception:
-                    avail = None
-                to_undo = n
-                if isinstance(avail, int):
-                    to_undo = max(0, min(n, avail))
-                success = bool(self.game_manager.undo_n_steps(n))
-                steps_done = to_undo if success else 0
-            elif hasattr(self, "undo") and hasattr(self.undo, "restore"):
-                for i in range(max(0, n)):
-                    if self.undo.restore():
-                        steps_done += 1
-                        success = True
-                    else:
-                        break
+            avail = self.undo.get_history_size()
+            if self.undo.restore(n):
+                steps_done = min(n, avail)
+                success = True
         except Exception:
             success = False
         if success and steps_done > 0:
@@ -89,9 +89,7 @@ class InputHandler:
                         on_time = True
                         try:
                             if hasattr(self.parent.game_manager, "get_job_time_remaining"):
-                                rem = self.parent.game_manager.get_job_time_remaining(
-                                    getattr(job, "raw", {}) if job is not None else {}
-                                )
+                                rem = self.parent.game_manager.get_job_time_remaining(job if job is not None else {})
                                 # on_time = True si no hay deadline o si aún hay tiempo restante
                                 on_time = (rem == float("inf")) or (rem >= 0)
                         except Exception:
@@ -6,6 +6,7 @@ from typing import Any, List
 class InventoryUI:
     def __init__(self, view: Any) -> None:
         self.view = view
+        self._drawn_key = None  # (inventario, versión, modo, índice) del último texto armado
 
     # Drawing of the inventory panel (delegated from MapPlayerView._draw_panel)
     def draw(self) -> None:
@@ -20,13 +21,23 @@ class InventoryUI:
             inventory = view.state.get("inventory", None)
         else:
             inventory = getattr(view.state, "inventory", None)
+        version = getattr(inventory, "version", None)
+        key = (id(inventory), version, view.inventory_sort_mode, view.inventory_view_index)
+        if version is not None and key == self._drawn_key:
+            # sin cambios desde el último frame: no se recalcula el texto
+            view.inventory_text.draw()
+            return
+
         if inventory:
             try:
                 weight = getattr(inventory, "current_weight", 0)
                 max_weight = getattr(inventory, "max_weight", 10)
 
                 # Collect items from inventory structure
-                if hasattr(inventory, 'get_deque_values'):
+                if hasattr(inventory, "view_slice"):
+                    # vistas ordenadas mantenidas por el inventario: sin ordenar ni copiar
+                    inventory_items = inventory.view_slice(view.inventory_sort_mode, view.inventory_view_index, 4)
+                elif hasattr(inventory, 'get_deque_values'):
                     inventory_items: List[Any] = inventory.get_deque_values()
                 else:
                     inventory_items = []
@@ -34,8 +45,10 @@ class InventoryUI:
                         for item in inventory.deque:
                             inventory_items.append(getattr(item, "val", item))
 
-                # Optional sorting
-                if view.inventory_sort_mode == "priority":
+                # Optional sorting (solo inventarios sin vistas propias)
+                if hasattr(inventory, "view_slice"):
+                    pass
+                elif view.inventory_sort_mode == "priority":
                     try:
                         inventory_items = sorted(
                             inventory_items,
@@ -53,7 +66,10 @@ class InventoryUI:
                         pass
 
                 items: List[str] = []
-                view_slice = inventory_items[view.inventory_view_index:view.inventory_view_index + 4]
+                if hasattr(inventory, "view_slice"):
+                    view_slice = inventory_items
+                else:
+                    view_slice = inventory_items[view.inventory_view_index:view.inventory_view_index + 4]
                 for job in view_slice:
                     job_id = getattr(job, "id", job.get("id") if isinstance(job, dict) else str(job))
                     items.append(f"- {job_id}")
@@ -65,6 +81,7 @@ class InventoryUI:
             inventory_info = "Peso: 0/10kg\n- Vacío"
 
         view.inventory_text.text = inventory_info
+        self._drawn_key = key
         view.inventory_text.draw()
 
     # Key handling for inventory navigation and sorting.
@@ -103,15 +120,14 @@ class InventoryUI:
         if not inventory:
             return False
         try:
-            if hasattr(inventory, 'get_deque_values'):
-                inventory_items = inventory.get_deque_values()
+            if hasattr(inventory, 'deque'):
+                count = len(inventory.deque)
+            elif hasattr(inventory, 'get_deque_values'):
+                count = len(inventory.get_deque_values())
             else:
-                inventory_items = []
-                if hasattr(inventory, 'deque'):
-                    for item in inventory.deque:
-                        inventory_items.append(getattr(item, "val", item))
+                count = 0
 
-            if view.inventory_view_index + 4 < len(inventory_items):
+            if view.inventory_view_index + 4 < count:
                 view.inventory_view_index += 1
                 if hasattr(view, "show_notification"):
                     view.show_notification("▶ Página siguiente del inventario")
@@ -126,6 +142,8 @@ class InventoryUI:
             view.inventory_sort_mode = "priority"
         elif view.inventory_sort_mode == "priority":
             view.inventory_sort_mode = "deadline"
+        elif view.inventory_sort_mode == "deadline":
+            view.inventory_sort_mode = "weight"
         else:
             view.inventory_sort_mode = "normal"
         if hasattr(view, "show_notification"):
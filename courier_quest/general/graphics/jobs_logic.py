@@ -8,6 +8,9 @@ import arcade
 class JobsLogic:
     def __init__(self, view: Any) -> None:
         self.view = view
+        # total pagado por jobs completados, cacheado por JobManager.state_version
+        self._completed_total_version = -1
+        self._completed_total = 0.0
 
     # Drawing markers on the map for pickups and dropoffs
     def draw_job_markers(self) -> None:
@@ -15,26 +18,25 @@ class JobsLogic:
         if not v.job_manager:
             return
         try:
-            for job in v.job_manager.all_jobs():
-                if getattr(job, "accepted", False) and not getattr(job, "picked_up", False):
-                    px_c, py_c = v._get_job_pickup_coords(job)
-                    if px_c is not None and py_c is not None:
-                        px, py = v._cell_to_pixel(int(px_c), int(py_c))
-                        arcade.draw_circle_filled(px, py, v.TILE_SIZE * 0.4, arcade.color.GOLD)
-                        arcade.draw_circle_outline(px, py, v.TILE_SIZE * 0.4, arcade.color.BLACK, 2)
-                        job_label = getattr(job, "id", None) or (getattr(job, "raw", {}) or {}).get("id", "PICKUP")
-                        from arcade import Text
-                        Text(f"{job_label}", px - 18, py + 15, arcade.color.BLACK, 8).draw()
-
-                if getattr(job, "picked_up", False) and not getattr(job, "completed", False):
-                    dx_c, dy_c = v._get_job_dropoff_coords(job)
-                    if dx_c is not None and dy_c is not None:
-                        dx, dy = v._cell_to_pixel(int(dx_c), int(dy_c))
-                        v._draw_centered_rect_filled(dx, dy, v.TILE_SIZE * 0.6, v.TILE_SIZE * 0.6, arcade.color.RED)
-                        v._draw_centered_rect_outline(dx, dy, v.TILE_SIZE * 0.6, v.TILE_SIZE * 0.6, arcade.color.BLACK, 2)
-                        drop_label = getattr(job, "id", None) or (getattr(job, "raw", {}) or {}).get("id", "DROPOFF")
-                        from arcade import Text
-                        Text(f"{drop_label}", dx - 25, dy + 15, arcade.color.WHITE, 8).draw()
+            for job in v.job_manager.jobs_in_state("accepted"):
+                px_c, py_c = v._get_job_pickup_coords(job)
+                if px_c is not None and py_c is not None:
+                    px, py = v._cell_to_pixel(int(px_c), int(py_c))
+                    arcade.draw_circle_filled(px, py, v.TILE_SIZE * 0.4, arcade.color.GOLD)
+                    arcade.draw_circle_outline(px, py, v.TILE_SIZE * 0.4, arcade.color.BLACK, 2)
+                    job_label = getattr(job, "id", None) or (getattr(job, "raw", {}) or {}).get("id", "PICKUP")
+                    from arcade import Text
+                    Text(f"{job_label}", px - 18, py + 15, arcade.color.BLACK, 8).draw()
+
+            for job in v.job_manager.jobs_in_state("carried"):
+                dx_c, dy_c = v._get_job_dropoff_coords(job)
+                if dx_c is not None and dy_c is not None:
+                    dx, dy = v._cell_to_pixel(int(dx_c), int(dy_c))
+                    v._draw_centered_rect_filled(dx, dy, v.TILE_SIZE * 0.6, v.TILE_SIZE * 0.6, arcade.color.RED)
+                    v._draw_centered_rect_outline(dx, dy, v.TILE_SIZE * 0.6, v.TILE_SIZE * 0.6, arcade.color.BLACK, 2)
+                    drop_label = getattr(job, "id", None) or (getattr(job, "raw", {}) or {}).get("id", "DROPOFF")
+                    from arcade import Text
+                    Text(f"{drop_label}", dx - 25, dy + 15, arcade.color.WHITE, 8).draw()
         except Exception as e:
             print(f"[ERROR] Dibujando marcadores: {e}")
 
@@ -44,14 +46,13 @@ class JobsLogic:
         if not v.job_manager:
             return
         try:
-            for job in v.job_manager.all_jobs():
-                if getattr(job, "completed", False):
-                    jid = getattr(job, "id", None)
-                    if jid and jid not in v._counted_deliveries:
-                        payout = v._get_job_payout(job)
-                        if payout > 0:
-                            v._add_money(payout)
-                        v._counted_deliveries.add(jid)
+            for job in v.job_manager.jobs_in_state("completed"):
+                jid = getattr(job, "id", None)
+                if jid and jid not in v._counted_deliveries:
+                    payout = v._get_job_payout(job)
+                    if payout > 0:
+                        v._add_money(payout)
+                    v._counted_deliveries.add(jid)
         except Exception as e:
             print(f"[MONEY] Error sincronizando entregas: {e}")
 
@@ -60,10 +61,15 @@ class JobsLogic:
         if not v.job_manager:
             return
         try:
-            computed = 0.0
-            for job in v.job_manager.all_jobs():
-                if getattr(job, "completed", False):
-                    computed += v._get_job_payout(job)
+            jm = v.job_manager
+            version = getattr(jm, "state_version", None)
+            if version is None or version != self._completed_total_version:
+                if hasattr(jm, "completed_payout"):
+                    self._completed_total = jm.completed_payout(v._get_job_payout)
+                else:
+                    self._completed_total = sum(v._get_job_payout(job) for job in jm.jobs_in_state("completed"))
+                self._completed_total_version = -1 if version is None else version
+            computed = self._completed_total
             current = v._get_state_money()
             if computed > current:
                 v._set_state_money(computed)
@@ -116,12 +122,8 @@ class JobsLogic:
         py = int(v.player.cell_y)
         picked_any = False
         try:
-            for job in v.job_manager.all_jobs():
-                if not getattr(job, "accepted", False):
-                    continue
-                if getattr(job, "picked_up", False) or getattr(job, "completed", False):
-                    continue
-
+            # índice espacial: solo pickups en la celda del jugador o adyacentes
+            for job in v.job_manager.pickups_near(px, py):
                 jpx, jpy = v._get_job_pickup_coords(job)
                 if jpx is None or jpy is None:
                     continue
@@ -154,12 +156,7 @@ class JobsLogic:
             return False
         delivered_any = False
         try:
-            for job in v.job_manager.all_jobs():
-                if not getattr(job, "accepted", False) or not getattr(job, "picked_up", False):
-                    continue
-                if getattr(job, "completed", False):
-                    continue
-
+            for job in v.job_manager.dropoffs_near(px, py):
                 dx, dy = v._get_job_dropoff_coords(job)
                 if dx is None or dy is None:
                     continue
@@ -181,7 +178,7 @@ class JobsLogic:
                     on_time = True
                     try:
                         if v.game_manager and hasattr(v.game_manager, "get_job_time_remaining"):
-                            rem = v.game_manager.get_job_time_remaining(getattr(job, "raw", {}) or {})
+                            rem = v.game_manager.get_job_time_remaining(job)
                             # on_time = True si no hay deadline o si aún hay tiempo restante
                             on_time = (rem == float("inf")) or (rem >= 0)
                     except Exception:
@@ -225,7 +222,7 @@ class JobsLogic:
                 if v.game_manager and job and deadline:
                     remaining = None
                     try:
-                        remaining = v.game_manager.get_job_time_remaining(raw_data)
+                        remaining = v.game_manager.get_job_time_remaining(job)
                         print(f"[TIME] Job {jid}: remaining time = {remaining}s")
                     except Exception as e:
                         print(f"[TIME] Error obteniendo tiempo restante: {e}")
@@ -237,7 +234,7 @@ class JobsLogic:
                         print(f"[TIME] No deadline - marking as on-time")
                     elif remaining >= 0:
                         try:
-                            total_time = v.game_manager.get_job_total_time(raw_data)
+                            total_time = v.game_manager.get_job_total_time(job)
                         except Exception as e:
                             print(f"[TIME] Error obteniendo tiempo total: {e}")
                             total_time = None
@@ -287,7 +284,7 @@ class JobsLogic:
         v.jobs_title.draw()
         if v.job_manager and v.game_manager:
             try:
-                active_jobs = [j for j in v.job_manager.all_jobs() if getattr(j, "accepted", False) and not getattr(j, "completed", False)]
+                active_jobs = v.job_manager.get_active_jobs()
                 jobs_info = []
                 for job in active_jobs[:8]:
                     status = "✓" if getattr(job, "picked_up", False) else "📦"
@@ -30,21 +30,24 @@ class NotificationManager:
         try:
             current_game_time = v.game_manager.get_game_time()
 
-            # Filtrar trabajos cuyo release_time ya pasó
-            available_now = []
-            for job_data in v.incoming_raw_jobs[:]:  # Copia para modificar
-                release_time = job_data.get("release_time", 0)
-
-                # ✅ USAR release_time REAL, no timer artificial
-                if release_time <= current_game_time:
-                    available_now.append(job_data)
-                    v.incoming_raw_jobs.remove(job_data)
-
-            # Mostrar notificaciones para trabajos disponibles
-            for job_data in available_now:
-                if not v.job_notification_active:
-                    self.spawn_next_notification_immediate(job_data)
-                    break  # Mostrar uno a la vez
+            # Traer del feed solo lo que está por liberarse (lookahead)
+            feed = getattr(v, "job_feed", None)
+            if feed is not None:
+                v.incoming_raw_jobs.extend(feed.pull(current_game_time))
+
+            # ✅ USAR release_time REAL, no timer artificial
+            released = [job_data for job_data in v.incoming_raw_jobs
+                        if job_data.get("release_time", 0) <= current_game_time]
+            if not released:
+                return
+
+            # Mostrar uno a la vez: el de mejor ganancia/segundo; los demás esperan en la cola
+            pick = getattr(v.game_manager, "pick_offer", None)
+            job_data = pick(released, current_game_time) if pick else released[0]
+            if job_data is None:
+                return
+            v.incoming_raw_jobs.remove(job_data)
+            self.spawn_next_notification_immediate(job_data)
 
         except Exception as e:
             print(f"[NOTIFICATION] Error verificando trabajos: {e}")
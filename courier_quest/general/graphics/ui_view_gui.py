@@ -340,6 +340,15 @@ def build_save_snapshot(game_view, state_obj_or_dict):
         for a in accepted:
             merged_by_id[_jid(a)] = a  # los aceptados pisan cualquier duplicado
 
+        # jobs ya archivados: se marcan para no volver a ofrecerlos al cargar
+        archive = getattr(jm, "archive", None)
+        if archive is not None:
+            for rec in archive:
+                rd = dict(merged_by_id.get(rec.id) or {"id": rec.id})
+                rd["archived"] = rec.outcome
+                merged_by_id[rec.id] = rd
+            out["job_archive"] = archive.to_list()
+
         merged = [v for k, v in merged_by_id.items() if k is not None]
         out["orders"] = merged
         out["jobs_data"] = merged
@@ -1102,16 +1111,8 @@ class MapPlayerViewWithPause(MapPlayerView):
                 if hasattr(self, "_undo_one_step"):
                     self._undo_one_step()
                 else:
-                    # fallback: una acción de deshacer
-                    undone = False
-                    if self.game_manager and hasattr(self.game_manager, 'undo_last_action'):
-                        try:
-                            undone = bool(self.game_manager.undo_last_action())
-                        except Exception:
-                            undone = False
-                    if not undone and hasattr(self, 'undo') and hasattr(self.undo, 'restore'):
-                        if self.undo.restore():
-                            undone = True
+                    # fallback: una acción de deshacer (UndoManager delega en el motor del GameManager)
+                    undone = bool(self.undo.restore())
                     if undone:
                         self.show_notification("Última acción deshecha")
                     else:
@@ -2,27 +2,91 @@
 from __future__ import annotations
 
 import copy
-from typing import Any, List, Dict
+from typing import Any, Dict
+
+from ..game.undo_history import SnapshotHistory
+
+# Datos que no cambian durante la partida (mapa con su legend, definiciones de
+# pedidos, datos crudos del clima): los snapshots los comparten por referencia
+# en lugar de copiarlos; solo se copia el estado mutable (incluido job_archive,
+# que crece con cada entrega).
+SHARED_KEYS = frozenset({"map_data", "city_map", "orders", "jobs_data", "weather_data"})
+
+
+def copy_state(values: Dict[str, Any]) -> Dict[str, Any]:
+    """Copia profunda de `values` salvo las claves de SHARED_KEYS, que se comparten.
+
+    Los objetos compartidos también se respetan dentro de los valores copiados
+    (memo de deepcopy), así nada mutable arrastra una copia del mapa.
+    """
+    memo: Dict[int, Any] = {}
+    for key in SHARED_KEYS:
+        val = values.get(key)
+        if val is not None:
+            memo[id(val)] = val
+    return {k: (val if k in SHARED_KEYS else copy.deepcopy(val, memo)) for k, val in values.items()}
 
 
 class UndoManager:
-    def __init__(self, view: Any, max_depth: int = 50) -> None:
+    """
+    Deshacer de la vista. Con un GameManager que tenga UndoLog, todo pasa por ese
+    único motor: la vista registra allí su dinero, stats e inventario, y
+    snapshot()/restore() capturan y restauran ambas capas en un solo paso.
+    Sin GameManager se usan snapshots propios de v.state.
+    """
+
+    def __init__(self, view: Any, max_depth: int = 50, max_bytes: int = 8 * 1024 * 1024) -> None:
         self.view = view
         self.max_depth = max_depth
-        self._stack: List[Dict[str, Any]] = []
+        # recientes sin comprimir, antiguos con zlib; límite por cantidad y por bytes
+        self._stack = SnapshotHistory(max_steps=max_depth, max_bytes=max_bytes)
+
+    def _engine(self) -> Any:
+        """GameManager cuyo UndoLog es el motor compartido (None si no hay)."""
+        gm = getattr(self.view, "game_manager", None)
+        log = getattr(gm, "undo_system", None)
+        if log is None or not hasattr(log, "watch_inventory"):
+            return None
+        v = self.view
+        state = v.state
+        inv = state.get("inventory") if isinstance(state, dict) else getattr(state, "inventory", None)
+        log.watch_inventory(inv)
+        log.watch("view.money", state, "money")
+        stats = getattr(v, "player_stats", None)
+        if stats is not None:
+            log.watch("view.stamina", stats, "stamina")
+            log.watch("view.reputation", stats, "reputation")
+        return gm
+
+    def get_history_size(self) -> int:
+        gm = self._engine()
+        if gm is not None:
+            return gm.undo_system.get_history_size()
+        return len(self._stack)
+
+    def _share_static(self, values: Dict[str, Any]):
+        for key in SHARED_KEYS:
+            self._stack.share(values.get(key))
 
     def snapshot(self) -> None:
+        gm = self._engine()
+        if gm is not None:
+            # misma captura que GameManager: si ya registró esta acción no se duplica
+            gm.save_current_state()
+            return
         v = self.view
         snap: Dict[str, Any] = {}
         try:
             if isinstance(v.state, dict):
-                snap["state"] = copy.deepcopy(v.state)
+                snap["state"] = copy_state(v.state)
+                self._share_static(v.state)
             else:
                 # minimal snapshot for non-dict states
                 minimal = {}
                 for name in ["map_data", "city_map", "orders", "jobs_data", "weather_state", "money", "player_x", "player_y", "elapsed_seconds", "inventory"]:
-                    minimal[name] = copy.deepcopy(getattr(v.state, name, None))
-                snap["state_min"] = minimal
+                    minimal[name] = getattr(v.state, name, None)
+                snap["state_min"] = copy_state(minimal)
+                self._share_static(minimal)
             # player pos
             try:
                 snap["player_pos"] = (int(v.player.cell_x), int(v.player.cell_y))
@@ -30,15 +94,19 @@ class UndoManager:
                 pass
         except Exception:
             return
-        self._stack.append(snap)
-        if len(self._stack) > self.max_depth:
-            self._stack.pop(0)
+        self._stack.push(snap)
 
-    def restore(self) -> bool:
-        if not self._stack:
+    def restore(self, steps: int = 1) -> bool:
+        """Vuelve `steps` snapshots atrás (los intermedios se descartan sin restaurarlos)."""
+        if steps < 1:
+            return False
+        gm = self._engine()
+        if gm is not None:
+            return bool(gm.undo_n_steps(steps))
+        if self._stack.is_empty():
             return False
         v = self.view
-        snap = self._stack.pop()
+        snap = self._stack.pop_n(steps)
         try:
             if "state" in snap and isinstance(v.state, dict):
                 v.state.clear()
@@ -14,12 +14,24 @@ class UpdateManager:
 
     def on_update(self, dt: float) -> None:
         """Main update method that handles all game logic updates."""
-        if self.parent.game_manager:
+        # eventos de deadline: GameManager los saca de la agenda una sola vez y la vista los muestra
+        deadline_events = []
+        gm = self.parent.game_manager
+        if gm:
             try:
-                self.parent.game_manager.update(dt)
+                deadline_events = list(gm.update(dt) or [])
             except Exception as e:
                 print(f"Error en game_manager.update: {e}")
 
+        # pedidos de la vista en otro JobManager (la agenda solo dispara lo que vence)
+        if gm and hasattr(gm, "handle_deadline_events") and self.parent.job_manager is not getattr(gm, "job_manager", None):
+            deadline_events.extend(gm.handle_deadline_events(self.parent.job_manager))
+        for kind, job in deadline_events:
+            self._on_deadline_event(kind, job)
+
+        # clima: se avanza una sola vez por tick; todos leen el mismo snapshot
+        weather_snapshot = self.parent.weather.advance(dt)
+
         # notifications timers and spawning
         self.parent.notifications.update_timers(dt)
 
@@ -34,7 +46,9 @@ class UpdateManager:
         was_moving = bool(self.parent.player.moving)
 
         try:
-            self.parent.player.update(dt, player_stats=self.parent.player_stats, weather_system=self.parent.weather_markov, inventory=inventory)
+            self.parent.player.update(dt, player_stats=self.parent.player_stats, weather_system=self.parent.weather_markov, inventory=inventory,
+                                      weather_grid=getattr(self.parent, "weather_grid", None),
+                                      weather_snapshot=weather_snapshot)
         except Exception:
             try:
                 self.parent.player.update(dt)
@@ -91,9 +105,7 @@ class UpdateManager:
                         on_time = True
                         try:
                             if hasattr(self.parent.game_manager, "get_job_time_remaining"):
-                                rem = self.parent.game_manager.get_job_time_remaining(
-                                    getattr(job, "raw", {}) if job is not None else {}
-                                )
+                                rem = self.parent.game_manager.get_job_time_remaining(job if job is not None else {})
                                 # on_time = True si no hay deadline o si aún hay tiempo restante
                                 on_time = (rem == float("inf")) or (rem >= 0)
                         except Exception:
@@ -135,7 +147,7 @@ class UpdateManager:
             print(f"[ENDGAME] Error: {e}")
 
         try:
-            current_weather = self.parent.weather.get_current_condition_name()
+            current_weather = self.parent.weather.get_current_condition_name(weather_snapshot)
             self.parent.player_stats.update(
                 dt,
                 bool(self.parent.player.moving),
@@ -147,5 +159,25 @@ class UpdateManager:
         except Exception as e:
             print(f"Error actualizando player_stats: {e}")
 
-        # unified weather update/render state propagation
-        self.parent.weather.update_and_render(dt)
+        # render del clima con el snapshot de este tick
+        self.parent.weather.render(dt, weather_snapshot)
+
+    def _on_deadline_event(self, kind: str, job) -> None:
+        """Avisos en pantalla para eventos de deadline de pedidos activos."""
+        jid = getattr(job, "id", "?")
+        try:
+            if kind == "warning":
+                alerted = getattr(self.parent, "_alerted_deadline_jobs", None)
+                if alerted is None:
+                    alerted = set()
+                    self.parent._alerted_deadline_jobs = alerted
+                if jid not in alerted:
+                    alerted.add(jid)
+                    self.parent.show_notification(f"⏰ Pedido {jid} por vencer")
+            elif kind == "late":
+                self.parent.show_notification(f"⏱️ Pedido {jid} fuera de plazo")
+            elif kind == "lost":
+                self.parent.jobs_logic.remove_job_from_inventory(job)
+                self.parent.show_notification(f"📦 Pedido {jid} perdido")
+        except Exception as e:
+            print(f"[DEADLINE] Error notificando evento {kind}: {e}")
@@ -7,26 +7,58 @@ from typing import Any
 class WeatherCoordinator:
     def __init__(self, view: Any) -> None:
         self.view = view
+        self._applied_version = -1
 
-    def update_and_render(self, dt: float) -> None:
+    def advance(self, dt: float) -> Any:
+        """
+        Avanza el clima una vez por tick y retorna el WeatherSnapshot compartido
+        (jugador, stamina, renderer, game state y undo leen este mismo objeto).
+        """
+        v = self.view
+        snapshot = None
+        try:
+            if not v._freeze_weather:
+                v.weather_markov.update(dt)
+                grid = getattr(v, "weather_grid", None)
+                if grid is not None:
+                    grid.update(dt)
+            snapshot = v.weather_markov.snapshot()
+            if snapshot.version != self._applied_version:
+                v.weather_markov.apply_to_game_state(v.state, snapshot)
+                self._applied_version = snapshot.version
+        except Exception as e:
+            print(f"Error actualizando clima: {e}")
+        v.weather_snapshot = snapshot
+        return snapshot
+
+    def render(self, dt: float, snapshot: Any = None) -> None:
         v = self.view
         try:
             if v._freeze_weather:
                 ws = v._resume_weather_state or (
                     v.state.get("weather_state") if isinstance(v.state, dict) else getattr(v.state, "weather_state", {})
                 ) or {}
-                v.weather_renderer.update(dt, ws)
             else:
-                v.weather_markov.update(dt)
-                v.weather_markov.apply_to_game_state(v.state)
-                ws = v.state.get("weather_state", {}) if isinstance(v.state, dict) else getattr(v.state, "weather_state", {})
-                v.weather_renderer.update(dt, ws)
+                ws = snapshot if snapshot is not None else v.weather_markov.snapshot()
+                grid = getattr(v, "weather_grid", None)
+                if grid is not None:
+                    # clima regional: las partículas siguen el distrito del jugador
+                    ws = grid.state_at(v.player.cell_x, v.player.cell_y)
+            v.weather_renderer.update(dt, ws)
         except Exception as e:
             print(f"Error actualizando clima: {e}")
 
-    def get_current_condition_name(self) -> str:
+    def update_and_render(self, dt: float) -> None:
+        self.render(dt, self.advance(dt))
+
+    def get_current_condition_name(self, snapshot: Any = None) -> str:
         v = self.view
         try:
+            grid = getattr(v, "weather_grid", None)
+            if grid is not None:
+                return grid.condition_at(v.player.cell_x, v.player.cell_y)
+            if snapshot is not None:
+                return snapshot.condition
             if hasattr(v.weather_markov, "current_condition"):
                 return v.weather_markov.current_condition
             return v.weather_markov.get_state().get("condition", "clear")
@@ -250,8 +250,13 @@ class WeatherRenderer:
                 cond = ws.get("condition", "clear")
                 intensity = float(ws.get("intensity", 0.0))
                 alpha = self._tile_overlay_alpha(cond, intensity)
+                weather_grid = getattr(self.view, "weather_grid", None)
                 for y in range(rows):
                     for x in range(cols):
+                        if weather_grid is not None:
+                            d = weather_grid.district_of(x, y)
+                            cond = weather_grid.condition[d]
+                            alpha = self._tile_overlay_alpha(cond, weather_grid.intensity[d])
                         px = x * tile_size + tile_size / 2
                         py = (rows - 1 - y) * tile_size + tile_size / 2
                         if alpha > 0:
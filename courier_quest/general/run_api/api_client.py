@@ -375,32 +375,98 @@ class ApiClient:
         return ApiClient._get_fallback_map()
 
     def get_jobs(self) -> list:
+        """Lista de pedidos válidos (misma descarga, caché y fallback que jobs_file)."""
         try:
-            data = self.fetch_data("city/jobs")
-            if not data:
-                return []
-
-            if isinstance(data, dict) and "jobs" in data:
-                jobs = data["jobs"]
-            elif isinstance(data, list):
-                jobs = data
-            else:
-                logger.warning("Formato de pedidos inesperado")
-                return []
-
-            valid_jobs = []
-            for job in jobs:
-                if self._validate_job(job):
-                    valid_jobs.append(job)
-
-            if len(valid_jobs) < len(jobs):
-                logger.warning(f"Se descartaron {len(jobs) - len(valid_jobs)} pedidos inválidos")
-
-            return valid_jobs
+            return list(self.iter_jobs())
         except Exception as e:
             logger.error(f"Error al procesar pedidos: {e}")
             return []
 
+    def iter_jobs(self, chunk_size: int = 64 * 1024, attempts: int = 2):
+        """Pedidos válidos decodificados por partes, sin cargar el documento entero."""
+        source = self.jobs_file(chunk_size, attempts)
+        if source is None:
+            return
+        try:
+            yield from source
+        except (ValueError, OSError) as e:
+            logger.error(f"Error al procesar pedidos por streaming: {e}")
+        if source.rejected:
+            logger.warning(f"Se descartaron {source.rejected} pedidos inválidos")
+
+    def jobs_file(self, chunk_size: int = 64 * 1024, attempts: int = 2):
+        """Catálogo de pedidos en disco (JobsFile) que se lee por partes y bajo demanda.
+
+        Con conexión la respuesta se descarga completa a la caché antes de entregar
+        nada: la conexión no queda abierta durante la partida y un corte a mitad no
+        deja pedidos a medias (se reintenta `attempts` veces). Sin conexión, o si
+        todos los intentos fallan, se usa la caché más reciente o el archivo de /data.
+        Retorna None si no hay datos.
+        """
+        from ..game.job_feed import JobsFile
+
+        endpoint = "city/jobs"
+        path = self._download_jobs(endpoint, chunk_size, attempts) if self._check_connection() else None
+        if path is None:
+            latest_cache, _ = self._get_latest_cache(endpoint)
+            local_name = self.endpoint_to_local.get(endpoint)
+            local_file = (self.data_dir / local_name) if local_name else None
+            path = latest_cache or (local_file if local_file and local_file.exists() else None)
+            if path is None:
+                logger.error(f"[ERROR] No hay datos disponibles para {endpoint}")
+                return None
+        return JobsFile(path, chunk_size, accept=lambda job: isinstance(job, dict) and self._validate_job(job))
+
+    def _download_jobs(self, endpoint: str, chunk_size: int, attempts: int) -> Optional[Path]:
+        """Descarga `endpoint` por partes a su caché; retorna la ruta solo si llegó completo.
+
+        El arreglo se decodifica mientras se escribe (sin guardar los pedidos) para
+        detectar una respuesta truncada antes de reemplazar la caché.
+        """
+        from ..game.job_feed import iter_json_array
+
+        url = f"{self.base_url}/{endpoint}"
+        cache_file = self._cache_path(endpoint)
+        for attempt in range(1, max(1, attempts) + 1):
+            tmp_name = None
+            try:
+                logger.info(f"Descargando pedidos desde API: {url} (intento {attempt})")
+                cache_file.parent.mkdir(exist_ok=True, parents=True)
+                with self.session.get(url, timeout=6, stream=True) as resp:
+                    resp.raise_for_status()
+                    resp.encoding = resp.encoding or "utf-8"
+                    with tempfile.NamedTemporaryFile("w", delete=False, encoding="utf-8",
+                                                     dir=str(cache_file.parent)) as tmp:
+                        tmp_name = tmp.name
+                        chunks = resp.iter_content(chunk_size=chunk_size, decode_unicode=True)
+                        for _ in iter_json_array(self._write_through(chunks, tmp)):
+                            pass
+                # misma caché principal y timestamped que fetch_data
+                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+                base_name = endpoint.replace("/", "_")
+                shutil.copyfile(tmp_name, str(self.cache_dir / f"{base_name}_{timestamp}.json"))
+                shutil.move(tmp_name, str(cache_file))
+                tmp_name = None
+                logger.info(f"Datos guardados en {cache_file}")
+                return cache_file
+            except (requests.RequestException, ValueError, OSError) as e:
+                logger.warning(f"Descarga de pedidos falló (intento {attempt}/{attempts}): {e}")
+            finally:
+                if tmp_name and os.path.exists(tmp_name):
+                    try:
+                        os.remove(tmp_name)
+                    except OSError:
+                        pass
+        self.offline_mode = True
+        return None
+
+    @staticmethod
+    def _write_through(chunks, f):
+        """Pasa los trozos sin cambios y los escribe en `f`."""
+        for chunk in chunks:
+            f.write(chunk)
+            yield chunk
+
     def _validate_job(self, job: Dict) -> bool:
         required_fields = ["id", "pickup", "dropoff", "payout", "deadline", "weight"]
         return all(field in job for field in required_fields)
@@ -461,6 +527,7 @@ class ApiClient:
                 "intensity": intensity,
                 "speed_multiplier": speed_multipliers.get(condition, 1.0),
                 "bursts": bursts,
+                "transition": data.get("transition", {}) if isinstance(data, dict) else {},
                 "city": data.get("city", "UnknownCity") if isinstance(data, dict) else "UnknownCity",
                 "date": data.get("date", datetime.now().strftime("%Y-%m-%d")) if isinstance(data, dict) else datetime.now().strftime("%Y-%m-%d")
             }